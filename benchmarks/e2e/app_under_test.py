@@ -0,0 +1,30 @@
+"""
+WSGI entry point for the end-to-end benchmark: `main:app` with FCM stubbed.
+
+Started by benchmarks/e2e/run.py as
+
+    gunicorn --chdir <project root> --pythonpath benchmarks/e2e app_under_test:app
+
+Everything else (Telnyx, Twilio, OpenAI, tweb, S3) is real client code pointed
+at local stand-ins through environment variables. Firebase Admin cannot be
+pointed at a local endpoint, so `send_notification` — which every push goes
+through after its payload is built — is replaced by a stub that sleeps for
+BENCH_FCM_LATENCY_MS and reports success.
+"""
+
+import os
+import time
+
+from services.push_notification_service import push_notification_service
+
+FCM_LATENCY_SECONDS = float(os.environ.get("BENCH_FCM_LATENCY_MS", "30")) / 1000
+
+
+def _send_notification(fcm_token, title, body, data=None, raise_unregistered=False):
+    time.sleep(FCM_LATENCY_SECONDS)
+    return True
+
+
+push_notification_service.send_notification = _send_notification
+
+from main import app  # noqa: E402
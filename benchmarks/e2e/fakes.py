@@ -0,0 +1,247 @@
+"""
+In-process HTTP stand-ins for the services the app calls, each with a fixed
+response latency:
+
+    telnyx   POST /v2/calls/<id>/actions/<action>      Call Control
+             GET  /recordings/<id>.mp3                  pre-signed recording download
+    twilio   GET  /2010-04-01/Accounts/<sid>/Recordings/<sid>.mp3
+    openai   POST /v1/audio/transcriptions              Whisper, verbose_json
+    tweb     GET  /api/appuser?userId=                  always a non-paying user
+    s3       PUT/HEAD/GET /<bucket>/<key>               path-style object store
+
+S3 uses moto's server when moto is installed and falls back to `FakeS3`
+otherwise. Every fake counts requests per route so the harness can check
+that the expected work happened.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class FakeService:
+    """A threaded HTTP server dispatching (method, path regex) routes to handlers."""
+
+    name = "fake"
+    routes: list[tuple[str, str, str]] = []     # (method, regex, handler method name)
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_seconds = latency_ms / 1000
+        self.counts: Counter = Counter()
+        self._counts_lock = threading.Lock()
+        self._compiled = [(method, re.compile(pattern), handler) for method, pattern, handler in self.routes]
+        self._server = _Server(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f"fake-{self.name}", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self, route: str):
+        with self._counts_lock:
+            self.counts[route] += 1
+
+    def _handler_class(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _dispatch(self):
+                path = self.path.split("?", 1)[0]
+                for method, pattern, handler in service._compiled:
+                    match = pattern.fullmatch(path) if method == self.command else None
+                    if match:
+                        body = self._read_body()
+                        if service.latency_seconds:
+                            time.sleep(service.latency_seconds)
+                        service._count(handler)
+                        status, headers, payload = getattr(service, handler)(self, body, *match.groups())
+                        return self._respond(status, headers, payload)
+                self._read_body()
+                self._respond(404, {"Content-Type": "application/json"}, b'{"error":"not found"}')
+
+            def _read_body(self) -> bytes:
+                if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    chunks = []
+                    while True:
+                        size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                        if size == 0:
+                            while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                                pass
+                            return b"".join(chunks)
+                        chunks.append(self.rfile.read(size))
+                        self.rfile.readline()
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length) if length else b""
+
+            def _respond(self, status: int, headers: dict, payload: bytes):
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(payload)
+
+            do_GET = do_POST = do_PUT = do_HEAD = do_DELETE = _dispatch
+
+        return Handler
+
+
+def _json(payload, status: int = 200):
+    return status, {"Content-Type": "application/json"}, json.dumps(payload).encode()
+
+
+def _audio(size: int):
+    return 200, {"Content-Type": "audio/mpeg"}, b"\xff\xfb" + b"\x00" * max(0, size - 2)
+
+
+class FakeTelnyx(FakeService):
+    name = "telnyx"
+    routes = [
+        ("POST", r"/v2/calls/([^/]+)/actions/([^/]+)", "call_action"),
+        ("GET", r"/recordings/([^/]+)\.mp3", "recording"),
+    ]
+
+    def __init__(self, latency_ms: float = 0.0, audio_bytes: int = 256 * 1024):
+        self.audio_bytes = audio_bytes
+        super().__init__(latency_ms)
+
+    def recording_url(self, recording_id: str) -> str:
+        return f"{self.url}/recordings/{recording_id}.mp3"
+
+    def call_action(self, request, body, call_control_id, action):
+        return _json({"data": {"result": "ok", "call_control_id": call_control_id, "action": action}})
+
+    def recording(self, request, body, recording_id):
+        return _audio(self.audio_bytes)
+
+
+class FakeTwilio(FakeService):
+    name = "twilio"
+    routes = [("GET", r"/2010-04-01/Accounts/([^/]+)/Recordings/([^/]+)\.mp3", "recording")]
+
+    def __init__(self, latency_ms: float = 0.0, audio_bytes: int = 256 * 1024):
+        self.audio_bytes = audio_bytes
+        super().__init__(latency_ms)
+
+    def recording(self, request, body, account_sid, recording_sid):
+        if not request.headers.get("Authorization", "").startswith("Basic "):
+            return _json({"message": "Authentication required"}, 401)
+        return _audio(self.audio_bytes)
+
+
+class FakeOpenAI(FakeService):
+    name = "openai"
+    routes = [("POST", r"/v1/audio/transcriptions", "transcription")]
+
+    def __init__(self, latency_ms: float = 0.0, segments: int = 40):
+        self.segments = segments
+        super().__init__(latency_ms)
+
+    def transcription(self, request, body):
+        segments = [
+            {"id": i, "start": i * 3.0, "end": i * 3.0 + 2.8, "text": f"This is phrase number {i} of the call."}
+            for i in range(self.segments)
+        ]
+        return _json({
+            "task": "transcribe",
+            "language": "english",
+            "duration": self.segments * 3.0,
+            "text": " ".join(s["text"] for s in segments),
+            "segments": segments,
+        })
+
+
+class FakeTweb(FakeService):
+    name = "tweb"
+    routes = [("GET", r"/api/appuser", "app_user")]
+
+    def app_user(self, request, body):
+        return _json({"totalRevenue": 0, "hasTrial": False})
+
+
+class FakeS3(FakeService):
+    """Path-style S3 that keeps object sizes only; enough for put_object, head_object and presigning."""
+
+    name = "s3"
+    routes = [
+        ("PUT", r"/([^/]+)/?", "create_bucket"),
+        ("PUT", r"/([^/]+)/(.+)", "put_object"),
+        ("HEAD", r"/([^/]+)/(.+)", "head_object"),
+        ("GET", r"/([^/]+)/(.+)", "get_object"),
+    ]
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.objects: dict[tuple[str, str], int] = {}
+        super().__init__(latency_ms)
+
+    def create_bucket(self, request, body, bucket):
+        return 200, {}, b""
+
+    def put_object(self, request, body, bucket, key):
+        self.objects[(bucket, key)] = len(body)
+        return 200, {"ETag": '"0"'}, b""
+
+    def head_object(self, request, body, bucket, key):
+        if (bucket, key) not in self.objects:
+            return 404, {}, b""
+        return 200, {"Content-Type": "audio/mpeg", "ETag": '"0"'}, b""
+
+    def get_object(self, request, body, bucket, key):
+        if (bucket, key) not in self.objects:
+            return 404, {"Content-Type": "application/xml"}, b"<Error><Code>NoSuchKey</Code></Error>"
+        return _audio(self.objects[(bucket, key)])
+
+
+class MotoS3:
+    """moto's standalone S3 server, used instead of FakeS3 when moto is installed."""
+
+    name = "s3 (moto)"
+
+    def __init__(self):
+        from moto.server import ThreadedMotoServer
+
+        self._server = ThreadedMotoServer(ip_address="127.0.0.1", port=0)
+        self.counts: Counter = Counter()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.get_host_and_port()
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._server.start()
+        return self
+
+    def stop(self):
+        self._server.stop()
+
+
+def start_s3(latency_ms: float = 0.0):
+    """Start moto's S3 server if moto is installed, otherwise FakeS3 (which supports latency)."""
+    try:
+        return MotoS3().start()
+    except ImportError:
+        return FakeS3(latency_ms).start()
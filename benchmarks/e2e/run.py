@@ -0,0 +1,441 @@
+#!/usr/bin/env python
+"""
+End-to-end benchmark: the real app under gunicorn against local stand-ins.
+
+Starts fake Telnyx, Twilio, OpenAI (Whisper), tweb and S3 servers (see
+fakes.py), runs `main:app` under gunicorn with every external endpoint
+pointed at them and FCM stubbed (app_under_test.py), then for each
+concurrency level measures
+
+  * the call lifecycle: call.initiated / Twilio answer, then the recording-
+    complete callback, alternating Telnyx and Twilio calls; followed by how
+    long the background jobs (S3 copy, Whisper, pushes) take to drain, and
+  * POST /get_calls_for_user for users with --history seeded calls.
+
+Before the first level it checks that repeated call.initiated webhooks for
+one caller are served from the phone -> user cache (services/user_cache.py).
+
+Usage:
+    python benchmarks/e2e/run.py
+    python benchmarks/e2e/run.py --concurrency 1,16,64 --calls 200
+    DATABASE_URL=postgresql://... python benchmarks/e2e/run.py --workers 4 --threads 8
+    python benchmarks/e2e/run.py --latency openai=1500 --latency telnyx=80 --json results.json
+
+Without DATABASE_URL a throwaway SQLite file is used. SQLite serialises
+writes, so use Postgres for numbers that mean anything; the benchmark creates
+its tables and rows in whatever database it is given, so never point it at
+production.
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy import create_engine, func, select
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+E2E_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from fakes import FakeOpenAI, FakeTelnyx, FakeTweb, FakeTwilio, start_s3  # noqa: E402
+from database.database import db  # noqa: E402
+# The package import registers every table for create_all() below.
+from models import Call, CallTranscript, NotificationOutbox, User  # noqa: E402
+
+DEFAULT_LATENCY_MS = {
+    "telnyx": 30,
+    "twilio": 30,
+    "openai": 500,
+    "tweb": 20,
+    "s3": 15,
+    "fcm": 30,
+}
+TWILIO_ACCOUNT_SID = "ACbench"
+S3_BUCKET = "bench-recordings"
+METRICS_TOKEN = "bench"
+
+
+# ── helpers ───────────────────────────────────────────────────────────────────
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies_ms: list[float]) -> dict:
+    values = sorted(latencies_ms)
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+        "max_ms": round(values[-1], 2) if values else 0.0,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def parse_latency(values: list[str]) -> dict[str, float]:
+    latency = dict(DEFAULT_LATENCY_MS)
+    for value in values or []:
+        name, _, ms = value.partition("=")
+        if name not in latency:
+            raise SystemExit(f"unknown service {name!r}; expected one of {', '.join(latency)}")
+        latency[name] = float(ms)
+    return latency
+
+
+class Client:
+    """Per-thread keep-alive sessions, like a carrier's webhook sender."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self._local = threading.local()
+
+    def post(self, path: str, **kwargs) -> tuple[int | None, float, int]:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        started = time.perf_counter()
+        try:
+            response = session.post(self.base_url + path, timeout=60, **kwargs)
+            status, size = response.status_code, len(response.content)
+        except requests.RequestException:
+            status, size = None, 0
+        return status, (time.perf_counter() - started) * 1000, size
+
+
+# ── database ──────────────────────────────────────────────────────────────────
+
+def prepare_database(engine, users: int, history: int, segments: int) -> list[tuple[uuid.UUID, str]]:
+    """Create the schema and seed `users` users with `history` completed calls each."""
+    db.metadata.create_all(engine)
+    run_token = uuid.uuid4().hex[:8]
+    seeded = [(uuid.uuid4(), f"+1555{run_token[:3]}{i:05d}") for i in range(users)]
+    segment_list = [
+        {"start": i * 3.0, "end": i * 3.0 + 2.8, "text": f"This is phrase number {i} of the call."}
+        for i in range(segments)
+    ]
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": user_id, "phone_number": phone, "country_code": "US", "fcm_token": f"token-{user_id.hex[:8]}",
+             "push_notifications_enabled": True}
+            for user_id, phone in seeded
+        ])
+        for user_id, phone in seeded:
+            call_ids = [f"seed-{run_token}-{user_id.hex[:8]}-{i}" for i in range(history)]
+            conn.execute(Call.__table__.insert(), [
+                {"id": call_id, "user_id": user_id, "from_phone": phone, "call_date": now - timedelta(hours=i),
+                 "recording_url": f"http://bench/recording/{call_id}", "recording_duration": 60,
+                 "recording_status": "completed"}
+                for i, call_id in enumerate(call_ids)
+            ])
+            conn.execute(CallTranscript.__table__.insert(), [
+                {"call_id": call_id, "status": "completed", "text": "seeded transcript",
+                 "segments": segment_list, "language": "english", "duration_seconds": segments * 3.0}
+                for call_id in call_ids
+            ])
+    return seeded
+
+
+def pending_work(engine, call_ids: list[str]) -> tuple[int, int]:
+    """Return (unfinished transcripts among call_ids, pending outbox entries)."""
+    with engine.connect() as conn:
+        transcripts = 0
+        for start in range(0, len(call_ids), 500):
+            transcripts += conn.execute(
+                select(func.count()).select_from(CallTranscript.__table__).where(
+                    CallTranscript.__table__.c.call_id.in_(call_ids[start:start + 500]),
+                    CallTranscript.__table__.c.status.in_(("pending", "processing")),
+                )
+            ).scalar_one()
+        outbox = conn.execute(
+            select(func.count()).select_from(NotificationOutbox.__table__)
+            .where(NotificationOutbox.__table__.c.status.in_(("pending", "sending")))
+        ).scalar_one()
+    return transcripts, outbox
+
+
+# ── app under test ────────────────────────────────────────────────────────────
+
+def start_app(args, database_url: str, fakes: dict, latency: dict, log_path: Path) -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": database_url,
+        "HOST": base_url,
+        "RUN_BACKGROUND_JOBS": "1",
+        "TELNYX_API_BASE": f"{fakes['telnyx'].url}/v2",
+        "TELNYX_API_KEY": "bench",
+        "TWILIO_ACCOUNT_SID": TWILIO_ACCOUNT_SID,
+        "TWILIO_AUTH_TOKEN": "bench",
+        "TWILIO_API_BASE": fakes["twilio"].url,
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{fakes['openai'].url}/v1",
+        "TWEB_BASE_URL": fakes["tweb"].url,
+        "S3_BUCKET": S3_BUCKET,
+        "S3_ENDPOINT": fakes["s3"].url,
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "BENCH_FCM_LATENCY_MS": str(latency["fcm"]),
+        # /metrics aggregates every worker (gunicorn.conf.py creates the directory).
+        "PROMETHEUS_MULTIPROC_DIR": str(log_path.parent / "prometheus"),
+        "METRICS_TOKEN": METRICS_TOKEN,
+    })
+    command = [
+        sys.executable, "-m", "gunicorn",
+        "--chdir", str(PROJECT_ROOT),
+        "--pythonpath", str(E2E_DIR),
+        "--bind", f"127.0.0.1:{port}",
+        "--workers", str(args.workers),
+        "--threads", str(args.threads),
+        "--timeout", "0",
+        "--backlog", "2048",
+        "app_under_test:app",
+    ]
+    log = open(log_path, "w")
+    process = subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"app exited during startup; see {log_path}")
+        try:
+            requests.get(f"{base_url}/api/service/phone/US", timeout=1)
+            return process, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f"app did not start within 60s; see {log_path}")
+
+
+# ── scenarios ─────────────────────────────────────────────────────────────────
+
+def call_lifecycle(client: Client, fakes: dict, index: int, call_id: str, phone: str) -> dict:
+    """One inbound call: answer webhook, then recording-complete callback. Alternates carriers."""
+    if index % 2 == 0:
+        started = datetime.utcnow()
+        start = client.post("/answer", json={"data": {"event_type": "call.initiated", "payload": {
+            "from": phone, "to": "+16063938208", "call_control_id": call_id,
+        }}})
+        recording_id = f"rec-{call_id}"
+        finish = client.post("/answer", json={"data": {"event_type": "call.recording.saved", "payload": {
+            "call_control_id": call_id,
+            "recording_id": recording_id,
+            "recording_urls": {"mp3": fakes["telnyx"].recording_url(recording_id)},
+            "recording_started_at": started.isoformat() + "Z",
+            "recording_ended_at": (started + timedelta(seconds=60)).isoformat() + "Z",
+        }}})
+    else:
+        start = client.post("/answer/twilio", data={"From": phone, "To": "+16063938208", "CallSid": call_id})
+        recording_sid = f"RE{call_id}"
+        finish = client.post(f"/record-complete?call-uuid={call_id}", data={
+            "RecordingStatus": "completed",
+            "RecordingSid": recording_sid,
+            "RecordingUrl": f"{fakes['twilio'].url}/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Recordings/{recording_sid}",
+            "RecordingDuration": "60",
+        })
+    return {"start": start, "finish": finish}
+
+
+def run_lifecycle_level(client, fakes, engine, users, concurrency: int, calls: int, drain_timeout: float) -> dict:
+    run_token = uuid.uuid4().hex[:8]
+    call_ids = [f"bench-{run_token}-{i}" for i in range(calls)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(
+            lambda i: call_lifecycle(client, fakes, i, call_ids[i], users[i % len(users)][1]),
+            range(calls),
+        ))
+    wall = time.perf_counter() - started
+
+    drain_started = time.perf_counter()
+    while True:
+        transcripts, outbox = pending_work(engine, call_ids)
+        if (transcripts == 0 and outbox == 0) or time.perf_counter() - drain_started > drain_timeout:
+            break
+        time.sleep(0.25)
+    drain = time.perf_counter() - drain_started
+
+    errors = sum(1 for r in results for step in r.values() if step[0] is None or step[0] >= 500)
+    return {
+        "scenario": "lifecycle",
+        "concurrency": concurrency,
+        "calls": calls,
+        "calls_per_second": round(calls / wall, 2),
+        "answer": summarize([r["start"][1] for r in results]),
+        "recording_complete": summarize([r["finish"][1] for r in results]),
+        "errors": errors,
+        "drain_seconds": round(drain, 2),
+        "undrained_transcripts": transcripts,
+        "undrained_pushes": outbox,
+    }
+
+
+def run_reads_level(client, users, concurrency: int, requests_count: int) -> dict:
+    def one(i):
+        user_id, _ = users[i % len(users)]
+        return client.post("/get_calls_for_user", json={"user_id": str(user_id)})
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests_count)))
+    wall = time.perf_counter() - started
+
+    return {
+        "scenario": "get_calls_for_user",
+        "concurrency": concurrency,
+        "requests": requests_count,
+        "requests_per_second": round(requests_count / wall, 2),
+        "latency": summarize([r[1] for r in results]),
+        "mean_response_kb": round(sum(r[2] for r in results) / max(1, len(results)) / 1024, 1),
+        "errors": sum(1 for r in results if r[0] != 200),
+    }
+
+
+def metric_value(base_url: str, sample: str) -> float:
+    """Value of one sample (`name{labels}` as exposed) in /metrics, 0 if absent."""
+    text = requests.get(f"{base_url}/metrics", timeout=10,
+                        headers={"Authorization": f"Bearer {METRICS_TOKEN}"}).text
+    for line in text.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def check_phone_cache(client, base_url: str, phone: str, workers: int) -> float:
+    """
+    Send workers + 1 sequential call.initiated webhooks from a caller no worker
+    has looked up yet. Some worker handles two of them, so its second lookup
+    must hit the cache. Returns the number of hits.
+    """
+    sample = 'user_cache_lookups_total{cache="phone",result="hit"}'
+    before = metric_value(base_url, sample)
+    run_token = uuid.uuid4().hex[:8]
+    for i in range(workers + 1):
+        client.post("/answer", json={"data": {"event_type": "call.initiated", "payload": {
+            "from": phone, "to": "+16063938208", "call_control_id": f"bench-cache-{run_token}-{i}",
+        }}})
+    return metric_value(base_url, sample) - before
+
+
+# ── report ────────────────────────────────────────────────────────────────────
+
+def print_report(lifecycle: list[dict], reads: list[dict]):
+    print("\ncall lifecycle")
+    print(f"{'conc':>5}{'calls':>7}{'calls/s':>9}{'answer p50':>12}{'p99':>8}"
+          f"{'recording p50':>15}{'p99':>8}{'errors':>8}{'drain s':>9}")
+    for r in lifecycle:
+        print(f"{r['concurrency']:>5}{r['calls']:>7}{r['calls_per_second']:>9.1f}"
+              f"{r['answer']['p50_ms']:>12.1f}{r['answer']['p99_ms']:>8.1f}"
+              f"{r['recording_complete']['p50_ms']:>15.1f}{r['recording_complete']['p99_ms']:>8.1f}"
+              f"{r['errors']:>8}{r['drain_seconds']:>9.1f}")
+        if r["undrained_transcripts"] or r["undrained_pushes"]:
+            print(f"      not drained: {r['undrained_transcripts']} transcripts, {r['undrained_pushes']} pushes")
+
+    print("\nget_calls_for_user")
+    print(f"{'conc':>5}{'requests':>10}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'KB/resp':>9}{'errors':>8}")
+    for r in reads:
+        print(f"{r['concurrency']:>5}{r['requests']:>10}{r['requests_per_second']:>9.1f}"
+              f"{r['latency']['p50_ms']:>9.1f}{r['latency']['p99_ms']:>9.1f}"
+              f"{r['mean_response_kb']:>9.1f}{r['errors']:>8}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--calls", type=int, default=100, help="call lifecycles per level")
+    parser.add_argument("--reads", type=int, default=300, help="get_calls_for_user requests per level")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--history", type=int, default=50, help="seeded calls per user")
+    parser.add_argument("--segments", type=int, default=40, help="transcript segments per call")
+    parser.add_argument("--audio-kb", type=int, default=256, help="size of fake recordings")
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn workers (forced to 1 on SQLite)")
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker")
+    parser.add_argument("--latency", action="append", metavar="SERVICE=MS",
+                        help=f"stand-in latency; services: {', '.join(DEFAULT_LATENCY_MS)}")
+    parser.add_argument("--drain-timeout", type=float, default=120.0)
+    parser.add_argument("--json", dest="json_path", help="also write results as JSON")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",") if level]
+    latency = parse_latency(args.latency)
+    workdir = Path(tempfile.mkdtemp(prefix="call-recorder-bench-"))
+    database_url = os.environ.get("DATABASE_URL") or f"sqlite:///{workdir / 'bench.db'}"
+    is_sqlite = database_url.startswith("sqlite")
+    if is_sqlite:
+        args.workers = 1
+
+    audio_bytes = args.audio_kb * 1024
+    fakes = {
+        "telnyx": FakeTelnyx(latency["telnyx"], audio_bytes).start(),
+        "twilio": FakeTwilio(latency["twilio"], audio_bytes).start(),
+        "openai": FakeOpenAI(latency["openai"], args.segments).start(),
+        "tweb": FakeTweb(latency["tweb"]).start(),
+        "s3": start_s3(latency["s3"]),
+    }
+    requests.put(f"{fakes['s3'].url}/{S3_BUCKET}", timeout=5)
+
+    engine = create_engine(database_url)
+    users = prepare_database(engine, args.users, args.history, args.segments)
+    log_path = workdir / "app.log"
+    process, base_url = start_app(args, database_url, fakes, latency, log_path)
+    print(f"app: {base_url} ({args.workers} worker(s) x {args.threads} threads), "
+          f"db: {'sqlite' if is_sqlite else engine.url.render_as_string(hide_password=True)}, log: {log_path}")
+    print("stand-in latency (ms): " + ", ".join(f"{k}={v:g}" for k, v in latency.items()))
+
+    client = Client(base_url)
+    lifecycle, reads = [], []
+    try:
+        phone_cache_hits = check_phone_cache(client, base_url, users[0][1], args.workers)
+        print(f"phone cache: {phone_cache_hits:g} hit(s) over {args.workers + 1} call.initiated from one caller")
+        for level in levels:
+            lifecycle.append(run_lifecycle_level(client, fakes, engine, users, level, args.calls, args.drain_timeout))
+        for level in levels:
+            reads.append(run_reads_level(client, users, level, args.reads))
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        for fake in fakes.values():
+            fake.stop()
+
+    print_report(lifecycle, reads)
+    print("\nstand-in requests: " + ", ".join(
+        f"{name}:{route}={count}" for name, fake in fakes.items() for route, count in sorted(fake.counts.items())
+    ))
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps({
+            "workers": args.workers, "threads": args.threads, "database": "sqlite" if is_sqlite else "postgresql",
+            "latency_ms": latency, "lifecycle": lifecycle, "get_calls_for_user": reads,
+        }, indent=2))
+
+    failed = any(r["errors"] or r["undrained_transcripts"] for r in lifecycle) or any(r["errors"] for r in reads)
+    if not phone_cache_hits:
+        print("FAIL: repeated call.initiated from one caller never hit the phone cache")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
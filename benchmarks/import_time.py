@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Startup-time benchmark: how long does `import main` take, and where does it go?
+
+Runs `python -X importtime -c "import main"` in fresh interpreters, prints the
+cumulative import time of the heaviest modules pulled in by main, and exits
+non-zero on a regression so it can gate CI.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 5 --top 25
+    python benchmarks/import_time.py --budget-ms 800
+
+A regression is either
+  * the median cumulative import time of `main` exceeding --budget-ms, or
+  * one of the --lazy modules (heavy SDKs that must only load on first use)
+    being imported eagerly.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# SDKs that main.py and services/ must import lazily.
+LAZY_MODULES = (
+    "openai",
+    "twilio.rest",
+    "boto3",
+    "firebase_admin",
+    "flask_restful",
+)
+
+
+def _measure_once(module: str) -> dict[str, tuple[int, int]]:
+    """Return {module: (self_us, cumulative_us)} for one cold import of `module`."""
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite://")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"import {module} failed")
+
+    timings: dict[str, tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="module to import (default: main)")
+    parser.add_argument("--runs", type=int, default=3, help="number of cold imports to take the median of")
+    parser.add_argument("--top", type=int, default=15, help="number of modules to list")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if the median import exceeds this")
+    parser.add_argument("--lazy", nargs="*", default=list(LAZY_MODULES),
+                        help="modules that must not be imported eagerly")
+    args = parser.parse_args()
+
+    runs = [_measure_once(args.module) for _ in range(max(1, args.runs))]
+
+    names = set().union(*runs)
+    median_cumulative = {
+        name: statistics.median(run.get(name, (0, 0))[1] for run in runs)
+        for name in names
+    }
+    total_ms = median_cumulative.get(args.module, 0) / 1000
+
+    print(f"import {args.module}: {total_ms:.1f} ms (median of {len(runs)} cold runs)\n")
+    print(f"{'cumulative ms':>14}  module")
+    heaviest = sorted(
+        (name for name in names if name != args.module),
+        key=lambda name: median_cumulative[name],
+        reverse=True,
+    )
+    for name in heaviest[:args.top]:
+        print(f"{median_cumulative[name] / 1000:14.1f}  {name}")
+
+    failed = False
+    eager = sorted(name for name in args.lazy if name in names)
+    if eager:
+        print(f"\nFAIL: imported eagerly, should load on first use: {', '.join(eager)}")
+        failed = True
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"\nFAIL: import {args.module} took {total_ms:.1f} ms, budget is {args.budget_ms:.1f} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+"""
+Replay a webhook journal against a running instance and report latency.
+
+Reads a journal written by services/webhook_journal.py (WEBHOOK_JOURNAL_PATH)
+and re-sends every request with the original inter-arrival gaps divided by
+--rate, so --rate 10 plays an hour of production traffic in six minutes.
+--rate 0 sends as fast as --concurrency allows.
+
+Usage:
+    python benchmarks/replay_webhooks.py webhooks.jsonl
+    python benchmarks/replay_webhooks.py webhooks.jsonl --rate 5 --concurrency 200
+    python benchmarks/replay_webhooks.py webhooks.jsonl --base-url http://127.0.0.1:8080 --unique-ids
+
+Reports p50/p90/p99/max latency per path and overall, status code counts, and
+schedule lag: how late requests went out because all --concurrency slots were
+busy. A growing lag means the target could not keep up with the replay rate.
+
+Point the instance at test carrier/OpenAI/S3 endpoints — replayed recording
+events trigger downloads and transcriptions just like live ones.
+Run it without WEBHOOK_JOURNAL_PATH, or it will journal the replay as well.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def load_journal(path: str, paths: set[str] | None, limit: int | None) -> list[dict]:
+    entries = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if paths and entry["path"] not in paths:
+                continue
+            entries.append(entry)
+    entries.sort(key=lambda e: e["received_at"])
+    return entries[:limit] if limit else entries
+
+
+def uniquify(entry: dict, suffix: str) -> dict:
+    """Give call ids a per-run suffix so a replay creates new calls instead of hitting duplicates."""
+    entry = json.loads(json.dumps(entry))
+    body = entry.get("body")
+    if isinstance(body, dict):
+        payload = (body.get("data") or {}).get("payload")
+        if isinstance(payload, dict) and payload.get("call_control_id"):
+            payload["call_control_id"] += suffix
+        if body.get("CallSid"):
+            body["CallSid"] += suffix
+    if entry.get("query", {}).get("call-uuid"):
+        entry["query"]["call-uuid"] += suffix
+    return entry
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Replayer:
+    def __init__(self, base_url: str, timeout: float):
+        self._base_url = base_url.rstrip("/")
+        self._timeout = timeout
+        self._local = threading.local()
+        self.results: list[tuple[str, int | None, float, float]] = []  # path, status, latency_ms, lag_ms
+        self._lock = threading.Lock()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            self._local.session = session
+        return session
+
+    def send(self, entry: dict, due: float):
+        lag_ms = max(0.0, (time.perf_counter() - due) * 1000)
+        kwargs = {"params": entry.get("query") or None, "timeout": self._timeout}
+        body = entry.get("body")
+        if entry.get("content_type") == "application/json":
+            kwargs["json"] = body
+        elif isinstance(body, dict):
+            kwargs["data"] = body
+        elif body is not None:
+            kwargs["data"] = body.encode()
+            kwargs["headers"] = {"Content-Type": entry.get("content_type") or "text/plain"}
+
+        started = time.perf_counter()
+        try:
+            response = self._session().request(entry["method"], self._base_url + entry["path"], **kwargs)
+            status = response.status_code
+        except requests.RequestException:
+            status = None
+        latency_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.results.append((entry["path"], status, latency_ms, lag_ms))
+
+
+def report(results, wall_seconds: float):
+    by_path = defaultdict(list)
+    for path, _, latency, _ in results:
+        by_path[path].append(latency)
+        by_path["(all)"].append(latency)
+
+    print(f"{len(results)} requests in {wall_seconds:.1f}s ({len(results) / max(wall_seconds, 1e-9):.1f} req/s)\n")
+    print(f"{'path':<20}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for path in sorted(by_path, key=lambda p: (p == "(all)", p)):
+        values = sorted(by_path[path])
+        print(f"{path:<20}{len(values):>8}{percentile(values, 50):>10.1f}{percentile(values, 90):>10.1f}"
+              f"{percentile(values, 99):>10.1f}{values[-1]:>10.1f}")
+
+    statuses = Counter(status if status is not None else "error" for _, status, _, _ in results)
+    print("\nstatus: " + ", ".join(f"{status}={count}" for status, count in sorted(statuses.items(), key=str)))
+
+    lags = sorted(lag for *_, lag in results)
+    if lags:
+        print(f"schedule lag: p50 {percentile(lags, 50):.1f} ms, p99 {percentile(lags, 99):.1f} ms, "
+              f"mean {statistics.fmean(lags):.1f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("journal", help="JSONL journal written by WEBHOOK_JOURNAL_PATH")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8080")
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="speed-up over recorded inter-arrival times; 0 = as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=50, help="maximum requests in flight")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--limit", type=int, default=None, help="replay only the first N requests")
+    parser.add_argument("--path", action="append", dest="paths", help="only replay this path (repeatable)")
+    parser.add_argument("--unique-ids", action="store_true",
+                        help="suffix call ids per run so calls are created rather than deduplicated")
+    args = parser.parse_args()
+
+    entries = load_journal(args.journal, set(args.paths) if args.paths else None, args.limit)
+    if not entries:
+        print("journal is empty")
+        return 1
+    if args.unique_ids:
+        suffix = "-r" + uuid.uuid4().hex[:8]
+        entries = [uniquify(entry, suffix) for entry in entries]
+
+    replayer = Replayer(args.base_url, args.timeout)
+    first_at = entries[0]["received_at"]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for entry in entries:
+            if args.rate > 0:
+                due = start + (entry["received_at"] - first_at) / args.rate
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                due = time.perf_counter()
+            pool.submit(replayer.send, entry, due)
+    wall = time.perf_counter() - start
+
+    report(replayer.results, wall)
+    return 0 if all(status is not None and status < 500 for _, status, _, _ in replayer.results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
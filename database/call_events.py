@@ -0,0 +1,65 @@
+"""
+Call events for the live event stream (services/event_stream.py).
+
+Write paths record an event in the same transaction as the change it
+describes, next to their calls_version bump (database/call_versions.py). On
+Postgres a trigger NOTIFYs each row at commit; the rows themselves let a
+reconnecting client replay what it missed (Last-Event-ID).
+
+The caller commits.
+
+Events older than CALL_EVENT_RETENTION_HOURS are deleted by
+`prune_call_events()`, run hourly by the background jobs
+(services/call_event_pruner.py). The newest event is always kept, so an
+empty table means no event was ever recorded, not that all were pruned.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, String, delete, func, insert, literal, select
+
+from database.database import db
+from models.call import Call
+from models.call_event import CallEvent
+
+EVENT_CALL_CREATED = 'call.created'
+EVENT_RECORDING_COMPLETED = 'recording.completed'
+EVENT_TRANSCRIPT_STATUS = 'transcript.status'
+EVENT_CALL_DELETED = 'call.deleted'
+# All of the owner's calls were deleted.
+EVENT_CALLS_CLEARED = 'calls.cleared'
+
+CALL_EVENT_RETENTION_HOURS = float(os.environ.get("CALL_EVENT_RETENTION_HOURS", "24"))
+
+
+def record_call_event(kind: str, from_phone: str | None, call_id: str | None = None, status: str | None = None):
+    if from_phone:
+        db.session.add(CallEvent(kind, from_phone, call_id, status))
+
+
+def record_call_event_for_call(kind: str, call_id: str, status: str | None = None):
+    """Like record_call_event(), resolving the owner from `call_id` inside the INSERT."""
+    db.session.execute(
+        insert(CallEvent).from_select(
+            ['kind', 'from_phone', 'call_id', 'status', 'created_at'],
+            select(
+                literal(kind, String), Call.from_phone, Call.id,
+                literal(status, String), literal(datetime.utcnow(), DateTime),
+            ).where(Call.id == call_id, Call.from_phone.isnot(None)),
+        )
+    )
+
+
+def prune_call_events() -> int:
+    """Delete events past the retention, except the newest. Commits; returns the count."""
+    result = db.session.execute(
+        delete(CallEvent)
+        .where(
+            CallEvent.created_at < datetime.utcnow() - timedelta(hours=CALL_EVENT_RETENTION_HOURS),
+            CallEvent.id < select(func.max(CallEvent.id)).scalar_subquery(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,105 @@
+"""
+Delta sync of a user's call list.
+
+A sync returns the calls whose `updated_at` is after the client's watermark,
+the ids of calls deleted since then (from `call_tombstones`), and a new
+watermark for the next sync:
+
+    <UTC timestamp taken before the queries>~<digest of the phone number>
+
+The window starts SYNC_OVERLAP_SECONDS before the watermark, so a write
+that committed just after the previous sync read its rows is not missed.
+Clients upsert by id, so the overlap only costs a few repeated rows. The
+client must replace its whole list (`reset`) when it has no watermark, when
+the watermark is older than the tombstone retention, or when it was issued
+for a different phone number.
+
+Deleting calls goes through `tombstone_calls()`, which also prunes the
+owner's tombstones older than CALL_TOMBSTONE_RETENTION_DAYS.
+"""
+
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, delete, insert, literal, select
+
+from database.database import db
+from models.call import Call
+from models.call_tombstone import CallTombstone
+
+
+# ── configuration ────────────────────────────────────────────────────────────
+
+SYNC_OVERLAP_SECONDS = float(os.environ.get("SYNC_OVERLAP_SECONDS", "5"))
+CALL_TOMBSTONE_RETENTION_DAYS = int(os.environ.get("CALL_TOMBSTONE_RETENTION_DAYS", "30"))
+
+
+# ── watermarks ────────────────────────────────────────────────────────────────
+
+def _phone_digest(phone_number: str | None) -> str:
+    return hashlib.blake2b((phone_number or "").encode(), digest_size=6).hexdigest()
+
+
+def new_watermark(phone_number: str | None, synced_at: datetime) -> str:
+    return f"{synced_at.isoformat()}~{_phone_digest(phone_number)}"
+
+
+def sync_cutoff(watermark: str | None, phone_number: str | None) -> datetime | None:
+    """
+    Start of the change window for `watermark`, or None when the client must
+    reload everything (no, malformed, expired or foreign watermark).
+    """
+    if not watermark:
+        return None
+    timestamp, _, digest = watermark.partition("~")
+    if digest != _phone_digest(phone_number):
+        return None
+    try:
+        synced_at = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    if synced_at.tzinfo is not None or synced_at < datetime.utcnow() - timedelta(days=CALL_TOMBSTONE_RETENTION_DAYS):
+        return None
+    return synced_at - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+
+
+# ── queries ───────────────────────────────────────────────────────────────────
+
+def changed_calls(phone_number: str, since: datetime | None):
+    """SELECT of the calls of `phone_number` updated after `since` (all of them if None)."""
+    stmt = select(Call).where(Call.from_phone == phone_number)
+    if since is not None:
+        stmt = stmt.where(Call.updated_at > since)
+    return stmt
+
+
+def deleted_call_ids(phone_number: str, since: datetime) -> list[str]:
+    return list(db.session.scalars(
+        select(CallTombstone.call_id)
+        .where(CallTombstone.from_phone == phone_number, CallTombstone.deleted_at > since)
+        .distinct()
+    ))
+
+
+def tombstone_calls(phone_number: str, *criteria):
+    """
+    Record tombstones for the calls of `phone_number` matching `criteria`.
+    Call it before deleting them, in the same transaction; the caller commits.
+    """
+    now = datetime.utcnow()
+    db.session.execute(
+        insert(CallTombstone).from_select(
+            ['call_id', 'from_phone', 'deleted_at'],
+            select(Call.id, Call.from_phone, literal(now, DateTime))
+            .where(Call.from_phone == phone_number, *criteria),
+        )
+    )
+    db.session.execute(
+        delete(CallTombstone)
+        .where(
+            CallTombstone.from_phone == phone_number,
+            CallTombstone.deleted_at < now - timedelta(days=CALL_TOMBSTONE_RETENTION_DAYS),
+        )
+        .execution_options(synchronize_session=False)
+    )
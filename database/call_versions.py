@@ -0,0 +1,49 @@
+"""
+Per-user version of the call list, used as its ETag (see main.py).
+
+`users.calls_version` is bumped in the same transaction as every write that
+changes what `get_calls_for_user` returns for that user's phone number: a call
+created, its recording or transcript updated, a call deleted, or the user's
+phone number changed. A poll that still holds the current version is answered
+with 304 after a single primary-key lookup.
+
+Writes that change only a call's transcript use `mark_call_changed()`, which
+also sets `calls.updated_at` so delta sync (database/call_sync.py) sees them.
+
+The caller commits.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from database.database import db
+from models.call import Call
+from models.user import User
+
+
+def _bump(phone_number):
+    db.session.execute(
+        update(User)
+        .where(User.phone_number == phone_number)
+        # Keep updated_at (the profile's ETag) unchanged; its onupdate would fire otherwise.
+        .values(calls_version=User.calls_version + 1, updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def bump_calls_version(phone_number: str | None):
+    """Invalidate the call lists of every user registered with `phone_number`."""
+    if phone_number:
+        _bump(phone_number)
+
+
+def mark_call_changed(call_id: str):
+    """Touch `call_id`'s updated_at and invalidate its owners' call lists, without loading the call."""
+    db.session.execute(
+        update(Call)
+        .where(Call.id == call_id)
+        .values(updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    _bump(select(Call.from_phone).where(Call.id == call_id).scalar_subquery())
@@ -0,0 +1,87 @@
+"""
+SQL projections of ``call_transcripts.segments`` (JSONB on Postgres, JSON text
+on SQLite).
+
+Read endpoints do not load the column itself. They select one of these
+expressions into CallTranscript's query-expression attributes instead, so
+the database counts or slices the segments and the app receives JSON text it
+passes to the client unparsed:
+
+    SEGMENTS_FULL   segments_json = the array as text (optionally only the
+                    segments overlapping a time window)
+    SEGMENTS_COUNT  segment_count = number of segments
+    SEGMENTS_NONE   nothing
+"""
+
+from sqlalchemy import Text, and_, case, cast, func, select, type_coerce
+from sqlalchemy.orm import defer, joinedload, with_expression
+
+from database.database import db
+from models.call_transcript import CallTranscript
+
+SEGMENTS_FULL = 'full'
+SEGMENTS_COUNT = 'count'
+SEGMENTS_NONE = 'none'
+SEGMENT_MODES = (SEGMENTS_FULL, SEGMENTS_COUNT, SEGMENTS_NONE)
+
+
+def _dialect() -> str:
+    return db.session.get_bind().dialect.name
+
+
+def segments_text():
+    """The whole segment array as JSON text."""
+    column = CallTranscript.segments
+    if _dialect() == 'postgresql':
+        return cast(column, Text)
+    return type_coerce(column, Text)
+
+
+def segment_count():
+    column = CallTranscript.segments
+    if _dialect() == 'postgresql':
+        return func.jsonb_array_length(column)
+    return func.json_array_length(column)
+
+
+def segments_in_window(start: float | None, end: float | None):
+    """Segments overlapping [start, end] seconds as JSON text; either bound may be None."""
+    column = CallTranscript.segments
+    if _dialect() == 'postgresql':
+        conditions, bounds = [], {}
+        if start is not None:
+            conditions.append('@.end > $start')
+            bounds['start'] = start
+        if end is not None:
+            conditions.append('@.start < $end')
+            bounds['end'] = end
+        if not conditions:
+            return segments_text()
+        path = '$[*] ? (' + ' && '.join(conditions) + ')'
+        arguments = [part for name, value in bounds.items() for part in (name, value)]
+        return cast(func.jsonb_path_query_array(column, path, func.jsonb_build_object(*arguments)), Text)
+
+    elements = func.json_each(column).table_valued('value')
+    conditions = []
+    if start is not None:
+        conditions.append(func.json_extract(elements.c.value, '$.end') > start)
+    if end is not None:
+        conditions.append(func.json_extract(elements.c.value, '$.start') < end)
+    window = (
+        select(func.json_group_array(func.json(elements.c.value)))
+        .where(and_(*conditions))
+        .scalar_subquery()
+    )
+    return type_coerce(case((column.is_(None), None), else_=window), Text)
+
+
+def transcript_loader(relationship, mode: str = SEGMENTS_FULL,
+                      start: float | None = None, end: float | None = None):
+    """joinedload() option for `relationship` (e.g. Call.transcript) projecting segments per `mode`."""
+    options = [defer(CallTranscript.segments)]
+    if mode == SEGMENTS_FULL:
+        expression = segments_text() if start is None and end is None else segments_in_window(start, end)
+        options.append(with_expression(CallTranscript.segments_json, expression))
+    elif mode == SEGMENTS_COUNT:
+        options.append(with_expression(CallTranscript.segment_count, segment_count()))
+    return joinedload(relationship).options(*options)
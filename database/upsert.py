@@ -0,0 +1,30 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database.database import db
+
+# Dialect-specific INSERT constructs that support ON CONFLICT ... RETURNING.
+# SQLite is only used for local runs and benchmarks; production is Postgres.
+_DIALECT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def insert_if_absent(model, values: dict, conflict_columns: list[str], returning: list[str] = ()):
+    """Insert a row unless one with the same `conflict_columns` already exists.
+
+    Runs a single ``INSERT ... ON CONFLICT DO NOTHING RETURNING`` in the current
+    session and returns the inserted row (its `conflict_columns` plus the
+    `returning` columns, e.g. values computed by a subquery), or None when it
+    was a duplicate. Concurrent callers racing on the same key never raise;
+    exactly one of them gets a row. The caller commits.
+    """
+    table = model.__table__
+    insert = _DIALECT_INSERTS[db.session.get_bind().dialect.name]
+    stmt = (
+        insert(table)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=conflict_columns)
+        .returning(*(table.c[name] for name in [*conflict_columns, *returning]))
+    )
+    return db.session.execute(stmt).first()
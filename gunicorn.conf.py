@@ -0,0 +1,24 @@
+"""
+gunicorn settings picked up automatically from the working directory.
+
+Prometheus multiprocess mode: every worker writes its metrics to
+PROMETHEUS_MULTIPROC_DIR. The directory is emptied when the master starts, and
+a worker's live gauges are dropped when it exits.
+"""
+
+import os
+import shutil
+
+
+def on_starting(server):
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
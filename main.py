@@ -1,34 +1,86 @@
 from flask import Flask, jsonify, request, Response
-from flask_restful import Api
 from flask_cors import CORS
 from flask_migrate import Migrate
-from twilio.twiml.voice_response import VoiceResponse
-from twilio.rest import Client as TwilioClient
-import json
+import logging
 import os
-import threading
 from datetime import datetime
+from functools import lru_cache, partial
 import requests
 from requests.auth import HTTPBasicAuth
-from sqlalchemy.orm import joinedload
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, load_only, noload
+from database.call_events import EVENT_CALL_CREATED, EVENT_CALL_DELETED, EVENT_CALLS_CLEARED, record_call_event
+from database.call_sync import changed_calls, deleted_call_ids, new_watermark, sync_cutoff, tombstone_calls
+from database.call_versions import bump_calls_version
 from database.database import db
+from database.segments import transcript_loader
+from database.upsert import insert_if_absent
 from models.call import Call
 from models.call_transcript import CallTranscript
 from models.user import User
+from services import metrics, request_profiler, response_cache
 from services.push_notification_service import push_notification_service
-from services.transcript_service import TranscriptService
-from services.file_service import upload_recording, get_recording_url
+from services.call_control import call_control_dispatcher
+from services.call_event_pruner import CallEventPruner
+from services.transcript_service import get_transcript_service
+from services.file_service import get_recording_url
 from services.notification_scheduler import NotificationScheduler
+from services.notification_outbox import OutboxDispatcher
+from services.recording_pipeline import (
+    TelnyxRecordings,
+    TwilioRecordings,
+    add_stage_observer,
+    complete_recording,
+    RESULT_CALL_NOT_FOUND,
+    RESULT_DUPLICATE,
+)
+from services.transcription_worker import TranscriptionWorker
 from services.notification_copy_data import pick_random_coherent
+from services.user_cache import cached_user_id_for_phone, invalidate_user, remember_user_id_for_phone
+from services.webhook_journal import WebhookJournal
+from services.structured_logging import configure_logging
+from schemas import BodyError, parse_args, parse_body, parse_user_id, parse_webhook
+from schemas.calls import CallBatch, CallQuery, CallsForUser, CallSync, DeleteAllRecordings, DeleteRecording, TranscribeRecording
+from schemas.responses import (
+    JSON_MIMETYPE,
+    STREAM_CHUNK_ITEMS,
+    CallBatchOut,
+    CallSyncOut,
+    call_out,
+    call_summary_out,
+    etag_for,
+    json_response,
+    not_modified,
+    stream_json_array,
+    transcript_out,
+    with_etag,
+)
+from schemas.users import RegisterUser, TestNotification, UpdateNotificationSettings, UpdateUserPhone
+from schemas.webhooks import TelnyxWebhook, TwilioRecordingStatus, TwilioVoiceWebhook
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 HOST = os.environ.get('HOST', 'https://call-recorder-api-production-bc8d.up.railway.app')
 CONNECTION_STRING = os.environ.get('DATABASE_URL')
 
-TELNYX_API_KEY = os.environ.get('TELNYX_API_KEY')
-
 TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID')
 TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN')
-twilio_client = TwilioClient(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN) if (TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN) else None
+TWILIO_API_BASE = os.environ.get('TWILIO_API_BASE', 'https://api.twilio.com').rstrip('/')
+
+# Set to 0 on web processes when `python -m services.worker` runs the
+# scheduler, outbox dispatcher and transcription jobs instead.
+RUN_BACKGROUND_JOBS = os.environ.get('RUN_BACKGROUND_JOBS', '1').lower() not in ('0', 'false', 'no')
+
+
+@lru_cache(maxsize=1)
+def get_twilio_client():
+    """Twilio REST client, built on first use so the SDK stays out of the import path."""
+    if not (TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN):
+        return None
+    from twilio.rest import Client as TwilioClient
+    return TwilioClient(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+
 
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = CONNECTION_STRING
@@ -36,157 +88,200 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
     'pool_pre_ping': True,
     'pool_recycle': 300,
 }
+if CONNECTION_STRING and not CONNECTION_STRING.startswith('sqlite'):
+    # Same pool as the default, plus a histogram of checkout wait time.
+    app.config['SQLALCHEMY_ENGINE_OPTIONS']['poolclass'] = metrics.TimedQueuePool
 
 CORS(app, origins=[HOST])
 
 db.init_app(app)
 migrate = Migrate(app, db)
-api = Api(app)
-
-notification_scheduler = NotificationScheduler(app)
-
-def process_transcript_background(call_uuid, download_url=None):
-    """Background: transcribe recording with Whisper and save to CallTranscript.
-
-    download_url: direct URL to fetch audio from (e.g. pre-signed S3).
-                  Falls back to call.recording_url if not provided.
-    """
-    with app.app_context():
-        try:
-            print(f"Starting Whisper transcription for call UUID: {call_uuid}")
-            call = db.session.query(Call).filter_by(id=call_uuid).first()
-            if not call:
-                print(f"Call not found for UUID: {call_uuid}")
-                return
-            audio_url = download_url or call.recording_url
-            if not audio_url:
-                print(f"No recording URL for UUID: {call_uuid}")
-                return
-            transcript = db.session.query(CallTranscript).filter_by(call_id=call_uuid).first()
-            if not transcript:
-                transcript = CallTranscript(call_id=call_uuid, status='processing')
-                db.session.add(transcript)
-            else:
-                transcript.status = 'processing'
-            db.session.commit()
+webhook_journal = WebhookJournal()
+webhook_journal.init_app(app)
+metrics.init_app(app)
+request_profiler.init_app(app)
+add_stage_observer(metrics.observe_pipeline_stage)
 
-            transcript_service = TranscriptService(api_key=os.environ.get("OPENAI_API_KEY"))
-            result = transcript_service.get_transcript(audio_url)
+notification_scheduler = NotificationScheduler(app, autostart=RUN_BACKGROUND_JOBS)
+outbox_dispatcher = OutboxDispatcher(app, autostart=RUN_BACKGROUND_JOBS)
+transcription_worker = TranscriptionWorker(app, autostart=RUN_BACKGROUND_JOBS)
+call_event_pruner = CallEventPruner(app, autostart=RUN_BACKGROUND_JOBS)
 
-            transcript.text = result.get("text") or ""
-            transcript.segments = json.dumps(result["segments"]) if result.get("segments") else None
-            transcript.status = "completed"
-            transcript.language = result.get("language")
-            transcript.duration_seconds = result.get("duration")
-            transcript.updated_at = datetime.utcnow()
+telnyx_recordings = TelnyxRecordings(HOST)
+twilio_recordings = TwilioRecordings(HOST)
 
-            db.session.commit()
-            print(f"Whisper transcription completed for call UUID: {call_uuid}")
-        except Exception as e:
-            print(f"Error transcribing call {call_uuid}: {str(e)}")
-            try:
-                transcript = db.session.query(CallTranscript).filter_by(call_id=call_uuid).first()
-                if transcript:
-                    transcript.status = "failed"
-                    transcript.updated_at = datetime.utcnow()
-                db.session.commit()
-            except Exception as inner_e:
-                print(f"Failed to update call with error fallback: {str(inner_e)}")
-
-def get_formated_body():
-    print(f"Content-Type: {request.content_type}")
-    if request.is_json:
-        body = request.get_json()
-        print(f"JSON body: {body}")
-    elif request.form:
-        body = request.form.to_dict()
-        print(f"Form body: {body}")
-    else:
-        raw_data = request.get_data(as_text=True)
-        print(f"Raw data: {raw_data}")
-        if raw_data:
-            from urllib.parse import parse_qs
-            body = parse_qs(raw_data)
-            body = {k: v[0] if len(v) == 1 else v for k, v in body.items()}
-        else:
-            # Fallback: try parsing form even if content-type wasn't matched
-            body = request.values.to_dict()
-        print(f"Parsed body: {body}")
-    return body
+@app.errorhandler(BodyError)
+def invalid_body(error):
+    return jsonify({'error': str(error)}), 400
 
 @app.route('/get_calls_for_user', methods=['POST'])
 def get_calls_for_user():
-    body = get_formated_body()
-    user_phone = body.get('user_phone')
-    user_id = body.get('user_id')
+    body = parse_body(CallsForUser)
+    user_phone = body.user_phone
 
-    if not user_phone and not user_id:
-        return jsonify({'error': 'Either user_phone or user_id parameter is required'}), 400
-
-    if user_id:
-        user = db.session.query(User).filter_by(id=user_id).first()
+    if body.user_id:
+        user = db.session.query(User).filter_by(id=body.user_id).first()
         if not user:
             return jsonify({'error': 'User not found'}), 404
         user_phone = user.phone_number
-    
-    calls = (
+        calls_version = user.calls_version
+    else:
+        # Every user registered with the number is bumped together; unregistered numbers get no ETag.
+        calls_version = (
+            db.session.query(User.calls_version)
+            .filter_by(phone_number=user_phone)
+            .order_by(User.created_at.asc())
+            .limit(1)
+            .scalar()
+        )
+
+    etag = etag_for(calls_version, body) if calls_version is not None else None
+    if etag is not None:
+        unchanged = not_modified(etag)
+        if unchanged is not None:
+            return unchanged
+        # The ETag names this exact list, so it doubles as the cache key.
+        cached = response_cache.lookup(etag)
+        if cached is not None:
+            return with_etag(Response(cached, mimetype=JSON_MIMETYPE), etag)
+
+    options, convert = _call_listing(body)
+    # Rows are fetched in batches while the response streams.
+    calls = db.session.scalars(
+        select(Call)
+        .options(*options)
+        .where(Call.from_phone == user_phone)
+        .execution_options(yield_per=STREAM_CHUNK_ITEMS)
+    )
+    if etag is None:
+        return stream_json_array(calls, convert)
+    return with_etag(stream_json_array(calls, convert, tee=response_cache.storing(etag)), etag)
+
+def _call_listing(query):
+    """Loader options and encoder for a call list in `query.view` with its segment projection."""
+    if query.view == 'summary':
+        # Only the list-screen columns; transcript text and segments are never selected.
+        options = (
+            load_only(Call.title, Call.call_date, Call.recording_duration, Call.recording_status, Call.updated_at),
+            joinedload(Call.transcript).load_only(CallTranscript.status),
+        )
+        return options, call_summary_out
+    options = (transcript_loader(Call.transcript, query.segments, query.segments_from, query.segments_to),)
+    return options, partial(call_out, segments=query.segments)
+
+@app.route('/api/calls/sync', methods=['GET'])
+def sync_calls():
+    """Calls created, updated or deleted since the client's last sync."""
+    query = parse_args(CallSync)
+
+    user = db.session.query(User).filter_by(id=query.user_id).first()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    # Taken before reading, so changes committed during this request are in the next window.
+    synced_at = datetime.utcnow()
+    since = sync_cutoff(query.since, user.phone_number)
+
+    options, convert = _call_listing(query)
+    calls = db.session.scalars(changed_calls(user.phone_number, since).options(*options))
+    deleted = deleted_call_ids(user.phone_number, since) if since is not None else []
+
+    with request_profiler.serialization():
+        return json_response(CallSyncOut(
+            calls=[convert(call) for call in calls],
+            deleted=deleted,
+            watermark=new_watermark(user.phone_number, synced_at),
+            reset=since is None,
+        ))
+
+@app.route('/api/calls/<call_id>', methods=['GET'])
+def get_call(call_id):
+    """Return one call with its transcript — fetched by the app when a push notification is opened."""
+    query = parse_args(CallQuery)
+
+    user = db.session.query(User).filter_by(id=query.user_id).first()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    call = (
         db.session.query(Call)
-        .options(joinedload(Call.transcript))
-        .filter_by(from_phone=user_phone)
-        .all()
+        .options(transcript_loader(Call.transcript, query.segments, query.segments_from, query.segments_to))
+        .filter_by(id=call_id)
+        .first()
     )
-    calls_list = []
-    for call in calls:
-        transcript = getattr(call, 'transcript', None)
-        if transcript:
-            segments_parsed = None
-            if transcript.segments:
-                try:
-                    segments_parsed = json.loads(transcript.segments)
-                except (TypeError, ValueError):
-                    pass
-            transcript_json = {
-                'id': transcript.id,
-                'call_id': transcript.call_id,
-                'text': transcript.text,
-                'segments': segments_parsed,
-                'status': transcript.status,
-                'language': transcript.language,
-                'duration_seconds': transcript.duration_seconds,
-                'created_at': transcript.created_at.isoformat() if transcript.created_at else None,
-                'updated_at': transcript.updated_at.isoformat() if transcript.updated_at else None,
-            }
-        else:
-            transcript_json = None
-        calls_list.append({
-            'id': call.id,
-            'from_phone': call.from_phone,
-            'call_date': call.call_date.isoformat() if call.call_date else None,
-            'title': call.title,
-            'summary': call.summary,
-            'recording_url': call.recording_url,
-            'recording_duration': call.recording_duration,
-            'recording_status': call.recording_status,
-            'transcript': transcript_json,
-        })
-
-    return jsonify(calls_list), 200
+    if not call:
+        return jsonify({'error': 'Recording not found'}), 404
+
+    if call.from_phone != user.phone_number:
+        return jsonify({'error': 'Unauthorized: You do not own this recording'}), 403
+
+    with request_profiler.serialization():
+        return json_response(call_out(call, query.segments))
+
+@app.route('/api/calls/<call_id>/transcript', methods=['GET'])
+def get_call_transcript(call_id):
+    """Return one call's transcript — fetched when the user opens a recording from the list."""
+    query = parse_args(CallQuery)
+
+    user = db.session.query(User).filter_by(id=query.user_id).first()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    call = (
+        db.session.query(Call)
+        .options(
+            load_only(Call.from_phone),
+            transcript_loader(Call.transcript, query.segments, query.segments_from, query.segments_to),
+        )
+        .filter_by(id=call_id)
+        .first()
+    )
+    if not call:
+        return jsonify({'error': 'Recording not found'}), 404
+
+    if call.from_phone != user.phone_number:
+        return jsonify({'error': 'Unauthorized: You do not own this recording'}), 403
+
+    if call.transcript is None:
+        return jsonify({'error': 'Transcript not found'}), 404
+
+    with request_profiler.serialization():
+        return json_response(transcript_out(call.transcript, query.segments))
+
+@app.route('/api/calls/batch', methods=['POST'])
+def get_calls_batch():
+    """Return up to CALL_BATCH_MAX_IDS of the user's calls by id, in one query."""
+    body = parse_body(CallBatch)
+
+    user = db.session.query(User).filter_by(id=body.user_id).first()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    if body.include_transcript:
+        transcript_option = transcript_loader(Call.transcript, body.segments, body.segments_from, body.segments_to)
+    else:
+        transcript_option = noload(Call.transcript)
+    calls = db.session.scalars(
+        select(Call)
+        .options(transcript_option)
+        # Other users' calls are filtered out here, so they are reported as missing, not forbidden.
+        .where(Call.id.in_(body.call_ids), Call.from_phone == user.phone_number)
+    )
+    calls_by_id = {call.id: call for call in calls}
+    found = [calls_by_id[call_id] for call_id in body.call_ids if call_id in calls_by_id]
+
+    with request_profiler.serialization():
+        return json_response(CallBatchOut(
+            calls=[call_out(call, body.segments) for call in found],
+            missing=[call_id for call_id in body.call_ids if call_id not in calls_by_id],
+        ))
 
 @app.route('/delete_recording', methods=['POST'])
 def delete_recording():
+    body = parse_body(DeleteRecording)
+    recording_id = body.recording_id
     try:
-        body = get_formated_body()
-        
-        recording_id = body.get('recording_id')
-        user_id = body.get('user_id')
-        
-        if not recording_id:
-            return jsonify({'error': 'recording_id is required'}), 400
-        
-        if not user_id:
-            return jsonify({'error': 'user_id is required'}), 400
-
-        user = db.session.query(User).filter_by(id=user_id).first()
+        user = db.session.query(User).filter_by(id=body.user_id).first()
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
@@ -197,7 +292,10 @@ def delete_recording():
         if call.from_phone != user.phone_number:
             return jsonify({'error': 'Unauthorized: You do not own this recording'}), 403
         
+        tombstone_calls(call.from_phone, Call.id == call.id)
         db.session.delete(call)
+        bump_calls_version(call.from_phone)
+        record_call_event(EVENT_CALL_DELETED, call.from_phone, call.id)
         db.session.commit()
         
         return jsonify({
@@ -211,32 +309,31 @@ def delete_recording():
 
 @app.route('/api/users/register', methods=['POST'])
 def register_user():
+    body = parse_body(RegisterUser)
+    id = body.id
+    phone_number = body.phone_number
+    country_code = body.country_code
+    fcm_token = body.fcm_token
+    language = body.language
+    timezone_name = body.timezone
     try:
-        body = get_formated_body()
-
-        id = body.get('id')
-        phone_number = body.get('phoneNumber')
-        country_code = body.get('countryCode')
-        fcm_token = body.get('fcmToken')
-        language = body.get('language')
-        
-        if not phone_number:
-            return jsonify({'error': 'phoneNumber is required'}), 400
-        
-        if not country_code:
-            return jsonify({'error': 'country code is required'}), 400
-        
-        existing_user = db.session.query(User).filter_by(id=id).first()
+        existing_user = db.session.query(User).filter_by(id=id).first() if id else None
         
         if existing_user:
+            previous_phone = existing_user.phone_number
             existing_user.fcm_token = fcm_token
             if country_code:
                 existing_user.country_code = country_code
             if language is not None:
                 existing_user.language = language
+            if timezone_name:
+                existing_user.timezone = timezone_name
             existing_user.updated_at = datetime.now()
             existing_user.phone_number = phone_number
+            if phone_number != previous_phone:
+                existing_user.calls_version = User.calls_version + 1
             db.session.commit()
+            invalidate_user(existing_user.id, previous_phone, phone_number)
             
             return jsonify({
                 'userId': str(existing_user.id),
@@ -247,12 +344,14 @@ def register_user():
                 id=id,
                 phone_number=phone_number,
                 fcm_token=fcm_token,
-                language=language
+                language=language,
+                timezone=timezone_name or None
             )
             if country_code:
                 new_user.country_code = country_code
             db.session.add(new_user)
             db.session.commit()
+            invalidate_user(new_user.id, phone_number)
             
             return jsonify({
                 'message': 'User registered successfully'
@@ -264,48 +363,46 @@ def register_user():
 
 @app.route('/api/users/<user_id>', methods=['GET'])
 def get_user(user_id):
+    user_id = parse_user_id(user_id)
     try:
         user = db.session.query(User).filter_by(id=user_id).first()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
-        
-        return jsonify({
+
+        # Every profile write sets updated_at.
+        etag = etag_for(user.id, user.updated_at)
+        unchanged = not_modified(etag)
+        if unchanged is not None:
+            return unchanged
+
+        return with_etag(jsonify({
             'name': user.name,
             'phoneNumber': user.phone_number,
             'countryCode': user.country_code if user.country_code else '',
             'notificationsEnabled': user.push_notifications_enabled
-        }), 200
+        }), etag)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/users/update-phone', methods=['PUT'])
 def update_user_phone():
+    body = parse_body(UpdateUserPhone)
+    phone_number = body.phone_number
+    country_code = body.country_code
+    name = body.name
     try:
-        body = get_formated_body()
-
-        user_id = body.get('userId')
-        phone_number = body.get('phoneNumber')
-        country_code = body.get('countryCode')
-        name = body.get('name')
-
-        if not user_id:
-            return jsonify({'error': 'userId is required'}), 400
-
-        if not phone_number:
-            return jsonify({'error': 'phoneNumber is required'}), 400
-
-        if not country_code:
-            return jsonify({'error': 'countryCode is required'}), 400
-
-        user = db.session.query(User).filter_by(id=user_id).first()
+        user = db.session.query(User).filter_by(id=body.user_id).first()
 
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
+        previous_phone = user.phone_number
         user.phone_number = phone_number
         user.country_code = country_code
+        if phone_number != previous_phone:
+            user.calls_version = User.calls_version + 1
 
         # Update name if provided
         if name is not None:
@@ -313,6 +410,7 @@ def update_user_phone():
 
         user.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_user(user.id, previous_phone, phone_number)
 
         return jsonify({
             'message': 'User updated successfully',
@@ -325,19 +423,10 @@ def update_user_phone():
 
 @app.route('/api/users/notifications', methods=['PUT'])
 def update_notification_settings():
+    body = parse_body(UpdateNotificationSettings)
+    push_notifications_enabled = body.push_notifications_enabled
     try:
-        body = get_formated_body()
-        
-        user_id = body.get('userId')
-        push_notifications_enabled = body.get('pushNotificationsEnabled')
-        
-        if not user_id:
-            return jsonify({'error': 'userId is required'}), 400
-        
-        if push_notifications_enabled is None:
-            return jsonify({'error': 'pushNotificationsEnabled is required'}), 400
-        
-        user = db.session.query(User).filter_by(id=user_id).first()
+        user = db.session.query(User).filter_by(id=body.user_id).first()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -345,6 +434,7 @@ def update_notification_settings():
         user.push_notifications_enabled = push_notifications_enabled
         user.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_user(user.id)
         
         return jsonify({
             'userId': str(user.id),
@@ -359,16 +449,10 @@ def update_notification_settings():
 @app.route('/api/notifications/test', methods=['POST'])
 def send_test_notification():
     """Send a test promotional notification to the given FCM token using localized copy."""
-    body = get_formated_body()
+    body = parse_body(TestNotification)
 
-    fcm_token = body.get('fcmToken')
-    language = body.get('language')
-
-    if not fcm_token:
-        return jsonify({'error': 'fcmToken is required'}), 400
-
-    title, notification_body = pick_random_coherent(language=language)
-    ok = push_notification_service.send_notification(fcm_token, title, notification_body)
+    title, notification_body = pick_random_coherent(language=body.language)
+    ok = push_notification_service.send_notification(body.fcm_token, title, notification_body)
 
     if ok:
         return jsonify({'success': True, 'title': title, 'body': notification_body}), 200
@@ -409,19 +493,17 @@ def get_recording(recording_id):
 
 @app.route('/delete_all_recordings', methods=['POST'])
 def delete_all_recordings():
+    body = parse_body(DeleteAllRecordings)
     try:
-        body = get_formated_body()
-        
-        user_id = body.get('user_id')
-        
-        if not user_id:
-            return jsonify({'error': 'user_id is required'}), 400
-        
-        user = db.session.query(User).filter_by(id=user_id).first()
+        user = db.session.query(User).filter_by(id=body.user_id).first()
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
+        tombstone_calls(user.phone_number)
         deleted_count = db.session.query(Call).filter_by(from_phone=user.phone_number).delete()
+        if deleted_count:
+            bump_calls_version(user.phone_number)
+            record_call_event(EVENT_CALLS_CLEARED, user.phone_number)
         db.session.commit()
         
         return jsonify({
@@ -436,15 +518,12 @@ def delete_all_recordings():
 @app.route('/api/transcribe', methods=['POST'])
 def transcribe_recording():
     """Transcribe a recording by URL using OpenAI Whisper. Returns text by phrases (segments)."""
+    body = parse_body(TranscribeRecording)
     try:
-        body = get_formated_body()
-        recording_url = body.get('recording_url')
-        if not recording_url or not str(recording_url).strip():
-            return jsonify({'error': 'recording_url is required'}), 400
         if not os.environ.get('OPENAI_API_KEY'):
             return jsonify({'error': 'OPENAI_API_KEY is not configured'}), 500
-        transcript_service = TranscriptService(api_key=os.environ.get('OPENAI_API_KEY'))
-        result = transcript_service.get_transcript(str(recording_url).strip())
+        transcript_service = get_transcript_service()
+        result = transcript_service.get_transcript(body.recording_url)
         return jsonify({
             'text': result.get('text', ''),
             'segments': result.get('segments', []),
@@ -457,35 +536,21 @@ def transcribe_recording():
         return jsonify({'error': str(e)}), 500
 
 
-def telnyx_call_control(call_control_id, action, payload=None):
-    """Issue a Telnyx Call Control API command."""
-    url = f"https://api.telnyx.com/v2/calls/{call_control_id}/actions/{action}"
-    response = requests.post(
-        url,
-        json=payload or {},
-        headers={
-            "Authorization": f"Bearer {TELNYX_API_KEY}",
-            "Content-Type": "application/json",
-        },
-    )
-    print(f"Telnyx Call Control {action}: {response.status_code} {response.text}")
-    return response
-
-
 @app.route("/answer", methods=["GET", "POST"])
 def answer():
     """Handle incoming Telnyx Call Control webhook and start recording."""
-    body = get_formated_body()
+    body = parse_webhook(TelnyxWebhook)
+    if body is None:
+        return jsonify({}), 200
 
-    if not body:
-        print("Answer webhook: missing body")
+    if body.data is None:
+        logger.warning("Answer webhook: missing data")
         return jsonify({}), 200
 
-    data = body.get('data', {}) if isinstance(body.get('data'), dict) else {}
-    event_type = data.get('event_type', '')
-    payload = data.get('payload', {}) if isinstance(data.get('payload'), dict) else {}
+    event_type = body.data.event_type
+    payload = body.data.payload
 
-    print(f"Answer webhook: event_type={event_type}")
+    logger.info("Answer webhook", extra={"event_type": event_type})
 
     if event_type == 'call.initiated':
         return _handle_call_initiated(payload)
@@ -497,165 +562,93 @@ def answer():
     return jsonify({}), 200
 
 
-def _handle_call_initiated(payload):
-    import threading
-    user_phone = payload.get('from')
-    call_control_id = payload.get('call_control_id')
-
-    print(f"call.initiated: user_phone={user_phone}, call_control_id={call_control_id}")
-
-    if not user_phone or not call_control_id:
-        print("call.initiated: missing from or call_control_id")
-        return jsonify({}), 200
-
-    existing_call = db.session.query(Call).filter_by(id=call_control_id).first()
-    if existing_call:
-        print(f"Duplicate call.initiated, ignoring: {call_control_id}")
-        return jsonify({}), 200
-
-    user = db.session.query(User).filter_by(phone_number=user_phone).first()
-    call = Call(call_control_id, user_phone, datetime.now(), user_id=user.id if user else None)
-    db.session.add(call)
-    db.session.commit()
-    print(f"Created new call record: {call_control_id}")
-
-    def do_call_control():
-        answer_resp = telnyx_call_control(call_control_id, "answer")
-        if answer_resp.status_code not in (200, 201):
-            print(f"Failed to answer call: {answer_resp.status_code}")
-            return
-        telnyx_call_control(call_control_id, "record_start", {
-            "format": "mp3",
-            "channels": "single",
-            "play_beep": True,
-        })
-
-    threading.Thread(target=do_call_control, daemon=True).start()
-    return jsonify({}), 200
+def _create_call(call_id, user_phone) -> bool:
+    """
+    Insert the row of a new inbound call; False if the webhook is a duplicate.
 
+    The owner comes from the phone cache. On a miss a scalar subquery resolves
+    it inside the INSERT, and the returned user_id fills the cache for the
+    caller's next call. The caller commits.
 
-def _handle_recording_saved(payload):
-    call_control_id = payload.get('call_control_id')
-    recording_id = payload.get('recording_id')
-    recording_urls = payload.get('recording_urls', {})
-    recording_url = recording_urls.get('mp3')
-    started_at = payload.get('recording_started_at')
-    ended_at = payload.get('recording_ended_at')
+    Round trips: a new call costs four (the INSERT ... ON CONFLICT DO NOTHING
+    RETURNING, the calls_version UPDATE, the call_events INSERT flushed by the
+    commit, and the COMMIT); a duplicate webhook costs two (the INSERT and the
+    COMMIT). The duplicate check and the owner lookup add none.
+    """
+    user_id = cached_user_id_for_phone(user_phone)
+    inserted = insert_if_absent(Call, {
+        'id': call_id,
+        'from_phone': user_phone,
+        'call_date': datetime.now(),
+        'user_id': user_id if user_id is not None else (
+            select(User.id)
+            .where(User.phone_number == user_phone)
+            .order_by(User.created_at.asc())
+            .limit(1)
+            .scalar_subquery()
+        ),
+    }, ['id'], returning=['user_id'])
+    if inserted is None:
+        return False
+    if user_id is None:
+        remember_user_id_for_phone(user_phone, inserted.user_id)
+    bump_calls_version(user_phone)
+    record_call_event(EVENT_CALL_CREATED, user_phone, call_id)
+    return True
 
-    print(f"call.recording.saved: call_control_id={call_control_id}, recording_id={recording_id}")
 
-    if not call_control_id:
-        print("call.recording.saved: missing call_control_id")
-        return jsonify({}), 200
+def _handle_call_initiated(payload):
+    user_phone = payload.from_
+    call_control_id = payload.call_control_id
 
-    call = db.session.query(Call).filter_by(id=call_control_id).first()
-    if not call:
-        print(f"call.recording.saved: call not found for {call_control_id}")
+    if not user_phone or not call_control_id:
+        logger.warning("call.initiated: missing from or call_control_id",
+                       extra={"call_id": call_control_id, "phone": user_phone})
         return jsonify({}), 200
 
-    if call.recording_status == 'completed' and call.recording_url:
-        print(f"Recording already processed for call: {call_control_id}")
+    inserted = _create_call(call_control_id, user_phone)
+    db.session.commit()
+    if not inserted:
+        logger.info("Duplicate call.initiated, ignoring", extra={"call_id": call_control_id})
         return jsonify({}), 200
+    logger.info("Created new call record", extra={"call_id": call_control_id, "phone": user_phone})
 
-    # Calculate duration from timestamps if available
-    duration = None
-    if started_at and ended_at:
-        try:
-            from datetime import timezone
-            start = datetime.fromisoformat(started_at.replace('Z', '+00:00'))
-            end = datetime.fromisoformat(ended_at.replace('Z', '+00:00'))
-            duration = int((end - start).total_seconds())
-        except Exception as e:
-            print(f"Could not calculate duration: {e}")
-
-    # Upload to S3 for permanent storage, then store our stable proxy URL in the DB
-    if recording_id and recording_url:
-        s3_url = upload_recording(recording_id, recording_url)
-        if s3_url:
-            print(f"Recording {recording_id} uploaded to S3")
-        else:
-            print(f"S3 upload failed or not configured for recording {recording_id}")
-
-    # Always store the proxy URL — it generates a fresh presigned URL on each request
-    final_url = f"{HOST}/recording/{recording_id}" if recording_id else recording_url
-    call.recording_url = final_url
-    call.recording_duration = duration
-    call.recording_status = 'completed'
-
-    # Resolve user for push notification
-    user = db.session.query(User).filter_by(id=call.user_id).first() if call.user_id else None
-    if user is None and call.from_phone:
-        user = db.session.query(User).filter_by(phone_number=call.from_phone).order_by(User.created_at.asc()).first()
-        if user:
-            call.user_id = user.id
-
-    if not db.session.query(CallTranscript).filter_by(call_id=call_control_id).first():
-        db.session.add(CallTranscript(call_id=call_control_id, status='processing'))
-    db.session.commit()
+    call_control_dispatcher.answer_and_record(call_control_id)
+    return jsonify({}), 200
 
-    if user and user.push_notifications_enabled and user.fcm_token:
-        transcript = db.session.query(CallTranscript).filter_by(call_id=call_control_id).first()
-        call_data = {
-            'id': call.id,
-            'callDate': call.call_date.isoformat() if call.call_date else '',
-            'fromPhone': call.from_phone or '',
-            'toPhone': '',
-            'recordingDuration': call.recording_duration or 0,
-            'recordingStatus': call.recording_status or '',
-            'recordingUrl': call.recording_url or '',
-            'summary': call.summary or '',
-            'title': call.title or '',
-            'transcriptionStatus': transcript.status if transcript else 'pending',
-            'transcriptionText': transcript.text if transcript else '',
-        }
-        success = push_notification_service.send_recording_complete_notification(user.fcm_token, call_data)
-        print(f"Push notification {'sent' if success else 'failed'} for call {call_control_id}")
-
-    # Use the raw Telnyx pre-signed URL for Whisper — it can download it directly without auth
-    transcribe_url = recording_url
-    background_thread = threading.Thread(
-        target=process_transcript_background,
-        args=(call_control_id, transcribe_url)
-    )
-    background_thread.daemon = True
-    background_thread.start()
-    print(f"Started Whisper transcription for call: {call_control_id}")
 
+def _handle_recording_saved(payload):
+    logger.info("call.recording.saved", extra={
+        "call_id": payload.call_control_id,
+        "recording_id": payload.recording_id,
+    })
+    complete_recording(telnyx_recordings, payload)
     return jsonify({}), 200
 
 @app.route("/answer/twilio", methods=["GET", "POST"])
 def answer_twilio():
     """Handle incoming Twilio call and start recording. Returns TwiML."""
-    body = get_formated_body()
-    response = VoiceResponse()
-
-    print("Twilio answer reponse")
+    from twilio.twiml.voice_response import VoiceResponse
 
-    if not body:
-        print("Twilio answer webhook: missing body")
-        response.say("Sorry, we could not process this call.")
-        response.hangup()
-        return Response(str(response), mimetype='text/xml')
+    body = parse_webhook(TwilioVoiceWebhook)
+    response = VoiceResponse()
 
-    user_phone = body.get('From')
-    call_sid = body.get('CallSid')
+    user_phone = body.from_ if body else None
+    call_sid = body.call_sid if body else None
 
     if not user_phone or not call_sid:
-        print(f"Twilio answer webhook: missing From or CallSid. body={body}")
+        logger.warning("Twilio answer webhook: missing From or CallSid",
+                       extra={"call_id": call_sid, "phone": user_phone})
         response.say("Sorry, we could not process this call.")
         response.hangup()
         return Response(str(response), mimetype='text/xml')
 
-    existing_call = db.session.query(Call).filter_by(id=call_sid).first()
-    if existing_call:
-        print(f"Duplicate Twilio call webhook, ignoring: {call_sid}")
-        return Response(str(response), mimetype='text/xml')
-
-    user = db.session.query(User).filter_by(phone_number=user_phone).first()
-    call = Call(call_sid, user_phone, datetime.now(), user_id=user.id if user else None)
-    db.session.add(call)
+    inserted = _create_call(call_sid, user_phone)
     db.session.commit()
-    print(f"Twilio: created new call record with CallSid: {call_sid}")
+    if not inserted:
+        logger.info("Duplicate Twilio call webhook, ignoring", extra={"call_id": call_sid})
+        return Response(str(response), mimetype='text/xml')
+    logger.info("Twilio: created new call record", extra={"call_id": call_sid, "phone": user_phone})
 
     response.record(
         play_beep=False,
@@ -672,161 +665,28 @@ def answer_twilio():
 @app.route('/record-complete', methods=['POST'])
 def record_complete():
     """Twilio recording status callback — fires when a recording is ready."""
-    print(f"=== RECORD-COMPLETE ENDPOINT ===")
-    print(f"Request args: {request.args.to_dict()}")
-
     call_uuid = request.args.get('call-uuid')
     if not call_uuid:
         return jsonify({'error': 'call-uuid parameter is required'}), 400
 
-    body = get_formated_body()
+    body = parse_webhook(TwilioRecordingStatus)
+    if body is None:
+        return jsonify("Invalid recording status callback, ignoring."), 200
 
-    recording_status = body.get('RecordingStatus')
+    recording_status = body.recording_status
     if recording_status != 'completed':
-        print(f"Ignoring recording status: {recording_status}")
+        logger.info("Ignoring recording status", extra={"call_id": call_uuid, "recording_status": recording_status})
         return jsonify("Recording status not completed, ignoring."), 200
 
-    recording_url = body.get('RecordingUrl')
-    recording_sid = body.get('RecordingSid')
-    recording_length = body.get('RecordingDuration')
-
-    call = db.session.query(Call).filter_by(id=call_uuid).first()
-    if not call:
+    result = complete_recording(twilio_recordings, body, call_uuid)
+    if result == RESULT_CALL_NOT_FOUND:
         return jsonify({'error': 'Call not found'}), 404
-
-    if call.recording_status == 'completed' and call.recording_url:
-        print(f"Recording already processed for call UUID: {call_uuid}")
+    if result == RESULT_DUPLICATE:
         return jsonify("Recording already processed."), 200
 
-    # Resolve user
-    user = db.session.query(User).filter_by(id=call.user_id).first() if call.user_id else None
-    if user is None and call.from_phone:
-        user = (
-            db.session.query(User)
-            .filter_by(phone_number=call.from_phone)
-            .order_by(User.created_at.asc())
-            .first()
-        )
-        if user:
-            call.user_id = user.id
-
-    # Build a proxy URL that fetches the Twilio MP3 with auth credentials
-    if recording_sid:
-        proxy_url = f"{HOST}/recording/twilio/{recording_sid}"
-    elif recording_url and 'Recordings/' in recording_url:
-        sid = recording_url.split('Recordings/')[-1].split('.')[0]
-        proxy_url = f"{HOST}/recording/twilio/{sid}"
-    else:
-        proxy_url = recording_url
-
-    call.recording_url = proxy_url
-    call.recording_duration = int(recording_length) if recording_length else None
-    call.recording_status = 'completed'
-
-    if not db.session.query(CallTranscript).filter_by(call_id=call_uuid).first():
-        db.session.add(CallTranscript(call_id=call_uuid, status='processing'))
-    db.session.commit()
-
-    # Push notification
-    if user and user.push_notifications_enabled and user.fcm_token:
-        transcript = db.session.query(CallTranscript).filter_by(call_id=call_uuid).first()
-        call_data = {
-            'id': call.id,
-            'callDate': call.call_date.isoformat() if call.call_date else '',
-            'fromPhone': call.from_phone or '',
-            'toPhone': '',
-            'recordingDuration': call.recording_duration or 0,
-            'recordingStatus': call.recording_status or '',
-            'recordingUrl': call.recording_url or '',
-            'summary': call.summary or '',
-            'title': call.title or '',
-            'transcriptionStatus': transcript.status if transcript else 'pending',
-            'transcriptionText': transcript.text if transcript else '',
-        }
-        success = push_notification_service.send_recording_complete_notification(user.fcm_token, call_data)
-        print(f"Push notification {'sent' if success else 'failed'} for Twilio call {call_uuid}")
-
-    # For Whisper we need the raw Twilio URL (with auth). Build it from the SID.
-    twilio_download_url = None
-    if recording_sid and TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN:
-        twilio_download_url = (
-            f"https://api.twilio.com/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}"
-            f"/Recordings/{recording_sid}.mp3"
-        )
-
-    background_thread = threading.Thread(
-        target=_process_twilio_transcript_background,
-        args=(call_uuid, twilio_download_url),
-    )
-    background_thread.daemon = True
-    background_thread.start()
-    print(f"Started Whisper transcription for Twilio call UUID: {call_uuid}")
-
     return jsonify("Recording successfully completed."), 200
 
 
-def _process_twilio_transcript_background(call_uuid, twilio_url):
-    """Download the Twilio recording with Basic auth, then transcribe with Whisper."""
-    with app.app_context():
-        try:
-            print(f"Twilio Whisper transcription starting for call UUID: {call_uuid}")
-            call = db.session.query(Call).filter_by(id=call_uuid).first()
-            if not call:
-                print(f"Call not found for UUID: {call_uuid}")
-                return
-
-            transcript = db.session.query(CallTranscript).filter_by(call_id=call_uuid).first()
-            if not transcript:
-                transcript = CallTranscript(call_id=call_uuid, status='processing')
-                db.session.add(transcript)
-            else:
-                transcript.status = 'processing'
-            db.session.commit()
-
-            # Fetch audio bytes from Twilio (requires Basic auth)
-            audio_bytes = None
-            if twilio_url and TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN:
-                r = requests.get(
-                    twilio_url,
-                    auth=HTTPBasicAuth(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN),
-                    timeout=120,
-                )
-                if r.status_code == 200:
-                    audio_bytes = r.content
-                    print(f"Downloaded Twilio recording: {len(audio_bytes)} bytes")
-                else:
-                    print(f"Failed to download Twilio recording: {r.status_code}")
-
-            transcript_service = TranscriptService(api_key=os.environ.get("OPENAI_API_KEY"))
-
-            if audio_bytes:
-                result = transcript_service.get_transcript_from_bytes(
-                    audio_bytes, filename="recording.mp3"
-                )
-            else:
-                # Fallback: try the proxy URL (may not work without auth)
-                result = transcript_service.get_transcript(call.recording_url)
-
-            transcript.text = result.get("text") or ""
-            transcript.segments = json.dumps(result["segments"]) if result.get("segments") else None
-            transcript.status = "completed"
-            transcript.language = result.get("language")
-            transcript.duration_seconds = result.get("duration")
-            transcript.updated_at = datetime.utcnow()
-            db.session.commit()
-            print(f"Twilio Whisper transcription completed for call UUID: {call_uuid}")
-        except Exception as e:
-            print(f"Error transcribing Twilio call {call_uuid}: {str(e)}")
-            try:
-                transcript = db.session.query(CallTranscript).filter_by(call_id=call_uuid).first()
-                if transcript:
-                    transcript.status = "failed"
-                    transcript.updated_at = datetime.utcnow()
-                db.session.commit()
-            except Exception as inner_e:
-                print(f"Failed to update transcript status: {str(inner_e)}")
-
-
 @app.route('/recording/twilio/<recording_sid>', methods=['GET'])
 def get_twilio_recording(recording_sid):
     """Proxy endpoint — fetches a Twilio recording MP3 with Basic auth and streams it."""
@@ -834,20 +694,24 @@ def get_twilio_recording(recording_sid):
         return jsonify({'error': 'Twilio credentials not configured'}), 500
 
     recording_url = (
-        f"https://api.twilio.com/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}"
+        f"{TWILIO_API_BASE}/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}"
         f"/Recordings/{recording_sid}.mp3"
     )
 
     try:
-        r = requests.get(
-            recording_url,
-            auth=HTTPBasicAuth(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN),
-            stream=True,
-            timeout=60,
-        )
+        with metrics.observe_dependency('twilio') as dependency_call:
+            r = requests.get(
+                recording_url,
+                auth=HTTPBasicAuth(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN),
+                stream=True,
+                timeout=60,
+            )
+            content = r.content
+            if r.status_code >= 500:
+                dependency_call.fail()
         if r.status_code == 200:
             return Response(
-                r.content,
+                content,
                 mimetype='audio/mpeg',
                 headers={
                     'Content-Disposition': f'inline; filename="recording_{recording_sid}.mp3"',
@@ -865,12 +729,12 @@ if __name__ == "__main__":
         try:
             # Apply any pending migrations automatically
             upgrade()
-            print("Database migrations applied successfully")
+            logger.info("Database migrations applied successfully")
         except Exception as e:
-            print(f"Migration error: {e}")
+            logger.error("Migration error: %s", e)
             # Fallback to create_all if migrations haven't been initialized
             db.create_all()
-            print("Database tables created using create_all()")
+            logger.info("Database tables created using create_all()")
 
     port = int(os.environ.get('PORT', 8080))
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""create notification_runs table
+
+Revision ID: h9i0j1k2l3m4
+Revises: g8h9i0j1k2l3
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'h9i0j1k2l3m4'
+down_revision = 'g8h9i0j1k2l3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'notification_runs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('campaign', sa.String(length=50), nullable=False),
+        sa.Column('window_key', sa.String(length=40), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='running'),
+        sa.Column('owner', sa.String(length=200), nullable=True),
+        sa.Column('checked', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('eligible', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sent', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('started_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('campaign', 'window_key', name='uq_notification_runs_campaign_window'),
+    )
+
+
+def downgrade():
+    op.drop_table('notification_runs')
@@ -0,0 +1,26 @@
+"""add cursor_user_id to notification_runs
+
+Revision ID: i0j1k2l3m4n5
+Revises: h9i0j1k2l3m4
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = 'i0j1k2l3m4n5'
+down_revision = 'h9i0j1k2l3m4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notification_runs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cursor_user_id', postgresql.UUID(as_uuid=True), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('notification_runs', schema=None) as batch_op:
+        batch_op.drop_column('cursor_user_id')
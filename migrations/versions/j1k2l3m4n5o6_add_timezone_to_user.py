@@ -0,0 +1,26 @@
+"""add_timezone_to_user
+
+Revision ID: j1k2l3m4n5o6
+Revises: i0j1k2l3m4n5
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'j1k2l3m4n5o6'
+down_revision = 'i0j1k2l3m4n5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('timezone', sa.String(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('timezone')
@@ -0,0 +1,44 @@
+"""create notification_outbox table
+
+Revision ID: k2l3m4n5o6p7
+Revises: j1k2l3m4n5o6
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = 'k2l3m4n5o6p7'
+down_revision = 'j1k2l3m4n5o6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'notification_outbox',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('kind', sa.String(length=40), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('call_id', sa.String(length=100), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_notification_outbox_status_next_attempt',
+        'notification_outbox',
+        ['status', 'next_attempt_at'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_notification_outbox_status_next_attempt', table_name='notification_outbox')
+    op.drop_table('notification_outbox')
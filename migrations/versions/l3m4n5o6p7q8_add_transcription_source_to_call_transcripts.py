@@ -0,0 +1,27 @@
+"""add transcription source columns to call_transcripts
+
+Revision ID: l3m4n5o6p7q8
+Revises: k2l3m4n5o6p7
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'l3m4n5o6p7q8'
+down_revision = 'k2l3m4n5o6p7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('call_transcripts', sa.Column('source_url', sa.Text(), nullable=True))
+    op.add_column('call_transcripts', sa.Column('source_provider', sa.String(length=20), nullable=True))
+    op.create_index('ix_call_transcripts_status', 'call_transcripts', ['status'])
+
+
+def downgrade():
+    op.drop_index('ix_call_transcripts_status', table_name='call_transcripts')
+    op.drop_column('call_transcripts', 'source_provider')
+    op.drop_column('call_transcripts', 'source_url')
@@ -0,0 +1,22 @@
+"""add index on users.phone_number
+
+Revision ID: m4n5o6p7q8r9
+Revises: l3m4n5o6p7q8
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+revision = 'm4n5o6p7q8r9'
+down_revision = 'l3m4n5o6p7q8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_users_phone_number', 'users', ['phone_number'])
+
+
+def downgrade():
+    op.drop_index('ix_users_phone_number', table_name='users')
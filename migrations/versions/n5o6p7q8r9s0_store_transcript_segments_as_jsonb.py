@@ -0,0 +1,88 @@
+"""store call_transcripts.segments as jsonb
+
+Revision ID: n5o6p7q8r9s0
+Revises: m4n5o6p7q8r9
+Create Date: 2026-10-19
+
+The text column is copied into a new jsonb column without blocking writes:
+
+  1. add segments_jsonb and a trigger that fills it on every INSERT or
+     UPDATE of segments, so rows written during the copy stay in sync
+  2. copy the existing rows in batches of BATCH_SIZE, each committed on its
+     own (autocommit block), so no lock is held across the whole copy
+  3. drop the trigger and the text column and rename segments_jsonb; only
+     this last step takes an ACCESS EXCLUSIVE lock, and it does not rewrite
+     the table
+
+Rows whose text is not valid JSON become NULL. Because of step 2, this
+revision commits the revisions applied before it in the same run.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = 'n5o6p7q8r9s0'
+down_revision = 'm4n5o6p7q8r9'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade():
+    bind = op.get_bind()
+    op.add_column('call_transcripts', sa.Column('segments_jsonb', postgresql.JSONB(), nullable=True))
+
+    op.execute("""
+        CREATE FUNCTION call_transcripts_try_jsonb(value text) RETURNS jsonb AS $$
+        BEGIN
+            RETURN value::jsonb;
+        EXCEPTION WHEN others THEN
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE
+    """)
+    op.execute("""
+        CREATE FUNCTION call_transcripts_sync_segments_jsonb() RETURNS trigger AS $$
+        BEGIN
+            NEW.segments_jsonb := call_transcripts_try_jsonb(NULLIF(NEW.segments, ''));
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER call_transcripts_segments_jsonb
+        BEFORE INSERT OR UPDATE OF segments ON call_transcripts
+        FOR EACH ROW EXECUTE FUNCTION call_transcripts_sync_segments_jsonb()
+    """)
+
+    with op.get_context().autocommit_block():
+        last_id = 0
+        while True:
+            upto = bind.execute(sa.text(
+                'SELECT max(id) FROM (SELECT id FROM call_transcripts WHERE id > :last_id '
+                'ORDER BY id LIMIT :batch_size) AS batch'
+            ), {'last_id': last_id, 'batch_size': BATCH_SIZE}).scalar()
+            if upto is None:
+                break
+            bind.execute(sa.text(
+                "UPDATE call_transcripts SET segments_jsonb = call_transcripts_try_jsonb(NULLIF(segments, '')) "
+                'WHERE id > :last_id AND id <= :upto AND segments IS NOT NULL'
+            ), {'last_id': last_id, 'upto': upto})
+            last_id = upto
+
+    op.execute('DROP TRIGGER call_transcripts_segments_jsonb ON call_transcripts')
+    op.execute('DROP FUNCTION call_transcripts_sync_segments_jsonb()')
+    op.execute('DROP FUNCTION call_transcripts_try_jsonb(text)')
+    op.drop_column('call_transcripts', 'segments')
+    op.alter_column('call_transcripts', 'segments_jsonb', new_column_name='segments')
+
+
+def downgrade():
+    op.alter_column(
+        'call_transcripts', 'segments',
+        type_=sa.Text(),
+        postgresql_using='segments::text',
+    )
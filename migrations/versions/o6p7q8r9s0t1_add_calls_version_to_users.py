@@ -0,0 +1,23 @@
+"""add calls_version to users
+
+Revision ID: o6p7q8r9s0t1
+Revises: n5o6p7q8r9s0
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'o6p7q8r9s0t1'
+down_revision = 'n5o6p7q8r9s0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('calls_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('users', 'calls_version')
@@ -0,0 +1,45 @@
+"""add calls.updated_at and call_tombstones
+
+Revision ID: p7q8r9s0t1u2
+Revises: o6p7q8r9s0t1
+Create Date: 2026-10-19
+
+Existing calls get the migration time as updated_at, so a client's first
+delta sync after the upgrade returns its whole history once.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'p7q8r9s0t1u2'
+down_revision = 'o6p7q8r9s0t1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('calls', sa.Column('updated_at', sa.DateTime(), nullable=False,
+                                     server_default=sa.text("timezone('utc', now())")))
+    op.create_index('ix_calls_from_phone_updated_at', 'calls', ['from_phone', 'updated_at'])
+
+    op.create_table(
+        'call_tombstones',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('call_id', sa.String(length=100), nullable=False),
+        sa.Column('from_phone', sa.String(length=100), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_call_tombstones_from_phone_deleted_at',
+        'call_tombstones',
+        ['from_phone', 'deleted_at'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_call_tombstones_from_phone_deleted_at', table_name='call_tombstones')
+    op.drop_table('call_tombstones')
+    op.drop_index('ix_calls_from_phone_updated_at', table_name='calls')
+    op.drop_column('calls', 'updated_at')
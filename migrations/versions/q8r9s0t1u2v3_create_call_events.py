@@ -0,0 +1,58 @@
+"""create call_events table
+
+Revision ID: q8r9s0t1u2v3
+Revises: p7q8r9s0t1u2
+Create Date: 2026-10-19
+
+Every inserted row is announced with NOTIFY call_events (payload: the row as
+JSON), delivered when the inserting transaction commits.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'q8r9s0t1u2v3'
+down_revision = 'p7q8r9s0t1u2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'call_events',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('kind', sa.String(length=40), nullable=False),
+        sa.Column('from_phone', sa.String(length=100), nullable=True),
+        sa.Column('call_id', sa.String(length=100), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_call_events_from_phone_id', 'call_events', ['from_phone', 'id'])
+
+    op.execute("""
+        CREATE FUNCTION notify_call_event() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('call_events', json_build_object(
+                'id', NEW.id,
+                'kind', NEW.kind,
+                'from_phone', NEW.from_phone,
+                'call_id', NEW.call_id,
+                'status', NEW.status
+            )::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER call_events_notify AFTER INSERT ON call_events
+        FOR EACH ROW EXECUTE FUNCTION notify_call_event()
+    """)
+
+
+def downgrade():
+    op.execute('DROP TRIGGER call_events_notify ON call_events')
+    op.execute('DROP FUNCTION notify_call_event()')
+    op.drop_index('ix_call_events_from_phone_id', table_name='call_events')
+    op.drop_table('call_events')
@@ -0,0 +1,19 @@
+# Importing the package registers every table on db.metadata
+# (e.g. for db.metadata.create_all() outside of migrations).
+from models.call import Call
+from models.call_event import CallEvent
+from models.call_tombstone import CallTombstone
+from models.call_transcript import CallTranscript
+from models.notification_outbox import NotificationOutbox
+from models.notification_run import NotificationRun
+from models.user import User
+
+__all__ = [
+    "Call",
+    "CallEvent",
+    "CallTombstone",
+    "CallTranscript",
+    "NotificationOutbox",
+    "NotificationRun",
+    "User",
+]
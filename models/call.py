@@ -1,9 +1,13 @@
 from sqlalchemy.dialects.postgresql import UUID
 from database.database import db
+from datetime import datetime
 
 
 class Call(db.Model):
     __tablename__ = 'calls'
+    __table_args__ = (
+        db.Index('ix_calls_from_phone_updated_at', 'from_phone', 'updated_at'),
+    )
     id = db.Column(db.String(100), primary_key=True)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=True)
     from_phone = db.Column(db.String(100))
@@ -15,6 +19,9 @@ class Call(db.Model):
     recording_duration = db.Column(db.Integer, nullable=True)
     recording_status = db.Column(db.String(20), nullable=True)
 
+    # Also set when only the transcript changes; see database/call_versions.py.
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
     user = db.relationship('User', backref='calls')
 
     def __init__(self, id, from_phone, call_date, title=None, summary=None,
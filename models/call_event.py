@@ -0,0 +1,23 @@
+from database.database import db
+from datetime import datetime
+
+
+class CallEvent(db.Model):
+    """A change to a call, pushed to its owner's event stream (services/event_stream.py)."""
+    __tablename__ = 'call_events'
+    __table_args__ = (
+        db.Index('ix_call_events_from_phone_id', 'from_phone', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    kind = db.Column(db.String(40), nullable=False)
+    from_phone = db.Column(db.String(100), nullable=True)
+    call_id = db.Column(db.String(100), nullable=True)
+    status = db.Column(db.String(20), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __init__(self, kind, from_phone, call_id=None, status=None):
+        self.kind = kind
+        self.from_phone = from_phone
+        self.call_id = call_id
+        self.status = status
@@ -0,0 +1,21 @@
+from database.database import db
+from datetime import datetime
+
+
+class CallTombstone(db.Model):
+    """A deleted call, kept so delta sync can tell clients to drop it."""
+    __tablename__ = 'call_tombstones'
+    __table_args__ = (
+        db.Index('ix_call_tombstones_from_phone_deleted_at', 'from_phone', 'deleted_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    call_id = db.Column(db.String(100), nullable=False)
+    from_phone = db.Column(db.String(100), nullable=True)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __init__(self, call_id, from_phone, deleted_at=None):
+        self.call_id = call_id
+        self.from_phone = from_phone
+        if deleted_at is not None:
+            self.deleted_at = deleted_at
@@ -1,3 +1,5 @@
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import query_expression
 from database.database import db
 from datetime import datetime
 
@@ -10,8 +12,14 @@ class CallTranscript(db.Model):
     call_id = db.Column(db.String(100), db.ForeignKey('calls.id', ondelete='CASCADE'), nullable=False, unique=True)
 
     text = db.Column(db.Text, nullable=True)
-    segments = db.Column(db.Text, nullable=True)
-    status = db.Column(db.String(20), nullable=False, default='pending')
+    # JSON array of {start, end, text}; JSONB on Postgres.
+    segments = db.Column(db.JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), 'postgresql'), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)
+
+    # Where the transcription worker downloads the audio from, and which
+    # provider's auth scheme that download needs.
+    source_url = db.Column(db.Text, nullable=True)
+    source_provider = db.Column(db.String(20), nullable=True)
 
     language = db.Column(db.String(20), nullable=True)
     duration_seconds = db.Column(db.Float, nullable=True)
@@ -19,11 +27,17 @@ class CallTranscript(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Filled only by queries that project them; see database/segments.py.
+    segments_json = query_expression()
+    segment_count = query_expression()
+
     call = db.relationship('Call', backref=db.backref('transcript', uselist=False, cascade='all, delete-orphan'))
 
     def __init__(self, call_id, text=None, segments=None, status='pending', language=None, duration_seconds=None,
-                 created_at=None, updated_at=None):
+                 created_at=None, updated_at=None, source_url=None, source_provider=None):
         self.call_id = call_id
+        self.source_url = source_url
+        self.source_provider = source_provider
         self.text = text
         self.segments = segments
         self.status = status
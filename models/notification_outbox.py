@@ -0,0 +1,32 @@
+from sqlalchemy.dialects.postgresql import UUID
+from database.database import db
+from datetime import datetime
+
+
+class NotificationOutbox(db.Model):
+    """A push notification intent, written in the same transaction as the change it announces."""
+    __tablename__ = 'notification_outbox'
+    __table_args__ = (
+        db.Index('ix_notification_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    kind = db.Column(db.String(40), nullable=False)
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    call_id = db.Column(db.String(100), nullable=True)
+
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    def __init__(self, kind, user_id, call_id=None, status='pending'):
+        self.kind = kind
+        self.user_id = user_id
+        self.call_id = call_id
+        self.status = status
+        self.attempts = 0
+        self.next_attempt_at = datetime.utcnow()
@@ -0,0 +1,44 @@
+from sqlalchemy.dialects.postgresql import UUID
+from database.database import db
+from datetime import datetime
+
+
+class NotificationRun(db.Model):
+    """One execution of a scheduled notification campaign for a single window.
+
+    The unique (campaign, window_key) pair doubles as the leader-election lock:
+    whichever process inserts the row first owns the window, every other
+    process sees the conflict and stands down. `cursor_user_id` and the
+    counters are checkpointed while the run progresses so an interrupted run
+    can be resumed within the same window.
+    """
+    __tablename__ = 'notification_runs'
+    __table_args__ = (
+        db.UniqueConstraint('campaign', 'window_key', name='uq_notification_runs_campaign_window'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    campaign = db.Column(db.String(50), nullable=False)
+    window_key = db.Column(db.String(40), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='running')
+    owner = db.Column(db.String(200), nullable=True)
+
+    checked = db.Column(db.Integer, nullable=False, default=0)
+    eligible = db.Column(db.Integer, nullable=False, default=0)
+    sent = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    cursor_user_id = db.Column(UUID(as_uuid=True), nullable=True)
+
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    heartbeat_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __init__(self, campaign, window_key, owner=None, status='running'):
+        self.campaign = campaign
+        self.window_key = window_key
+        self.owner = owner
+        self.status = status
+        self.checked = 0
+        self.eligible = 0
+        self.sent = 0
+        self.failed = 0
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean
+from sqlalchemy import Column, String, DateTime, Boolean, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from database.database import db
 import uuid
@@ -10,13 +10,16 @@ class User(db.Model):
     
     id = Column(UUID(as_uuid=True), unique=True, primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=True)
-    phone_number = Column(String, nullable=False)
+    phone_number = Column(String, nullable=False, index=True)
     country_code = Column(String, nullable=False)
     fcm_token = Column(String, nullable=True)
     language = Column(String, nullable=True)
+    timezone = Column(String, nullable=True)
     push_notifications_enabled = Column(Boolean, nullable=False, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped by every write to this user's calls; the ETag of their call list.
+    calls_version = Column(Integer, nullable=False, default=0, server_default='0')
     
     def to_dict(self):
         return {
@@ -27,6 +30,7 @@ class User(db.Model):
             'fcmToken': self.fcm_token,
             'pushNotificationsEnabled': self.push_notifications_enabled,
             'language': self.language,
+            'timezone': self.timezone,
             'createdAt': self.created_at.isoformat() if self.created_at else None,
             'updatedAt': self.updated_at.isoformat() if self.updated_at else None
         }
\ No newline at end of file
@@ -0,0 +1,4 @@
+# Request schemas
+from schemas.base import BodyError, parse_args, parse_body, parse_user_id, parse_webhook
+
+__all__ = ["BodyError", "parse_args", "parse_body", "parse_user_id", "parse_webhook"]
@@ -0,0 +1,109 @@
+"""
+Request body decoding and validation.
+
+Each endpoint declares its body as a msgspec Struct decorated with
+`@request_schema`, which compiles the JSON decoder once at import. Handlers
+call `parse_body(Schema)`; the body is decoded once, dispatched on
+Content-Type:
+
+    application/json, */*+json          decoded straight into the Struct
+    form-urlencoded, multipart          werkzeug's form parser, then converted
+    anything else                       JSON if it looks like an object, else
+                                        url-encoded (carriers sometimes omit the header)
+    empty body                          the query string
+
+Scalars are converted laxly (`"true"` -> True, `"30"` -> 30) because
+form-encoded webhooks only carry strings. Any decode or validation failure
+raises `BodyError`; main.py answers it with `400 {"error": "..."}`.
+
+Carrier webhooks use `parse_webhook(Schema)` instead, which logs the failure
+and returns None: the handler still acknowledges with a 2xx, because Telnyx
+and Twilio retry any other status and a malformed event would never pass.
+"""
+
+import logging
+import uuid
+from typing import Annotated
+from urllib.parse import parse_qsl
+
+import msgspec
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+NonEmptyStr = Annotated[str, msgspec.Meta(min_length=1)]
+UserId = uuid.UUID
+
+_FORM_MIMETYPES = ("application/x-www-form-urlencoded", "multipart/form-data")
+
+_json_decoders: dict[type, msgspec.json.Decoder] = {}
+
+
+class BodyError(ValueError):
+    """The request body could not be decoded or failed its schema."""
+
+
+def request_schema(cls):
+    """Class decorator registering a Struct as a request schema and compiling its decoder."""
+    _json_decoders[cls] = msgspec.json.Decoder(cls, strict=False)
+    return cls
+
+
+def _convert(values: dict, schema):
+    return msgspec.convert(values, schema, strict=False)
+
+
+def _decode(schema):
+    decoder = _json_decoders[schema]
+    mimetype = request.mimetype
+    if mimetype == "application/json" or mimetype.endswith("+json"):
+        return decoder.decode(request.get_data(cache=True))
+    if mimetype in _FORM_MIMETYPES:
+        return _convert(request.form.to_dict(), schema)
+
+    raw = request.get_data(cache=True)
+    if not raw.strip():
+        return _convert(request.args.to_dict(), schema)
+    if raw.lstrip()[:1] == b"{":
+        return decoder.decode(raw)
+    return _convert(dict(parse_qsl(raw.decode("utf-8", "replace"), keep_blank_values=True)), schema)
+
+
+def parse_body(schema):
+    """Decode and validate the current request body as `schema`, or raise BodyError."""
+    try:
+        body = _decode(schema)
+    except (msgspec.DecodeError, msgspec.ValidationError) as exc:
+        raise BodyError(str(exc)) from None
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Request body", extra={
+            "path": request.path, "content_type": request.content_type, "body": msgspec.to_builtins(body),
+        })
+    return body
+
+
+def parse_webhook(schema):
+    """Like `parse_body`, but log a decode or validation failure and return None."""
+    try:
+        return parse_body(schema)
+    except BodyError as exc:
+        logger.warning("Invalid webhook body", extra={
+            "path": request.path, "content_type": request.content_type, "error": str(exc),
+        })
+        return None
+
+
+def parse_user_id(value: str) -> UserId:
+    """Validate a user id taken from the URL path, or raise BodyError."""
+    try:
+        return msgspec.convert(value, UserId)
+    except msgspec.ValidationError:
+        raise BodyError("Invalid user id") from None
+
+
+def parse_args(schema):
+    """Validate the query string as `schema`, or raise BodyError."""
+    try:
+        return _convert(request.args.to_dict(), schema)
+    except msgspec.ValidationError as exc:
+        raise BodyError(str(exc)) from None
@@ -0,0 +1,89 @@
+"""Call and recording API bodies (snake_case on the wire)."""
+
+from typing import Annotated, Literal
+
+import msgspec
+
+from schemas.base import NonEmptyStr, UserId, request_schema
+
+CALL_BATCH_MAX_IDS = 100
+
+
+class SegmentProjection(msgspec.Struct, kw_only=True):
+    """
+    How transcript segments are returned (see database/segments.py):
+    `segments="count"` returns only `segment_count`, `"none"` omits them, and
+    `segments_from` / `segments_to` (seconds) keep only overlapping segments.
+    """
+
+    segments: Literal["full", "count", "none"] = "full"
+    segments_from: float | None = None
+    segments_to: float | None = None
+
+    def __post_init__(self):
+        if self.segments != "full" and (self.segments_from is not None or self.segments_to is not None):
+            raise ValueError("segments_from and segments_to require segments=full")
+        if (self.segments_from is not None and self.segments_to is not None
+                and self.segments_from > self.segments_to):
+            raise ValueError("segments_from must not be after segments_to")
+
+
+@request_schema
+class CallsForUser(SegmentProjection):
+    user_phone: str | None = None
+    user_id: UserId | None = None
+    # "summary": title, date, duration and statuses only; segment options are ignored.
+    view: Literal["full", "summary"] = "full"
+
+    def __post_init__(self):
+        super().__post_init__()
+        if not self.user_phone and not self.user_id:
+            raise ValueError("Either user_phone or user_id parameter is required")
+
+
+class CallQuery(SegmentProjection):
+    """Query string of GET /api/calls/<call_id> and GET /api/calls/<call_id>/transcript."""
+
+    user_id: UserId
+
+
+class CallSync(SegmentProjection):
+    """Query string of GET /api/calls/sync; `since` is the watermark the previous sync returned."""
+
+    user_id: UserId
+    since: str | None = None
+    view: Literal["full", "summary"] = "full"
+
+
+@request_schema
+class CallBatch(SegmentProjection):
+    """Body of POST /api/calls/batch."""
+
+    user_id: UserId
+    call_ids: Annotated[list[NonEmptyStr], msgspec.Meta(min_length=1, max_length=CALL_BATCH_MAX_IDS)]
+    include_transcript: bool = True
+
+    def __post_init__(self):
+        super().__post_init__()
+        self.call_ids = list(dict.fromkeys(self.call_ids))
+
+
+@request_schema
+class DeleteRecording(msgspec.Struct):
+    recording_id: NonEmptyStr
+    user_id: UserId
+
+
+@request_schema
+class DeleteAllRecordings(msgspec.Struct):
+    user_id: UserId
+
+
+@request_schema
+class TranscribeRecording(msgspec.Struct):
+    recording_url: str
+
+    def __post_init__(self):
+        self.recording_url = self.recording_url.strip()
+        if not self.recording_url:
+            raise ValueError("recording_url is required")
@@ -0,0 +1,197 @@
+"""
+Response bodies for call listings, encoded with msgspec.
+
+Calls and transcripts are converted to Structs and encoded by one shared
+encoder. Transcript segments arrive from the database as JSON text (projected
+by database/segments.py) and are embedded as `msgspec.Raw`, so they reach the
+client without being decoded and re-encoded. Fields left UNSET (segments when
+only the count was requested) are omitted.
+
+`stream_json_array()` sends a list as a chunked JSON array: `[` goes out
+immediately, then one chunk per STREAM_CHUNK_ITEMS elements, so neither the
+rows nor the document have to be held in memory at once.
+
+Polled endpoints send a weak ETag built by `etag_for()` from a cheap version
+(e.g. users.calls_version) and the request's options; `not_modified()` answers
+a matching If-None-Match before anything is queried or encoded.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+
+import msgspec
+from flask import Response, request, stream_with_context
+
+from database.segments import SEGMENTS_COUNT, SEGMENTS_FULL
+from services.request_profiler import serialization
+
+STREAM_CHUNK_ITEMS = int(os.environ.get("STREAM_CHUNK_ITEMS", "50"))
+
+JSON_MIMETYPE = "application/json"
+
+_encoder = msgspec.json.Encoder()
+
+
+class TranscriptOut(msgspec.Struct):
+    id: int
+    call_id: str
+    text: str | None
+    segments: msgspec.Raw | None | msgspec.UnsetType
+    segment_count: int | None | msgspec.UnsetType
+    status: str
+    language: str | None
+    duration_seconds: float | None
+    created_at: datetime | None
+    updated_at: datetime | None
+
+
+class CallOut(msgspec.Struct):
+    id: str
+    from_phone: str | None
+    call_date: datetime | None
+    title: str | None
+    summary: str | None
+    recording_url: str | None
+    recording_duration: int | None
+    recording_status: str | None
+    # Changes with every write to the call or its transcript; the version sent in pushes.
+    updated_at: datetime | None
+    transcript: TranscriptOut | None
+
+
+class CallSummaryOut(msgspec.Struct):
+    """A row of the app's call list (`view=summary`)."""
+
+    id: str
+    title: str | None
+    call_date: datetime | None
+    recording_duration: int | None
+    recording_status: str | None
+    transcript_status: str | None
+    updated_at: datetime | None
+
+
+class CallSyncOut(msgspec.Struct):
+    """Changes since the client's watermark; apply `deleted`, then upsert `calls` by id."""
+
+    calls: list  # CallOut or CallSummaryOut, per the request's view
+    deleted: list[str]
+    watermark: str
+    # True: `calls` is the complete list and replaces the client's copy.
+    reset: bool
+
+
+class CallBatchOut(msgspec.Struct):
+    """`calls` in request order; `missing` are ids that do not exist or belong to someone else."""
+
+    calls: list[CallOut]
+    missing: list[str]
+
+
+def transcript_out(transcript, segments: str = SEGMENTS_FULL) -> TranscriptOut | None:
+    """`transcript` must have been loaded with database.segments.transcript_loader(..., segments)."""
+    if transcript is None:
+        return None
+    segments_value = segment_count = msgspec.UNSET
+    if segments == SEGMENTS_FULL:
+        segments_value = msgspec.Raw(transcript.segments_json.encode()) if transcript.segments_json else None
+    elif segments == SEGMENTS_COUNT:
+        segment_count = transcript.segment_count
+    return TranscriptOut(
+        id=transcript.id,
+        call_id=transcript.call_id,
+        text=transcript.text,
+        segments=segments_value,
+        segment_count=segment_count,
+        status=transcript.status,
+        language=transcript.language,
+        duration_seconds=transcript.duration_seconds,
+        created_at=transcript.created_at,
+        updated_at=transcript.updated_at,
+    )
+
+
+def call_out(call, segments: str = SEGMENTS_FULL) -> CallOut:
+    return CallOut(
+        id=call.id,
+        from_phone=call.from_phone,
+        call_date=call.call_date,
+        title=call.title,
+        summary=call.summary,
+        recording_url=call.recording_url,
+        recording_duration=call.recording_duration,
+        recording_status=call.recording_status,
+        updated_at=call.updated_at,
+        transcript=transcript_out(getattr(call, "transcript", None), segments),
+    )
+
+
+def call_summary_out(call) -> CallSummaryOut:
+    """`call` must have been loaded with its transcript's status (see get_calls_for_user)."""
+    transcript = call.transcript
+    return CallSummaryOut(
+        id=call.id,
+        title=call.title,
+        call_date=call.call_date,
+        recording_duration=call.recording_duration,
+        recording_status=call.recording_status,
+        transcript_status=transcript.status if transcript is not None else None,
+        updated_at=call.updated_at,
+    )
+
+
+def json_response(body, status: int = 200) -> Response:
+    return Response(_encoder.encode(body), status=status, mimetype=JSON_MIMETYPE)
+
+
+def etag_for(*parts) -> str:
+    """Weak ETag value for a response determined by `parts` (msgspec-encodable)."""
+    return hashlib.blake2b(_encoder.encode(parts), digest_size=12).hexdigest()
+
+
+def not_modified(etag: str) -> Response | None:
+    """A 304 response if the request's If-None-Match already holds `etag`, else None."""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return with_etag(Response(status=304), etag)
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    response.set_etag(etag, weak=True)
+    # Clients may keep the body but must revalidate; shared caches must not store it.
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _array_chunks(items, convert, chunk_size: int):
+    yield b"["
+    separator = b""
+    batch = []
+    for item in items:
+        with serialization():
+            batch.append(convert(item))
+        if len(batch) >= chunk_size:
+            # Encode the batch as an array and drop its brackets.
+            with serialization():
+                chunk = separator + _encoder.encode(batch)[1:-1]
+            yield chunk
+            separator = b","
+            batch.clear()
+    if batch:
+        with serialization():
+            chunk = separator + _encoder.encode(batch)[1:-1]
+        yield chunk
+    yield b"]"
+
+
+def stream_json_array(items, convert, chunk_size: int = STREAM_CHUNK_ITEMS, tee=None) -> Response:
+    """
+    Stream `convert(item)` for each item of `items` (e.g. a yield_per result)
+    as a JSON array. The request context stays open until the last chunk.
+    `tee`, if given, wraps the chunk iterator (e.g. response_cache.storing()).
+    """
+    chunks = _array_chunks(items, convert, chunk_size)
+    if tee is not None:
+        chunks = tee(chunks)
+    return Response(stream_with_context(chunks), mimetype=JSON_MIMETYPE)
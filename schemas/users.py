@@ -0,0 +1,40 @@
+"""User API bodies (camelCase on the wire)."""
+
+import msgspec
+
+from schemas.base import NonEmptyStr, UserId, request_schema
+from services.timezones import is_valid_timezone
+
+
+@request_schema
+class RegisterUser(msgspec.Struct, rename="camel"):
+    phone_number: NonEmptyStr
+    country_code: NonEmptyStr
+    id: UserId | None = None
+    fcm_token: str | None = None
+    language: str | None = None
+    timezone: str | None = None
+
+    def __post_init__(self):
+        if self.timezone and not is_valid_timezone(self.timezone):
+            raise ValueError("timezone must be an IANA timezone name")
+
+
+@request_schema
+class UpdateUserPhone(msgspec.Struct, rename="camel"):
+    user_id: UserId
+    phone_number: NonEmptyStr
+    country_code: NonEmptyStr
+    name: str | None = None
+
+
+@request_schema
+class UpdateNotificationSettings(msgspec.Struct, rename="camel"):
+    user_id: UserId
+    push_notifications_enabled: bool
+
+
+@request_schema
+class TestNotification(msgspec.Struct, rename="camel"):
+    fcm_token: NonEmptyStr
+    language: str | None = None
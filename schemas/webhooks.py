@@ -0,0 +1,53 @@
+"""
+Carrier webhook bodies. Only the fields we read are declared; everything else
+in the payload is skipped while decoding.
+"""
+
+import msgspec
+
+from schemas.base import request_schema
+
+
+# ── Telnyx (JSON) ─────────────────────────────────────────────────────────────
+
+class TelnyxCallPayload(msgspec.Struct):
+    """`data.payload` of call.initiated and call.recording.saved events."""
+
+    call_control_id: str | None = None
+    from_: str | None = msgspec.field(default=None, name="from")
+    to: str | None = None
+    recording_id: str | None = None
+    recording_urls: dict[str, str | None] | None = None
+    recording_started_at: str | None = None
+    recording_ended_at: str | None = None
+
+
+class TelnyxEvent(msgspec.Struct):
+    event_type: str = ""
+    payload: TelnyxCallPayload = msgspec.field(default_factory=TelnyxCallPayload)
+
+
+@request_schema
+class TelnyxWebhook(msgspec.Struct):
+    data: TelnyxEvent | None = None
+
+
+# ── Twilio (form-encoded) ─────────────────────────────────────────────────────
+
+@request_schema
+class TwilioVoiceWebhook(msgspec.Struct, rename="pascal"):
+    """Incoming call webhook (`/answer/twilio`)."""
+
+    call_sid: str | None = None
+    from_: str | None = msgspec.field(default=None, name="From")
+    to: str | None = None
+
+
+@request_schema
+class TwilioRecordingStatus(msgspec.Struct, rename="pascal"):
+    """Recording status callback (`/record-complete`)."""
+
+    recording_status: str | None = None
+    recording_sid: str | None = None
+    recording_url: str | None = None
+    recording_duration: int | None = None
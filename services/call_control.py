@@ -0,0 +1,144 @@
+"""
+Telnyx Call Control commands issued from a dedicated asyncio event loop.
+
+Answering an inbound call takes two sequential API calls (`answer`, then
+`record_start`). Instead of one OS thread per call, all commands run as
+coroutines on a single background event loop that shares one pooled
+HTTP/1.1 keep-alive client, so hundreds of simultaneous call setups reuse a
+handful of TLS connections.
+
+The client is an aiohttp ClientSession on a TCPConnector capped at
+MAX_CONNECTIONS (100) open connections, with idle ones kept alive for
+KEEPALIVE_EXPIRY_SECONDS (60s). Each request is bounded: 2s waiting for a
+pooled connection plus 3s to open a socket, 5s between reads, 10s in total,
+so a slow Telnyx API cannot pile up work. aiohttp is imported when the loop
+starts, keeping it out of the web worker's import path.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Future
+
+from services.metrics import observe_dependency
+
+logger = logging.getLogger(__name__)
+
+
+# ── configuration ────────────────────────────────────────────────────────────
+
+TELNYX_API_BASE = os.environ.get("TELNYX_API_BASE", "https://api.telnyx.com/v2")
+TELNYX_API_KEY = os.environ.get("TELNYX_API_KEY")
+
+CONNECT_TIMEOUT_SECONDS = 3.0
+READ_TIMEOUT_SECONDS = 5.0
+POOL_TIMEOUT_SECONDS = 2.0
+TOTAL_TIMEOUT_SECONDS = 10.0
+MAX_CONNECTIONS = 100
+KEEPALIVE_EXPIRY_SECONDS = 60.0
+
+RECORD_START_PAYLOAD = {
+    "format": "mp3",
+    "channels": "single",
+    "play_beep": True,
+}
+
+
+# ── dispatcher ────────────────────────────────────────────────────────────────
+
+class CallControlDispatcher:
+    """
+    Owns a background thread running an asyncio loop and an aiohttp
+    ClientSession bound to it. Flask handlers submit work with `answer_and_record()` and
+    return immediately.
+    """
+
+    def __init__(self, api_base: str = TELNYX_API_BASE, api_key: str | None = TELNYX_API_KEY):
+        self._api_base = api_base.rstrip("/")
+        self._api_key = api_key
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None:
+            return self._loop
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=loop.run_forever,
+                    name="telnyx-call-control",
+                    daemon=True,
+                )
+                self._thread.start()
+                self._loop = loop
+        return self._loop
+
+    def _get_session(self):
+        # Only ever called on the loop thread, so no locking is needed.
+        if self._session is None:
+            import aiohttp
+
+            self._session = aiohttp.ClientSession(
+                headers={
+                    "Authorization": f"Bearer {self._api_key}",
+                    "Content-Type": "application/json",
+                },
+                # `connect` covers waiting for a pooled connection plus the
+                # TCP/TLS handshake; `sock_connect` bounds the handshake alone.
+                timeout=aiohttp.ClientTimeout(
+                    total=TOTAL_TIMEOUT_SECONDS,
+                    connect=POOL_TIMEOUT_SECONDS + CONNECT_TIMEOUT_SECONDS,
+                    sock_connect=CONNECT_TIMEOUT_SECONDS,
+                    sock_read=READ_TIMEOUT_SECONDS,
+                ),
+                connector=aiohttp.TCPConnector(
+                    limit=MAX_CONNECTIONS,
+                    keepalive_timeout=KEEPALIVE_EXPIRY_SECONDS,
+                ),
+            )
+        return self._session
+
+    async def command(self, call_control_id: str, action: str, payload: dict | None = None) -> int | None:
+        """Issue one Call Control command. Returns the HTTP status, or None on a transport error."""
+        try:
+            with observe_dependency("telnyx") as call:
+                async with self._get_session().post(
+                    f"{self._api_base}/calls/{call_control_id}/actions/{action}",
+                    json=payload or {},
+                ) as response:
+                    text = await response.text()
+                if response.status >= 400:
+                    call.fail()
+        except Exception as exc:
+            logger.error("Telnyx Call Control %s failed for %s: %r", action, call_control_id, exc)
+            return None
+        logger.info("Telnyx Call Control %s: %s %s", action, response.status, text)
+        return response.status
+
+    async def _answer_and_record(self, call_control_id: str) -> bool:
+        answer_status = await self.command(call_control_id, "answer")
+        if answer_status not in (200, 201):
+            logger.error("Failed to answer call %s: %s", call_control_id, answer_status or "no response")
+            return False
+        record_status = await self.command(call_control_id, "record_start", RECORD_START_PAYLOAD)
+        return record_status in (200, 201)
+
+    def answer_and_record(self, call_control_id: str) -> Future:
+        """Schedule `answer` followed by `record_start`; returns a concurrent Future[bool]."""
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._answer_and_record(call_control_id), loop)
+
+    def close(self):
+        if self._loop is None:
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result(timeout=5)
+            self._session = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+call_control_dispatcher = CallControlDispatcher()
@@ -0,0 +1,62 @@
+"""
+Hourly pruning of the call_events table behind the live event stream.
+
+Runs with the other background jobs (in the web process, or in
+`python -m services.worker`), so events are pruned whether or not the
+event stream service is deployed. Several replicas pruning at once is
+harmless: the DELETE is idempotent.
+"""
+
+import logging
+import threading
+
+from database.call_events import prune_call_events
+
+logger = logging.getLogger(__name__)
+
+
+# ── configuration ────────────────────────────────────────────────────────────
+
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+class CallEventPruner:
+    """Background thread that deletes call events past their retention."""
+
+    def __init__(self, flask_app, autostart: bool = True):
+        self._app = flask_app
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        if autostart:
+            self.start()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="call-event-pruner",
+            daemon=True,
+        )
+        self._thread.start()
+        logger.info("CallEventPruner started")
+
+    def stop(self):
+        self._stop_event.set()
+
+    def join(self, timeout: float | None = None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                with self._app.app_context():
+                    deleted = prune_call_events()
+                if deleted:
+                    logger.info("Pruned %s call events", deleted)
+            except Exception as exc:
+                logger.error("CallEventPruner iteration failed: %s", exc)
+
+            self._stop_event.wait(PRUNE_INTERVAL_SECONDS)
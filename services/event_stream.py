@@ -0,0 +1,361 @@
+"""
+Server-Sent Events endpoint for live call and transcript updates.
+
+    python -m services.event_stream
+
+    GET /events?user_id=<uuid>
+        id: 42
+        event: transcript.status
+        data: {"call_id": "...", "status": "completed"}
+
+A separate aiohttp process rather than a Flask route: an open stream is one
+coroutine here, where a gunicorn thread would be held for the life of the
+connection. Apps connect on open and stop polling; on reconnect EventSource
+sends `Last-Event-ID` (or pass `last_event_id=`) and the missed events are
+replayed from `call_events`. A client whose Last-Event-ID is older than the
+oldest event still kept (pruned after CALL_EVENT_RETENTION_HOURS by the
+background jobs, see database/call_events.py) receives `event: reset` and
+should fall back to delta sync (GET /api/calls/sync).
+
+Events are written by the web and worker processes in the same transaction as
+the change (database/call_events.py). One Postgres connection per process
+LISTENs for them and fans each one out to the streams of its phone number.
+Without Postgres (local SQLite) the table is polled instead.
+
+Event ids come from a sequence and can commit out of order: id 11 may be
+visible before id 10 is. When an event skips ids, the hub remembers them as
+gaps and keeps looking for them (NOTIFY, catch-up and polling) for
+EVENT_STREAM_GAP_SECONDS. Ids it has already dispatched are dropped, so an
+event is fanned out once even if it is both caught up and NOTIFied.
+
+A stream that falls more than EVENT_STREAM_QUEUE_SIZE events behind is
+closed; its client reconnects and replays from the table.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import deque
+
+import msgspec
+from aiohttp import web
+from sqlalchemy import create_engine, func, or_, select
+
+from models.call_event import CallEvent
+from models.user import User
+from services.structured_logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+# ── configuration ────────────────────────────────────────────────────────────
+
+EVENT_STREAM_PORT = int(os.environ.get("EVENT_STREAM_PORT", os.environ.get("PORT", "8081")))
+EVENT_STREAM_HEARTBEAT_SECONDS = float(os.environ.get("EVENT_STREAM_HEARTBEAT_SECONDS", "15"))
+EVENT_STREAM_QUEUE_SIZE = int(os.environ.get("EVENT_STREAM_QUEUE_SIZE", "100"))
+EVENT_STREAM_POLL_SECONDS = float(os.environ.get("EVENT_STREAM_POLL_SECONDS", "1"))
+EVENT_STREAM_REPLAY_LIMIT = int(os.environ.get("EVENT_STREAM_REPLAY_LIMIT", "500"))
+EVENT_STREAM_GAP_SECONDS = float(os.environ.get("EVENT_STREAM_GAP_SECONDS", "30"))
+
+CHANNEL = "call_events"
+RECONNECT_DELAY_SECONDS = 2
+CLIENT_RETRY_MS = 5000
+MAX_TRACKED_GAPS = 1000
+
+_encoder = msgspec.json.Encoder()
+
+
+def _format_event(event: dict) -> bytes:
+    data = _encoder.encode({"call_id": event["call_id"], "status": event["status"]})
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (event["id"], event["kind"].encode(), data)
+
+
+def _row_event(row) -> dict:
+    return {"id": row.id, "kind": row.kind, "from_phone": row.from_phone,
+            "call_id": row.call_id, "status": row.status}
+
+
+# ── fan-out ───────────────────────────────────────────────────────────────────
+
+class Subscription:
+    """Events for one open stream, buffered until its handler writes them."""
+
+    def __init__(self, phone_number: str):
+        self.phone_number = phone_number
+        self.events: deque = deque()
+        self.ready = asyncio.Event()
+        self.overflowed = False
+
+    def push(self, event: dict):
+        if len(self.events) >= EVENT_STREAM_QUEUE_SIZE:
+            self.overflowed = True
+        else:
+            self.events.append(event)
+        self.ready.set()
+
+
+class EventHub:
+    """
+    Receives every committed call event once per process and hands it to the
+    subscriptions of its phone number. Database work runs in the default
+    executor on a small synchronous engine.
+    """
+
+    def __init__(self, database_url: str):
+        self._engine = create_engine(database_url, pool_pre_ping=True, pool_size=4, max_overflow=4)
+        self._subscriptions: dict[str, set[Subscription]] = {}
+        self._last_id = 0
+        # Skipped ids that may still commit -> monotonic time to stop waiting for them.
+        self._gaps: dict[int, float] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    # ── subscriptions
+
+    def subscribe(self, phone_number: str) -> Subscription:
+        subscription = Subscription(phone_number)
+        self._subscriptions.setdefault(phone_number, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.phone_number)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.phone_number]
+
+    def _dispatch(self, event: dict):
+        event_id = event["id"]
+        if event_id > self._last_id:
+            deadline = time.monotonic() + EVENT_STREAM_GAP_SECONDS
+            for missing in range(max(self._last_id + 1, event_id - MAX_TRACKED_GAPS), event_id):
+                self._gaps[missing] = deadline
+            self._last_id = event_id
+        elif self._gaps.pop(event_id, None) is None:
+            # Already dispatched.
+            return
+        for subscription in self._subscriptions.get(event["from_phone"], ()):
+            subscription.push(event)
+
+    def _expire_gaps(self):
+        """Stop waiting for ids whose transactions rolled back or never committed in time."""
+        now = time.monotonic()
+        # Insertion order is deadline order.
+        for missing, deadline in list(self._gaps.items()):
+            if deadline > now and len(self._gaps) <= MAX_TRACKED_GAPS:
+                break
+            del self._gaps[missing]
+
+    # ── queries (blocking; run in the executor)
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    def _query_phone_number(self, user_id: uuid.UUID) -> str | None:
+        with self._engine.connect() as conn:
+            return conn.execute(select(User.phone_number).where(User.id == user_id)).scalar()
+
+    def _query_events_after(self, last_id: int, phone_number: str | None = None,
+                            gaps: list[int] = ()) -> list[dict]:
+        condition = CallEvent.id > last_id
+        if gaps:
+            condition = or_(condition, CallEvent.id.in_(gaps))
+        stmt = (
+            select(CallEvent.__table__)
+            .where(condition)
+            .order_by(CallEvent.id)
+            .limit(EVENT_STREAM_REPLAY_LIMIT)
+        )
+        if phone_number is not None:
+            stmt = stmt.where(CallEvent.from_phone == phone_number)
+        with self._engine.connect() as conn:
+            return [_row_event(row) for row in conn.execute(stmt)]
+
+    def _query_replay(self, phone_number: str, last_event_id: int) -> tuple[list[dict], bool]:
+        """
+        Events after `last_event_id`, or ([], True) when they cannot all be
+        replayed (some may have been pruned, or there are too many).
+        """
+        with self._engine.connect() as conn:
+            oldest = conn.execute(select(func.min(CallEvent.id))).scalar()
+        if oldest is None:
+            # Pruning keeps the newest event, so nothing was ever recorded.
+            return [], False
+        if oldest > last_event_id + 1:
+            return [], True
+        events = self._query_events_after(last_event_id, phone_number)
+        if len(events) >= EVENT_STREAM_REPLAY_LIMIT:
+            return [], True
+        return events, False
+
+    def _query_max_id(self) -> int:
+        with self._engine.connect() as conn:
+            return conn.execute(select(func.max(CallEvent.id))).scalar() or 0
+
+    async def phone_number_for(self, user_id: uuid.UUID) -> str | None:
+        return await self._run(self._query_phone_number, user_id)
+
+    async def replay(self, phone_number: str, last_event_id: int) -> tuple[list[dict], bool]:
+        return await self._run(self._query_replay, phone_number, last_event_id)
+
+    # ── event sources
+
+    async def start(self):
+        self._last_id = await self._run(self._query_max_id)
+        source = self._listen if self._engine.dialect.name == "postgresql" else self._poll
+        self._tasks = [asyncio.create_task(source())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._engine.dispose()
+
+    async def _catch_up(self):
+        """Dispatch events committed while nothing was listening, and late commits of gaps."""
+        self._expire_gaps()
+        while True:
+            events = await self._run(self._query_events_after, self._last_id, None, list(self._gaps))
+            for event in events:
+                self._dispatch(event)
+            if len(events) < EVENT_STREAM_REPLAY_LIMIT:
+                return
+
+    def _listen_connection(self):
+        raw = self._engine.raw_connection()
+        conn = raw.driver_connection
+        # Owned by the listener from now on, never returned to the pool.
+        raw.detach()
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return conn
+
+    async def _listen(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                conn = await self._run(self._listen_connection)
+            except Exception as exc:
+                logger.error("Event stream: LISTEN connection failed: %s", exc)
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+                continue
+            fd = conn.fileno()
+            readable = asyncio.Event()
+            loop.add_reader(fd, readable.set)
+            try:
+                await self._catch_up()
+                logger.info("Event stream listening on %s", CHANNEL)
+                while True:
+                    await readable.wait()
+                    readable.clear()
+                    conn.poll()
+                    while conn.notifies:
+                        self._dispatch(json.loads(conn.notifies.pop(0).payload))
+                    self._expire_gaps()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error("Event stream: LISTEN connection lost: %s", exc)
+            finally:
+                loop.remove_reader(fd)
+                conn.close()
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    async def _poll(self):
+        while True:
+            try:
+                await self._catch_up()
+            except Exception as exc:
+                logger.error("Event stream: polling call_events failed: %s", exc)
+            await asyncio.sleep(EVENT_STREAM_POLL_SECONDS)
+
+
+# ── HTTP ──────────────────────────────────────────────────────────────────────
+
+def _last_event_id(request) -> int | None:
+    value = request.headers.get("Last-Event-ID") or request.query.get("last_event_id")
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+async def stream_events(request):
+    hub: EventHub = request.app["hub"]
+    try:
+        user_id = uuid.UUID(request.query.get("user_id", ""))
+    except ValueError:
+        return web.json_response({"error": "Invalid user id"}, status=400)
+    phone_number = await hub.phone_number_for(user_id)
+    if phone_number is None:
+        return web.json_response({"error": "User not found"}, status=404)
+
+    # Subscribe before replaying so nothing committed in between is lost.
+    subscription = hub.subscribe(phone_number)
+    try:
+        response = web.StreamResponse(headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        })
+        await response.prepare(request)
+        await response.write(b"retry: %d\n\n" % CLIENT_RETRY_MS)
+
+        replayed = set()
+        last_event_id = _last_event_id(request)
+        if last_event_id is not None:
+            events, reset = await hub.replay(phone_number, last_event_id)
+            if reset:
+                await response.write(b"event: reset\ndata: {}\n\n")
+            for event in events:
+                await response.write(_format_event(event))
+                replayed.add(event["id"])
+
+        while True:
+            try:
+                await asyncio.wait_for(subscription.ready.wait(), EVENT_STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                await response.write(b": ping\n\n")
+                continue
+            subscription.ready.clear()
+            if subscription.overflowed:
+                # The client reconnects with Last-Event-ID and replays from the table.
+                break
+            while subscription.events:
+                event = subscription.events.popleft()
+                if event["id"] not in replayed:
+                    await response.write(_format_event(event))
+            replayed.clear()
+    except ConnectionResetError:
+        pass
+    finally:
+        hub.unsubscribe(subscription)
+    return response
+
+
+def create_app(database_url: str | None = None):
+    app = web.Application()
+    app["hub"] = EventHub(database_url or os.environ["DATABASE_URL"])
+
+    async def on_startup(app):
+        await app["hub"].start()
+
+    async def on_cleanup(app):
+        await app["hub"].stop()
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_get("/events", stream_events)
+    return app
+
+
+def run():
+    configure_logging()
+    web.run_app(create_app(), port=EVENT_STREAM_PORT, print=None)
+
+
+if __name__ == "__main__":
+    run()
@@ -1,16 +1,37 @@
 import os
 import logging
-import requests
+import threading
+
+from services.metrics import observe_dependency
 
 logger = logging.getLogger(__name__)
 
 S3_BUCKET = os.environ.get("S3_BUCKET", "")
 S3_RECORDING_PREFIX = "recordings"
+S3_URL_SCHEME = "s3://"
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
 
 
 def _get_s3_client():
+    """Return the shared S3 client, importing boto3 and building it on first use.
+
+    boto3 clients are thread-safe, so one client (and its connection pool) is
+    reused for every upload and presign instead of being rebuilt per call.
+    """
+    global _s3_client
     if not S3_BUCKET:
         return None
+    if _s3_client is not None:
+        return _s3_client
+    with _s3_client_lock:
+        if _s3_client is None:
+            _s3_client = _build_s3_client()
+    return _s3_client
+
+
+def _build_s3_client():
     try:
         import boto3
         from botocore.config import Config as BotocoreConfig
@@ -32,15 +53,38 @@ def _get_s3_client():
 
         return boto3.client("s3", **kwargs)
     except Exception as e:
-        logger.warning(f"S3 client init failed: {e}")
+        logger.warning("S3 client init failed: %s", e)
         return None
 
 
-def upload_recording(recording_id: str, source_url: str) -> str | None:
-    """Download audio from source_url and upload to S3.
+def is_storage_configured() -> bool:
+    return bool(S3_BUCKET)
+
+
+def recording_object_url(recording_id: str) -> str:
+    """The s3://bucket/key location of a stored recording; it never expires, unlike a presigned URL."""
+    return f"{S3_URL_SCHEME}{S3_BUCKET}/{S3_RECORDING_PREFIX}/{recording_id}.mp3"
+
+
+def fetch_recording_object(url: str) -> bytes:
+    """Download a recording by its `recording_object_url()`.
+
+    Raises on failure, like the provider downloads it replaces.
+    """
+    client = _get_s3_client()
+    if not client:
+        raise RuntimeError("S3 not configured — cannot download " + url)
+
+    bucket, _, key = url[len(S3_URL_SCHEME):].partition("/")
+    with observe_dependency("s3"):
+        response = client.get_object(Bucket=bucket, Key=key)
+        return response["Body"].read()
+
+
+def store_recording(recording_id: str, audio_bytes: bytes) -> str | None:
+    """Upload already-downloaded audio to S3.
 
     Returns the permanent S3 URL on success, or None on failure.
-    The S3 key is: recordings/{recording_id}.mp3
     """
     client = _get_s3_client()
     if not client:
@@ -50,25 +94,16 @@ def upload_recording(recording_id: str, source_url: str) -> str | None:
     key = f"{S3_RECORDING_PREFIX}/{recording_id}.mp3"
 
     try:
-        logger.info(f"Downloading recording {recording_id} from Telnyx S3...")
-        response = requests.get(source_url, timeout=60)
-        response.raise_for_status()
-        audio_bytes = response.content
-        logger.info(f"Downloaded {len(audio_bytes)} bytes for recording {recording_id}")
-    except Exception as e:
-        logger.error(f"Failed to download recording {recording_id}: {e}")
-        return None
-
-    try:
-        client.put_object(
-            Bucket=S3_BUCKET,
-            Key=key,
-            Body=audio_bytes,
-            ContentType="audio/mpeg",
-        )
-        logger.info(f"Uploaded recording {recording_id} to s3://{S3_BUCKET}/{key}")
+        with observe_dependency("s3"):
+            client.put_object(
+                Bucket=S3_BUCKET,
+                Key=key,
+                Body=audio_bytes,
+                ContentType="audio/mpeg",
+            )
+        logger.info("Uploaded recording %s to s3://%s/%s", recording_id, S3_BUCKET, key)
     except Exception as e:
-        logger.error(f"Failed to upload recording {recording_id} to S3: {e}")
+        logger.error("Failed to upload recording %s to S3: %s", recording_id, e)
         return None
 
     try:
@@ -80,7 +115,7 @@ def upload_recording(recording_id: str, source_url: str) -> str | None:
         )
         return url
     except Exception as e:
-        logger.error(f"Failed to generate presigned URL for {key}: {e}")
+        logger.error("Failed to generate presigned URL for %s: %s", key, e)
         # Fall back to path-style public URL
         endpoint = os.environ.get("S3_ENDPOINT", "").strip()
         if endpoint:
@@ -102,9 +137,10 @@ def get_recording_url(recording_id: str, expiry_seconds: int = 3600) -> str | No
 
     try:
         # Verify the object exists before generating a URL
-        client.head_object(Bucket=S3_BUCKET, Key=key)
+        with observe_dependency("s3"):
+            client.head_object(Bucket=S3_BUCKET, Key=key)
     except Exception as e:
-        logger.error(f"Recording {recording_id} not found in S3: {e}")
+        logger.error("Recording %s not found in S3: %s", recording_id, e)
         return None
 
     try:
@@ -115,7 +151,7 @@ def get_recording_url(recording_id: str, expiry_seconds: int = 3600) -> str | No
         )
         return url
     except Exception as e:
-        logger.error(f"Failed to generate presigned URL for {key}: {e}")
+        logger.error("Failed to generate presigned URL for %s: %s", key, e)
         return None
 
 
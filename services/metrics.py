@@ -0,0 +1,242 @@
+"""
+Prometheus metrics.
+
+    http_request_duration_seconds{method, route, status}     per Flask route
+    http_requests_in_flight
+    dependency_request_duration_seconds{dependency, outcome} Telnyx, Twilio, OpenAI, S3, tweb, FCM
+    background_jobs_in_flight{job}                           transcription, outbox, scheduler
+    transcripts_total{status}                                pending / completed / failed transitions
+    recording_pipeline_stage_seconds{pipeline, provider, stage, outcome}
+    recording_pipeline_bytes_total{pipeline, provider, stage}
+    db_pool_checkout_wait_seconds                            time spent waiting for a pooled connection
+    response_cache_lookups_total{cache, result}              call-list response cache
+    user_cache_lookups_total{cache, result}                  phone -> user and push profile caches
+
+`init_app()` times every request. Code that calls an external service wraps
+the call in `observe_dependency(name)`.
+
+`/metrics` is served only when METRICS_TOKEN is set, and only to requests
+with `Authorization: Bearer <METRICS_TOKEN>` (Prometheus `authorization`
+scrape setting); the app is public, its metrics are not.
+
+Multiple gunicorn workers: set PROMETHEUS_MULTIPROC_DIR to a writable
+directory (created here if missing; gunicorn.conf.py empties it when the
+master starts and marks dead workers). `/metrics` then aggregates all
+processes. The background
+worker (`python -m services.worker`) serves its own metrics on
+WORKER_METRICS_PORT.
+"""
+
+import hmac
+import os
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy.pool import QueuePool
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+if MULTIPROC_DIR:
+    # prometheus_client fails on the first metric if the directory is missing,
+    # e.g. in `flask db upgrade` or `python main.py`, which gunicorn never set up.
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+OUTCOME_OK = "ok"
+OUTCOME_ERROR = "error"
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+_DEPENDENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+_POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+# ── metrics ───────────────────────────────────────────────────────────────────
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Flask request latency by route.",
+    ["method", "route", "status"], buckets=_LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being served.",
+    multiprocess_mode="livesum",
+)
+DEPENDENCY_DURATION = Histogram(
+    "dependency_request_duration_seconds", "Outbound call latency by external dependency.",
+    ["dependency", "outcome"], buckets=_DEPENDENCY_BUCKETS,
+)
+JOBS_IN_FLIGHT = Gauge(
+    "background_jobs_in_flight", "Background work items currently being processed.",
+    ["job"], multiprocess_mode="livesum",
+)
+TRANSCRIPTS = Counter(
+    "transcripts_total", "Transcripts moved to each status.", ["status"],
+)
+PIPELINE_STAGE_DURATION = Histogram(
+    "recording_pipeline_stage_seconds", "Recording pipeline stage latency.",
+    ["pipeline", "provider", "stage", "outcome"], buckets=_DEPENDENCY_BUCKETS,
+)
+PIPELINE_STAGE_BYTES = Counter(
+    "recording_pipeline_bytes_total", "Audio bytes moved by recording pipeline stages.",
+    ["pipeline", "provider", "stage"],
+)
+CACHE_LOOKUPS = Counter(
+    "response_cache_lookups_total", "Response cache lookups by cache and result.",
+    ["cache", "result"],
+)
+USER_CACHE_LOOKUPS = Counter(
+    "user_cache_lookups_total", "Per-process user cache lookups by cache and result.",
+    ["cache", "result"],
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a database connection from the pool.",
+    buckets=_POOL_WAIT_BUCKETS,
+)
+
+
+# ── instrumentation helpers ───────────────────────────────────────────────────
+
+# Called as observer(dependency, seconds, outcome) after every observed dependency call.
+_dependency_observers: list = []
+
+
+def add_dependency_observer(observer):
+    _dependency_observers.append(observer)
+
+
+class DependencyCall:
+    """Yielded by `observe_dependency`; set `outcome` for failures that do not raise."""
+
+    def __init__(self):
+        self.outcome = OUTCOME_OK
+
+    def fail(self):
+        self.outcome = OUTCOME_ERROR
+
+
+@contextmanager
+def observe_dependency(name: str):
+    """Time one call to an external service; an exception counts as an error."""
+    call = DependencyCall()
+    started = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        call.outcome = OUTCOME_ERROR
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        DEPENDENCY_DURATION.labels(name, call.outcome).observe(elapsed)
+        for observer in _dependency_observers:
+            observer(name, elapsed, call.outcome)
+
+
+def track_job(job: str):
+    """Context manager counting one background work item as in flight."""
+    return JOBS_IN_FLIGHT.labels(job).track_inprogress()
+
+
+def count_transcript(status: str):
+    TRANSCRIPTS.labels(status).inc()
+
+
+def count_cache_lookup(cache: str, result: str):
+    CACHE_LOOKUPS.labels(cache, result).inc()
+
+
+def count_user_cache_lookup(cache: str, result: str):
+    USER_CACHE_LOOKUPS.labels(cache, result).inc()
+
+
+def observe_pipeline_stage(pipeline: str, provider: str, result):
+    """Stage observer for services.recording_pipeline.add_stage_observer()."""
+    PIPELINE_STAGE_DURATION.labels(pipeline, provider, result.name, result.outcome).observe(
+        result.duration_ms / 1000
+    )
+    if result.bytes:
+        PIPELINE_STAGE_BYTES.labels(pipeline, provider, result.name).inc(result.bytes)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+# ── Flask integration ─────────────────────────────────────────────────────────
+
+def registry():
+    """The registry to expose: all processes' files in multiprocess mode, else this process."""
+    if MULTIPROC_DIR:
+        collector_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(collector_registry)
+        return collector_registry
+    return REGISTRY
+
+
+def metrics_response() -> Response:
+    authorization = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+        return Response("Unauthorized", status=401, headers={"WWW-Authenticate": "Bearer"})
+    return Response(generate_latest(registry()), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_app(app):
+    @app.before_request
+    def _start_timer():
+        if request.path != "/metrics":
+            g.metrics_started = time.perf_counter()
+            REQUESTS_IN_FLIGHT.inc()
+
+    @app.after_request
+    def _record_request(response):
+        observe = _request_observer(response.status_code)
+        if observe is not None:
+            if response.is_streamed:
+                # The body (and the queries feeding it) is produced after this
+                # hook; time the request until the server has sent all of it.
+                response.call_on_close(observe)
+            else:
+                observe()
+        return response
+
+    @app.teardown_request
+    def _record_failed_request(exc):
+        # after_request is skipped when the view raised.
+        if exc is not None:
+            observe = _request_observer(500)
+            if observe is not None:
+                observe()
+
+    if METRICS_TOKEN:
+        app.add_url_rule("/metrics", "metrics", metrics_response, methods=["GET"])
+
+
+def _request_observer(status: int):
+    """Records the current request once called; None if it is not timed (or already was)."""
+    started = g.pop("metrics_started", None)
+    if started is None:
+        return None
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    return partial(_observe_request, request.method, route, str(status), started)
+
+
+def _observe_request(method: str, route: str, status: str, started: float):
+    REQUESTS_IN_FLIGHT.dec()
+    REQUEST_DURATION.labels(method, route, status).observe(time.perf_counter() - started)
@@ -0,0 +1,318 @@
+"""
+Transactional outbox for call-related push notifications.
+
+Webhook and transcription code never talks to FCM directly. Instead it calls
+`enqueue_notification()` before committing, so the intent is stored in the
+same transaction as the state change it announces. `OutboxDispatcher` then
+delivers pending rows in batches in the background, retrying failures with
+exponential backoff.
+
+Delivery happens in three steps, so no row lock or transaction is held
+across an FCM call:
+
+    claim     SELECT ... FOR UPDATE SKIP LOCKED a batch of due rows, mark them
+              'sending' with a lease (next_attempt_at = now + SEND_LEASE_SECONDS),
+              commit
+    send      one FCM request per entry, outside any outbox transaction
+    finish    write each entry's outcome in its own commit, only if its lease
+              is still the one this dispatcher took; the same commit renews
+              the lease of the batch's unsent entries
+
+The lease therefore only has to outlast one send (FCM_TIMEOUT_SECONDS) plus
+its bookkeeping, however long the batch takes. Dispatchers in several
+gunicorn workers or replicas never hold the same row at once; an entry whose
+lease was taken over is skipped, not sent twice. If a dispatcher dies
+mid-batch, or a finish commit fails, the lease expires and only the affected
+entries are sent again.
+
+An unregistered (dead) FCM token fails its entry at once; retrying cannot
+succeed.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import or_, update
+
+from database.database import db
+from models.call import Call
+from models.call_transcript import CallTranscript
+from models.notification_outbox import NotificationOutbox
+from services.metrics import track_job
+from services.push_notification_service import UnregisteredToken, push_notification_service
+from services.user_cache import push_profile, invalidate_user
+
+logger = logging.getLogger(__name__)
+
+# Dispatchers running in this process, so producers outside main.py can wake them.
+_local_dispatchers: list["OutboxDispatcher"] = []
+
+
+# ── configuration ────────────────────────────────────────────────────────────
+
+KIND_RECORDING_COMPLETE = "recording_complete"
+KIND_TRANSCRIPT_READY = "transcript_ready"
+
+BATCH_SIZE = 50
+POLL_INTERVAL_SECONDS = 5
+MAX_ATTEMPTS = 8
+BASE_BACKOFF_SECONDS = 5
+MAX_BACKOFF_SECONDS = 15 * 60
+# How long a claimed entry stays 'sending' before another dispatcher may retry
+# it; renewed after every send of the batch, so it must exceed one FCM request.
+SEND_LEASE_SECONDS = 60
+
+
+# ── producer ──────────────────────────────────────────────────────────────────
+
+def enqueue_notification(kind: str, user_id, call_id: str | None = None) -> NotificationOutbox:
+    """
+    Add a notification intent to the current session without committing.
+
+    The caller's commit makes the intent durable together with its own writes.
+    """
+    entry = NotificationOutbox(kind=kind, user_id=user_id, call_id=call_id)
+    db.session.add(entry)
+    return entry
+
+
+# ── delivery ──────────────────────────────────────────────────────────────────
+
+def _recording_call_data(call: Call) -> dict:
+    transcript_status = (
+        db.session.query(CallTranscript.status)
+        .filter_by(call_id=call.id)
+        .scalar()
+    )
+    return {
+        'id': call.id,
+        'version': call.updated_at.isoformat() if call.updated_at else '',
+        'recordingStatus': call.recording_status or '',
+        'transcriptionStatus': transcript_status or 'pending',
+    }
+
+
+class ClaimedEntry(NamedTuple):
+    id: int
+    kind: str
+    user_id: object
+    call_id: str | None
+    attempts: int
+
+
+def _deliver(entry: ClaimedEntry) -> str:
+    """
+    Send one outbox entry. Returns the new status: 'sent', 'skipped',
+    'unregistered' for a dead token, or 'retry' when FCM reported a failure.
+    """
+    profile = push_profile(entry.user_id)
+    if not profile or not profile.push_notifications_enabled or not profile.fcm_token:
+        return "skipped"
+
+    call = db.session.query(Call).filter_by(id=entry.call_id).first() if entry.call_id else None
+    if entry.call_id and call is None:
+        return "skipped"
+
+    if entry.kind == KIND_RECORDING_COMPLETE:
+        send = push_notification_service.send_recording_complete_notification
+        args = (profile.fcm_token, _recording_call_data(call))
+    elif entry.kind == KIND_TRANSCRIPT_READY:
+        send = push_notification_service.send_transcript_ready_notification
+        args = (profile.fcm_token, call.id)
+    else:
+        logger.warning("Unknown outbox notification kind %s (id=%s)", entry.kind, entry.id)
+        return "skipped"
+
+    # End the read transaction before the network call.
+    db.session.commit()
+    try:
+        return "sent" if send(*args, raise_unregistered=True) else "retry"
+    except UnregisteredToken:
+        return "unregistered"
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(BASE_BACKOFF_SECONDS * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS))
+
+
+def claim_due(batch_size: int = BATCH_SIZE) -> tuple[list[ClaimedEntry], datetime]:
+    """
+    Lease up to `batch_size` due entries (pending, or 'sending' with an
+    expired lease) to this dispatcher, in one short transaction. Returns
+    them and the lease they share.
+    """
+    now = datetime.utcnow()
+    lease_until = now + timedelta(seconds=SEND_LEASE_SECONDS)
+    entries = (
+        db.session.query(NotificationOutbox)
+        .filter(
+            or_(NotificationOutbox.status == "pending", NotificationOutbox.status == "sending"),
+            NotificationOutbox.next_attempt_at <= now,
+        )
+        .order_by(NotificationOutbox.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    claimed = []
+    for entry in entries:
+        if entry.status == "sending" and entry.attempts >= MAX_ATTEMPTS:
+            # Its last attempt's dispatcher never reported back.
+            entry.status = "failed"
+            entry.last_error = entry.last_error or "Send lease expired"
+            logger.error("Outbox entry %s failed permanently: send lease expired", entry.id)
+            continue
+        entry.status = "sending"
+        entry.attempts += 1
+        entry.next_attempt_at = lease_until
+        claimed.append(ClaimedEntry(entry.id, entry.kind, entry.user_id, entry.call_id, entry.attempts))
+    db.session.commit()
+    return claimed, lease_until
+
+
+def _finish(entry: ClaimedEntry, outcome: str, error: str | None,
+            lease_until: datetime, unsent_ids: list[int]) -> tuple[datetime, set[int]]:
+    """
+    Record one entry's outcome, unless its lease expired and another
+    dispatcher took it, and renew the lease of `unsent_ids` in the same
+    commit. Returns the new lease and the unsent ids still held under it.
+    """
+    if outcome == "unregistered":
+        invalidate_user(entry.user_id)
+        values = {"status": "failed", "last_error": "FCM token unregistered"}
+        logger.info("Outbox entry %s failed: FCM token unregistered", entry.id)
+    elif outcome == "retry":
+        # The token may have been rotated by another process; reload it next attempt.
+        invalidate_user(entry.user_id)
+        if entry.attempts >= MAX_ATTEMPTS:
+            values = {"status": "failed", "last_error": error}
+            logger.error("Outbox entry %s failed permanently: %s", entry.id, error)
+        else:
+            values = {"status": "pending", "last_error": error,
+                      "next_attempt_at": datetime.utcnow() + _backoff(entry.attempts)}
+    else:
+        values = {"status": outcome, "sent_at": datetime.utcnow() if outcome == "sent" else None}
+
+    db.session.execute(
+        update(NotificationOutbox)
+        .where(
+            NotificationOutbox.id == entry.id,
+            NotificationOutbox.status == "sending",
+            NotificationOutbox.next_attempt_at == lease_until,
+        )
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+    renewed_until = datetime.utcnow() + timedelta(seconds=SEND_LEASE_SECONDS)
+    held = set()
+    if unsent_ids:
+        held = set(db.session.scalars(
+            update(NotificationOutbox)
+            .where(
+                NotificationOutbox.id.in_(unsent_ids),
+                NotificationOutbox.status == "sending",
+                NotificationOutbox.next_attempt_at == lease_until,
+            )
+            .values(next_attempt_at=renewed_until)
+            .returning(NotificationOutbox.id)
+            .execution_options(synchronize_session=False)
+        ))
+    db.session.commit()
+    return renewed_until, held
+
+
+def dispatch_pending(batch_size: int = BATCH_SIZE) -> int:
+    """
+    Deliver up to `batch_size` due outbox entries. Returns how many were claimed.
+
+    Must be called inside a Flask application context.
+    """
+    claimed, lease_until = claim_due(batch_size)
+    held = {entry.id for entry in claimed}
+
+    for index, entry in enumerate(claimed):
+        if entry.id not in held:
+            # Its lease ran out and another dispatcher took it over.
+            continue
+        try:
+            with track_job("outbox"):
+                outcome = _deliver(entry)
+            error = None if outcome != "retry" else "FCM send failed"
+        except Exception as exc:
+            db.session.rollback()
+            outcome, error = "retry", str(exc)
+
+        unsent_ids = [other.id for other in claimed[index + 1:] if other.id in held]
+        try:
+            lease_until, held = _finish(entry, outcome, error, lease_until, unsent_ids)
+        except Exception as exc:
+            # The lease expires and this entry alone is retried; the rest
+            # keep the current lease until the next successful finish.
+            db.session.rollback()
+            logger.error("Outbox entry %s: could not record outcome %s: %s", entry.id, outcome, exc)
+
+    return len(claimed)
+
+
+# ── dispatcher ────────────────────────────────────────────────────────────────
+
+def wake_dispatchers():
+    """Wake every dispatcher started in this process (no-op if none is running)."""
+    for dispatcher in _local_dispatchers:
+        dispatcher.wake()
+
+
+class OutboxDispatcher:
+    """
+    Background thread that drains the notification outbox. Producers call
+    `wake()` after committing so new entries go out without waiting for the
+    next poll.
+    """
+
+    def __init__(self, flask_app, autostart: bool = True):
+        self._app = flask_app
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        _local_dispatchers.append(self)
+        if autostart:
+            self.start()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="notification-outbox",
+            daemon=True,
+        )
+        self._thread.start()
+        logger.info("OutboxDispatcher started")
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def join(self, timeout: float | None = None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    def wake(self):
+        self._wake_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wake_event.wait(POLL_INTERVAL_SECONDS)
+            self._wake_event.clear()
+            try:
+                with self._app.app_context():
+                    # Keep draining while full batches come back.
+                    while dispatch_pending() == BATCH_SIZE:
+                        pass
+            except Exception as exc:
+                logger.error("OutboxDispatcher iteration failed: %s", exc)
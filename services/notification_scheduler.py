@@ -1,32 +1,71 @@
 """
 Daily push notification background job.
 
-Fires once per day at TARGET_HOUR_ET (Eastern Time). For every user who has
-an FCM token but is either not registered in the tweb backend or has zero
-revenue and no trial, it sends a randomly chosen promotional push notification.
+Fires once per day for every user at TARGET_LOCAL_HOUR in the user's own
+timezone. For every user who has an FCM token but is either not registered in
+the tweb backend or has zero revenue and no trial, it sends a randomly chosen
+promotional push notification.
+
+Delivery is split into hourly UTC buckets. Each bucket contains the users
+whose local TARGET_LOCAL_HOUR begins inside that UTC hour (see
+services/timezones.py for how a user's timezone is resolved), so the load on
+FCM, tweb and the database is spread across the day instead of one spike.
+
+Every gunicorn worker and replica runs its own scheduler thread, so each run is
+claimed through a row in ``notification_runs`` keyed by (campaign, window).
+Only the process whose INSERT wins the unique constraint sends; the row also
+records the outcome so a restart inside the window does not fire again.
+
+While a run is in progress it checkpoints its cursor (the last user id it
+handled) and counters into the same row. If the owning process dies, its
+heartbeat goes stale and the next scheduler tick in the same window takes the
+row over and continues after the cursor instead of starting from scratch.
 """
 
+import logging
+import os
+import socket
 import threading
-from datetime import datetime, timezone
+import time
+from datetime import datetime, time as dtime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
 import requests as _requests
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
 
 from database.database import db
+from models.notification_run import NotificationRun
 from models.user import User
+from services.metrics import observe_dependency, track_job
 from services.notification_copy_data import pick_random_coherent
 from services.push_notification_service import push_notification_service
+from services.timezones import (
+    COUNTRY_TIMEZONES,
+    DEFAULT_TIMEZONE,
+    country_codes_for,
+    is_valid_timezone,
+    known_country_codes,
+)
+
+logger = logging.getLogger(__name__)
 
 
 # ── configuration ────────────────────────────────────────────────────────────
 
-EASTERN = ZoneInfo("Asia/Seoul")
-TARGET_HOUR_ET = 13          # 1 PM Korea Standard Time
-POLL_INTERVAL_SECONDS = 30 * 60  # check every 30 minutes
+TARGET_LOCAL_HOUR = 13      # 1 PM in each user's local timezone
+POLL_INTERVAL_SECONDS = 5 * 60  # check every 5 minutes
+
+USER_PAGE_SIZE = 500
+CHECKPOINT_EVERY_USERS = 25
+CHECKPOINT_EVERY_SECONDS = 30
+STALE_RUN_SECONDS = 10 * 60     # heartbeat age after which a run may be taken over
 
-TWEB_BASE_URL = "https://backend-staging-1556.up.railway.app"
+TWEB_BASE_URL = os.environ.get("TWEB_BASE_URL", "https://backend-staging-1556.up.railway.app")
 TWEB_TIMEOUT_SECONDS = 10
 
+CAMPAIGN_NO_REVENUE = "no_revenue_promo"
+
 
 # ── tweb client ───────────────────────────────────────────────────────────────
 
@@ -37,17 +76,18 @@ def _get_tweb_app_user(user_id: str) -> dict | None:
     request fails.
     """
     try:
-        resp = _requests.get(
-            f"{TWEB_BASE_URL}/api/appuser",
-            params={"userId": user_id},
-            timeout=TWEB_TIMEOUT_SECONDS,
-        )
-        if resp.status_code == 404:
-            return None
-        resp.raise_for_status()
+        with observe_dependency("tweb"):
+            resp = _requests.get(
+                f"{TWEB_BASE_URL}/api/appuser",
+                params={"userId": user_id},
+                timeout=TWEB_TIMEOUT_SECONDS,
+            )
+            if resp.status_code == 404:
+                return None
+            resp.raise_for_status()
         return resp.json()
     except Exception as exc:
-        print(f"tweb lookup failed for user {user_id}: {exc}")
+        logger.warning("tweb lookup failed for user %s: %s", user_id, exc)
         return None
 
 
@@ -60,6 +100,63 @@ def _is_paying(app_user: dict | None) -> bool:
     return float(total_revenue) > 0.0 or has_trial
 
 
+# ── delivery buckets ──────────────────────────────────────────────────────────
+
+def _window_key(bucket_start: datetime) -> str:
+    return bucket_start.strftime("%Y-%m-%dT%H:00Z")
+
+
+def _bucket_start(window_key: str) -> datetime:
+    return datetime.strptime(window_key, "%Y-%m-%dT%H:00Z").replace(tzinfo=timezone.utc)
+
+
+def _target_hour_starts_in(tz_name: str, bucket_start: datetime) -> bool:
+    """True if local TARGET_LOCAL_HOUR:00 in `tz_name` falls inside the UTC bucket."""
+    tz = ZoneInfo(tz_name)
+    bucket_end = bucket_start + timedelta(hours=1)
+    days = {bucket_start.astimezone(tz).date(), bucket_end.astimezone(tz).date()}
+    for day in days:
+        target = datetime.combine(day, dtime(TARGET_LOCAL_HOUR), tzinfo=tz)
+        if bucket_start <= target < bucket_end:
+            return True
+    return False
+
+
+def _bucket_user_filter(bucket_start: datetime):
+    """
+    SQL filter selecting the users whose target hour begins in this bucket,
+    or None when no timezone is due.
+
+    This is where a user's timezone is resolved: a valid IANA name stored on
+    the user wins; a missing or invalid one falls back to the timezone of
+    the user's country code, and an unknown country to DEFAULT_TIMEZONE.
+    """
+    stored = {
+        tz for (tz,) in db.session.query(User.timezone)
+        .filter(User.timezone.isnot(None))
+        .distinct()
+    }
+    invalid = sorted(tz for tz in stored if not is_valid_timezone(tz))
+    candidates = (stored - set(invalid)) | set(COUNTRY_TIMEZONES.values()) | {DEFAULT_TIMEZONE}
+    due = sorted(tz for tz in candidates if _target_hour_starts_in(tz, bucket_start))
+    if not due:
+        return None
+
+    country = func.upper(User.country_code)
+    no_timezone = User.timezone.is_(None)
+    if invalid:
+        no_timezone = or_(no_timezone, User.timezone.in_(invalid))
+    clauses = [User.timezone.in_(due)]
+
+    codes = [code for tz in due for code in country_codes_for(tz)]
+    if codes:
+        clauses.append(and_(no_timezone, country.in_(codes)))
+    if DEFAULT_TIMEZONE in due:
+        clauses.append(and_(no_timezone, country.notin_(known_country_codes())))
+
+    return or_(*clauses)
+
+
 # ── runner ────────────────────────────────────────────────────────────────────
 
 class NotificationRunStats:
@@ -70,6 +167,16 @@ class NotificationRunStats:
         self.sent: int = 0
         self.failed: int = 0
 
+    @classmethod
+    def from_run(cls, run: NotificationRun) -> "NotificationRunStats":
+        """Seed the counters from a checkpointed run that is being resumed."""
+        stats = cls()
+        stats.checked = run.checked or 0
+        stats.eligible = run.eligible or 0
+        stats.sent = run.sent or 0
+        stats.failed = run.failed or 0
+        return stats
+
     def __str__(self):
         return (
             f"checked={self.checked} eligible={self.eligible} "
@@ -77,59 +184,185 @@ class NotificationRunStats:
         )
 
 
-def run_no_revenue_notifications(app_context) -> NotificationRunStats:
+def run_no_revenue_notifications(
+    app_context,
+    run: NotificationRun | None = None,
+    bucket_start: datetime | None = None,
+) -> NotificationRunStats:
     """
     Query users, check tweb, and send promotional notifications to users
     who are not paying and have no active trial.
 
+    When `bucket_start` is given only users whose local target hour begins in
+    that UTC hour are considered; otherwise every user with a token is.
+
+    Users are walked in id order. When `run` is given, progress is
+    checkpointed into it and a resumed run starts after `run.cursor_user_id`.
+    The cursor is persisted *before* each send, so a crash can at worst skip
+    one user but never notify the same user twice.
+
     Must be called inside a Flask application context.
     """
     import random
-    stats = NotificationRunStats()
+    stats = NotificationRunStats.from_run(run) if run is not None else NotificationRunStats()
     rng = random.Random()
 
-    users = (
-        db.session.query(User.id, User.fcm_token, User.language)
-        .filter(User.fcm_token.isnot(None), User.fcm_token != "")
-        .all()
+    bucket_filter = None
+    if bucket_start is not None:
+        bucket_filter = _bucket_user_filter(bucket_start)
+        if bucket_filter is None:
+            return stats
+
+    cursor = run.cursor_user_id if run is not None else None
+    pending = 0
+    last_checkpoint = time.monotonic()
+
+    while True:
+        query = (
+            db.session.query(User.id, User.fcm_token, User.language)
+            .filter(User.fcm_token.isnot(None), User.fcm_token != "")
+            .order_by(User.id)
+        )
+        if bucket_filter is not None:
+            query = query.filter(bucket_filter)
+        if cursor is not None:
+            query = query.filter(User.id > cursor)
+        users = query.limit(USER_PAGE_SIZE).all()
+        if not users:
+            break
+
+        for user_id, fcm_token, language in users:
+            stats.checked += 1
+            cursor = user_id
+            pending += 1
+
+            app_user = _get_tweb_app_user(str(user_id))
+            if _is_paying(app_user):
+                if run is not None and (
+                    pending >= CHECKPOINT_EVERY_USERS
+                    or time.monotonic() - last_checkpoint >= CHECKPOINT_EVERY_SECONDS
+                ):
+                    _checkpoint_run(run, stats, cursor)
+                    pending, last_checkpoint = 0, time.monotonic()
+                continue
+
+            stats.eligible += 1
+            title, body = pick_random_coherent(rng, language=language)
+
+            if run is not None:
+                _checkpoint_run(run, stats, cursor)
+                pending, last_checkpoint = 0, time.monotonic()
+
+            ok = push_notification_service.send_notification(fcm_token, title, body)
+            if ok:
+                stats.sent += 1
+            else:
+                stats.failed += 1
+
+    return stats
+
+
+# ── run records ───────────────────────────────────────────────────────────────
+
+def _owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _claim_run(campaign: str, window_key: str) -> NotificationRun | None:
+    """
+    Try to become the single process that runs `campaign` for `window_key`.
+
+    Returns the freshly inserted run row, a stale run taken over from a dead
+    owner, or None if the window is completed or owned by a live process.
+    """
+    existing = (
+        db.session.query(NotificationRun.id)
+        .filter_by(campaign=campaign, window_key=window_key)
+        .first()
     )
+    if existing:
+        return _take_over_stale_run(campaign, window_key)
 
-    for user_id, fcm_token, language in users:
-        stats.checked += 1
+    run = NotificationRun(campaign=campaign, window_key=window_key, owner=_owner_id())
+    db.session.add(run)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return _take_over_stale_run(campaign, window_key)
+    return run
+
+
+def _take_over_stale_run(campaign: str, window_key: str) -> NotificationRun | None:
+    """
+    Claim an unfinished run whose owner stopped heartbeating.
+
+    The conditional UPDATE is the lock: of several processes racing for the
+    same stale row only one sees rowcount == 1.
+    """
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=STALE_RUN_SECONDS)
+    taken = (
+        db.session.query(NotificationRun)
+        .filter(
+            NotificationRun.campaign == campaign,
+            NotificationRun.window_key == window_key,
+            NotificationRun.status != "completed",
+            NotificationRun.heartbeat_at < stale_before,
+        )
+        .update(
+            {"owner": _owner_id(), "status": "running", "heartbeat_at": now, "finished_at": None},
+            synchronize_session=False,
+        )
+    )
+    db.session.commit()
+    if not taken:
+        return None
+    return (
+        db.session.query(NotificationRun)
+        .filter_by(campaign=campaign, window_key=window_key)
+        .first()
+    )
 
-        app_user = _get_tweb_app_user(str(user_id))
-        if _is_paying(app_user):
-            continue
 
-        stats.eligible += 1
-        title, body = pick_random_coherent(rng, language=language)
+def _checkpoint_run(run: NotificationRun, stats: "NotificationRunStats", cursor):
+    run.cursor_user_id = cursor
+    run.checked = stats.checked
+    run.eligible = stats.eligible
+    run.sent = stats.sent
+    run.failed = stats.failed
+    run.heartbeat_at = datetime.utcnow()
+    db.session.commit()
 
-        ok = push_notification_service.send_notification(fcm_token, title, body)
-        if ok:
-            stats.sent += 1
-        else:
-            stats.failed += 1
 
-    return stats
+def _finish_run(run: NotificationRun, stats: "NotificationRunStats | None", status: str):
+    if stats is not None:
+        run.checked = stats.checked
+        run.eligible = stats.eligible
+        run.sent = stats.sent
+        run.failed = stats.failed
+    run.status = status
+    run.finished_at = datetime.utcnow()
+    run.heartbeat_at = run.finished_at
+    db.session.commit()
 
 
 # ── scheduler ─────────────────────────────────────────────────────────────────
 
 class NotificationScheduler:
     """
-    Background thread that fires the notification runner once per day at
-    TARGET_HOUR_ET Eastern Time.
+    Background thread that fires the notification runner once per hourly UTC
+    bucket for the users whose local target hour falls in that bucket.
     """
 
-    def __init__(self, flask_app):
+    def __init__(self, flask_app, autostart: bool = True):
         self._app = flask_app
-        self._last_sent_date: datetime.date | None = None
         self._thread: threading.Thread | None = None
         self._stop_event = threading.Event()
-        self.start()
+        if autostart:
+            self.start()
 
     def start(self):
-        print("NotificationScheduler starting...")
         if self._thread and self._thread.is_alive():
             return
         self._stop_event.clear()
@@ -140,14 +373,15 @@ class NotificationScheduler:
         )
         self._thread.start()
 
-        print("NotificationScheduler started — fires daily at 03:00 ET")
-        print(
-            "NotificationScheduler started — fires daily at 02:00 ET"
-        )
+        logger.info("NotificationScheduler started — fires hourly for users at %02d:00 local time", TARGET_LOCAL_HOUR)
 
     def stop(self):
         self._stop_event.set()
 
+    def join(self, timeout: float | None = None):
+        if self._thread:
+            self._thread.join(timeout)
+
     def _run(self):
         self._stop_event.wait(30)
 
@@ -155,30 +389,37 @@ class NotificationScheduler:
             try:
                 self._check_and_run()
             except Exception as exc:
-                print(f"NotificationScheduler iteration failed: {exc}")
+                logger.error("NotificationScheduler iteration failed: %s", exc)
 
             self._stop_event.wait(POLL_INTERVAL_SECONDS)
 
     def _check_and_run(self):
-        now_et = datetime.now(tz=EASTERN)
-        today_et = now_et.date()
+        now_utc = datetime.now(tz=timezone.utc)
+        bucket_start = now_utc.replace(minute=0, second=0, microsecond=0)
+        previous_bucket = bucket_start - timedelta(hours=1)
 
-        if now_et.hour != TARGET_HOUR_ET:
-            print(
-                "NotificationScheduler is not time to run"
-            )
-            return
+        with self._app.app_context():
+            run = _claim_run(CAMPAIGN_NO_REVENUE, _window_key(bucket_start))
+            if run is None:
+                # A run interrupted near the end of the previous bucket may
+                # still be finished.
+                run = _take_over_stale_run(CAMPAIGN_NO_REVENUE, _window_key(previous_bucket))
 
-        if self._last_sent_date == today_et:
-            return
+            if run is None:
+                logger.debug("NotificationScheduler nothing to run for bucket %s", _window_key(bucket_start))
+                return
 
-        print(
-            "NotificationScheduler firing for %s (ET %02d:%02d)"
-        )
+            resumed = run.cursor_user_id is not None
+            logger.info("NotificationScheduler %s for bucket %s", "resuming" if resumed else "firing", run.window_key)
 
-        with self._app.app_context():
-            stats = run_no_revenue_notifications(self._app)
+            try:
+                with track_job("notification_run"):
+                    stats = run_no_revenue_notifications(self._app, run, _bucket_start(run.window_key))
+            except Exception:
+                db.session.rollback()
+                _finish_run(run, None, "failed")
+                raise
 
-        self._last_sent_date = today_et
+            _finish_run(run, stats, "completed")
 
-        print(f"NotificationScheduler completed — {stats}")
+        logger.info("NotificationScheduler completed — %s", stats)
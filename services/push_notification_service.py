@@ -1,22 +1,52 @@
 import os
 import json
-import firebase_admin
-from firebase_admin import credentials, messaging
+import logging
+import threading
 from typing import Optional, List, Dict, Any
 
+from services.metrics import observe_dependency
+
+logger = logging.getLogger(__name__)
+
+# Per FCM request; firebase_admin's own default is 120s. Keep it well below
+# notification_outbox.SEND_LEASE_SECONDS.
+FCM_TIMEOUT_SECONDS = float(os.environ.get("FCM_TIMEOUT_SECONDS", "10"))
+
+
+class UnregisteredToken(Exception):
+    """The device token is dead (app uninstalled or token rotated); retrying cannot succeed."""
+
+
 class PushNotificationService:
     def __init__(self):
         self.initialized = False
         self.app = None
-        self.initialize_firebase()
+        self._init_attempted = False
+        self._init_lock = threading.Lock()
+    
+    def ensure_initialized(self) -> bool:
+        """Initialize Firebase on first use; returns whether push is available.
+        
+        firebase_admin is imported and the app is created lazily so neither
+        runs while the web worker is booting.
+        """
+        if not self._init_attempted:
+            with self._init_lock:
+                if not self._init_attempted:
+                    self.initialize_firebase()
+                    self._init_attempted = True
+        return self.initialized
     
     def initialize_firebase(self):
         """Initialize Firebase Admin SDK with service account credentials"""
         try:
+            import firebase_admin
+            from firebase_admin import credentials
+
             firebase_creds = os.environ.get('FIREBASE_SERVICE_CREDENTIALS')
             
             if not firebase_creds:
-                print("Warning: FIREBASE_SERVICE_CREDENTIALS not set. Push notifications will not work.")
+                logger.warning("FIREBASE_SERVICE_CREDENTIALS not set. Push notifications will not work.")
                 return
 
             if firebase_creds.startswith('{'):
@@ -25,22 +55,23 @@ class PushNotificationService:
             elif os.path.exists(firebase_creds):
                 cred = credentials.Certificate(firebase_creds)
             else:
-                print(f"Error: FIREBASE_SERVICE_CREDENTIALS is neither a valid JSON nor a valid file path")
+                logger.error("FIREBASE_SERVICE_CREDENTIALS is neither a valid JSON nor a valid file path")
                 return
             
-            self.app = firebase_admin.initialize_app(cred)
+            self.app = firebase_admin.initialize_app(cred, {"httpTimeout": FCM_TIMEOUT_SECONDS})
             self.initialized = True
-            print("Firebase Admin SDK initialized successfully")
+            logger.info("Firebase Admin SDK initialized successfully")
             
         except json.JSONDecodeError as e:
-            print(f"Error parsing Firebase credentials JSON: {str(e)}")
+            logger.error("Error parsing Firebase credentials JSON: %s", e)
             self.initialized = False
         except Exception as e:
-            print(f"Error initializing Firebase Admin SDK: {str(e)}")
+            logger.error("Error initializing Firebase Admin SDK: %s", e)
             self.initialized = False
     
     def send_notification(self, fcm_token: str, title: str, body: str, 
-                         data: Optional[Dict[str, str]] = None) -> bool:
+                         data: Optional[Dict[str, str]] = None,
+                         raise_unregistered: bool = False) -> bool:
         """
         Send a push notification to a single device
         
@@ -49,14 +80,17 @@ class PushNotificationService:
             title: Notification title
             body: Notification body text
             data: Optional data payload
+            raise_unregistered: Raise UnregisteredToken for a dead token instead of returning False
             
         Returns:
             bool: True if notification was sent successfully, False otherwise
         """
-        if not self.initialized:
-            print("Firebase not initialized. Cannot send notification.")
+        if not self.ensure_initialized():
+            logger.warning("Firebase not initialized. Cannot send notification.")
             return False
         
+        from firebase_admin import messaging
+
         try:
             message = messaging.Message(
                 notification=messaging.Notification(
@@ -67,15 +101,18 @@ class PushNotificationService:
                 data=data or {}
             )
             
-            response = messaging.send(message)
-            print(f"Successfully sent notification: {response}")
+            with observe_dependency("fcm"):
+                response = messaging.send(message)
+            logger.debug("Sent notification", extra={"message_id": response})
             return True
             
         except messaging.UnregisteredError:
-            print(f"Token {fcm_token} is invalid or unregistered")
+            logger.info("FCM token is invalid or unregistered", extra={"fcm_token": fcm_token})
+            if raise_unregistered:
+                raise UnregisteredToken()
             return False
         except Exception as e:
-            print(f"Error sending notification: {str(e)}")
+            logger.error("Error sending notification: %s", e)
             return False
     
     def send_multicast_notification(self, fcm_tokens: List[str], title: str, 
@@ -92,13 +129,15 @@ class PushNotificationService:
         Returns:
             dict: Results of the multicast send operation
         """
-        if not self.initialized:
-            print("Firebase not initialized. Cannot send notifications.")
+        if not self.ensure_initialized():
+            logger.warning("Firebase not initialized. Cannot send notifications.")
             return {"success_count": 0, "failure_count": len(fcm_tokens)}
         
         if not fcm_tokens:
             return {"success_count": 0, "failure_count": 0}
         
+        from firebase_admin import messaging
+
         try:
             message = messaging.MulticastMessage(
                 notification=messaging.Notification(
@@ -109,7 +148,8 @@ class PushNotificationService:
                 data=data or {}
             )
             
-            response = messaging.send_multicast(message)
+            with observe_dependency("fcm"):
+                response = messaging.send_multicast(message)
             
             results = {
                 "success_count": response.success_count,
@@ -125,11 +165,11 @@ class PushNotificationService:
                             "error": str(resp.exception)
                         })
             
-            print(f"Multicast result - Success: {response.success_count}, Failures: {response.failure_count}")
+            logger.info("Multicast result - Success: %d, Failures: %d", response.success_count, response.failure_count)
             return results
             
         except Exception as e:
-            print(f"Error sending multicast notification: {str(e)}")
+            logger.error("Error sending multicast notification: %s", e)
             return {
                 "success_count": 0,
                 "failure_count": len(fcm_tokens),
@@ -183,35 +223,58 @@ class PushNotificationService:
         
         return self.send_notification(fcm_token, title, body, data)
     
-    def send_recording_complete_notification(self, fcm_token: str, call_data: Dict[str, Any]) -> bool:
+    def send_transcript_ready_notification(self, fcm_token: str, call_id: str,
+                                           raise_unregistered: bool = False) -> bool:
+        """
+        Send a follow-up notification when the Whisper transcript of a recording is ready
+        
+        Args:
+            fcm_token: The FCM registration token for the device
+            call_id: Unique identifier for the call
+            raise_unregistered: See send_notification
+            
+        Returns:
+            bool: True if notification was sent successfully
+        """
+        title = "Transcript Ready"
+        body = "Your call transcript is ready to view"
+        
+        data = {
+            "type": "transcript_ready",
+            "id": str(call_id)
+        }
+        
+        return self.send_notification(fcm_token, title, body, data, raise_unregistered)
+    
+    def send_recording_complete_notification(self, fcm_token: str, call_data: Dict[str, Any],
+                                             raise_unregistered: bool = False) -> bool:
         """
-        Send a notification when recording is complete with full call data
+        Send a notification when recording is complete
+        
+        Only the call id, its statuses and its version (the call's updated_at)
+        are sent; FCM data payloads are capped at ~4 KB, so the app fetches the
+        full record from GET /api/calls/<id> when the notification is opened,
+        unless its copy already has that updated_at.
         
         Args:
             fcm_token: The FCM registration token for the device
-            call_data: Dictionary containing all call information for the Recording struct
+            call_data: Dictionary with the call 'id', 'version', 'recordingStatus' and 'transcriptionStatus'
+            raise_unregistered: See send_notification
             
         Returns:
             bool: True if notification was sent successfully
         """
         title = "Recording Complete"
-        body = f"Your call recording from is ready!"
+        body = "Your call recording is ready!"
 
         data = {
             "type": "recording_complete",
             "id": str(call_data.get('id', '')),
-            "callDate": str(call_data.get('callDate', '')),
-            "fromPhone": str(call_data.get('fromPhone', '')),
-            "toPhone": str(call_data.get('toPhone', '')),
-            "recordingDuration": str(call_data.get('recordingDuration', 0)),
+            "version": str(call_data.get('version', '')),
             "recordingStatus": str(call_data.get('recordingStatus', '')),
-            "recordingUrl": str(call_data.get('recordingUrl', '')),
-            "summary": str(call_data.get('summary', '')),
-            "title": str(call_data.get('title', '')),
             "transcriptionStatus": str(call_data.get('transcriptionStatus', '')),
-            "transcriptionText": str(call_data.get('transcriptionText', ''))
         }
         
-        return self.send_notification(fcm_token, title, body, data)
+        return self.send_notification(fcm_token, title, body, data, raise_unregistered)
 
 push_notification_service = PushNotificationService()
\ No newline at end of file
@@ -0,0 +1,438 @@
+"""
+Provider-neutral recording-completion pipeline.
+
+Telnyx `call.recording.saved` events and Twilio `/record-complete` callbacks
+are translated by a provider adapter into a `CompletedRecording` and then run
+through the same stages:
+
+    ingest      parse the webhook and load the call
+    store       copy the audio into our own storage (S3); the transcription
+                job then downloads that copy, not the provider's expiring URL
+    persist     update the call, queue transcription and the push intent in one commit
+    notify      wake the outbox dispatcher
+    transcribe  wake the transcription workers
+
+The transcription job itself (`transcribe_call`, run by TranscriptionWorker)
+is timed the same way: fetch → transcribe → persist → notify.
+
+Every stage records its duration, the bytes it moved and its outcome. One log
+line per run summarises them, and `add_stage_observer()` lets other code (e.g.
+metrics) receive each stage as it finishes.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable
+
+import requests
+from requests.auth import HTTPBasicAuth
+
+from database.call_events import (
+    EVENT_RECORDING_COMPLETED,
+    EVENT_TRANSCRIPT_STATUS,
+    record_call_event,
+    record_call_event_for_call,
+)
+from database.call_versions import bump_calls_version, mark_call_changed
+from database.database import db
+from models.call import Call
+from models.call_transcript import CallTranscript
+from schemas.webhooks import TelnyxCallPayload, TwilioRecordingStatus
+from services.file_service import (
+    S3_URL_SCHEME,
+    fetch_recording_object,
+    is_storage_configured,
+    recording_object_url,
+    store_recording,
+)
+from services.metrics import count_transcript, observe_dependency
+from services.notification_outbox import (
+    enqueue_notification,
+    wake_dispatchers,
+    KIND_RECORDING_COMPLETE,
+    KIND_TRANSCRIPT_READY,
+)
+from services.transcript_service import get_transcript_service
+from services.user_cache import user_id_for_phone
+
+logger = logging.getLogger(__name__)
+
+# Called with (pipeline, provider, StageResult) after every stage.
+_stage_observers: list[Callable[[str, str, "StageResult"], None]] = []
+
+# Wakes the transcription workers running in this process.
+_transcription_wakers: list[Callable[[], None]] = []
+
+
+# ── configuration ────────────────────────────────────────────────────────────
+
+PROVIDER_TELNYX = "telnyx"
+PROVIDER_TWILIO = "twilio"
+
+TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
+TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN")
+TWILIO_API_BASE = os.environ.get("TWILIO_API_BASE", "https://api.twilio.com").rstrip("/")
+
+DOWNLOAD_TIMEOUT_SECONDS = 60
+TRANSCRIPTION_DOWNLOAD_TIMEOUT_SECONDS = 120
+
+OUTCOME_OK = "ok"
+OUTCOME_SKIPPED = "skipped"
+OUTCOME_FAILED = "failed"
+
+# Results of `complete_recording()`.
+RESULT_COMPLETED = "completed"
+RESULT_DUPLICATE = "duplicate"
+RESULT_CALL_NOT_FOUND = "call_not_found"
+RESULT_INVALID = "invalid"
+
+
+# ── stage timing ──────────────────────────────────────────────────────────────
+
+@dataclass
+class StageResult:
+    name: str
+    duration_ms: float = 0.0
+    outcome: str = OUTCOME_OK
+    bytes: int | None = None
+
+
+@dataclass
+class StageTimings:
+    pipeline: str
+    provider: str
+    call_id: str | None = None
+    stages: list[StageResult] = field(default_factory=list)
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time the enclosed block as one stage. The block may set `outcome` and
+        `bytes` on the yielded StageResult; an exception marks it failed.
+        """
+        result = StageResult(name)
+        started = time.perf_counter()
+        try:
+            yield result
+        except Exception:
+            result.outcome = OUTCOME_FAILED
+            raise
+        finally:
+            result.duration_ms = (time.perf_counter() - started) * 1000
+            self.stages.append(result)
+            for observer in _stage_observers:
+                try:
+                    observer(self.pipeline, self.provider, result)
+                except Exception as exc:
+                    logger.warning("Stage observer failed: %s", exc)
+
+    def log(self):
+        parts = []
+        for s in self.stages:
+            part = f"{s.name} {s.duration_ms:.1f}ms {s.outcome}"
+            if s.bytes is not None:
+                part += f" {s.bytes}B"
+            parts.append(part)
+        total_ms = sum(s.duration_ms for s in self.stages)
+        logger.info(
+            "%s pipeline %s/%s: %s (total %.1fms)",
+            self.pipeline, self.provider, self.call_id, " | ".join(parts), total_ms,
+        )
+
+
+def add_stage_observer(observer: Callable[[str, str, StageResult], None]):
+    _stage_observers.append(observer)
+
+
+def add_transcription_waker(waker: Callable[[], None]):
+    _transcription_wakers.append(waker)
+
+
+# ── provider adapters ─────────────────────────────────────────────────────────
+
+@dataclass
+class CompletedRecording:
+    call_id: str
+    recording_id: str | None
+    playback_url: str | None        # stored on the call, served to the app
+    source_url: str | None          # where the transcription job downloads the audio
+    duration_seconds: int | None = None
+
+
+class TelnyxRecordings:
+    """Telnyx `call.recording.saved`; the audio is copied to S3 and served via /recording/<id>."""
+
+    provider = PROVIDER_TELNYX
+    stores_audio = True
+
+    def __init__(self, public_base_url: str):
+        self._base_url = public_base_url.rstrip("/")
+
+    def ingest(self, payload: TelnyxCallPayload, call_id: str | None = None) -> CompletedRecording | None:
+        call_id = payload.call_control_id
+        if not call_id:
+            return None
+        recording_id = payload.recording_id
+        # The raw Telnyx pre-signed URL can be downloaded directly without auth.
+        source_url = (payload.recording_urls or {}).get("mp3")
+        return CompletedRecording(
+            call_id=call_id,
+            recording_id=recording_id,
+            playback_url=f"{self._base_url}/recording/{recording_id}" if recording_id else source_url,
+            source_url=source_url,
+            duration_seconds=_duration_between(payload.recording_started_at, payload.recording_ended_at),
+        )
+
+    @staticmethod
+    def fetch_audio(url: str, timeout: float = DOWNLOAD_TIMEOUT_SECONDS) -> bytes:
+        with observe_dependency("telnyx"):
+            response = requests.get(url, timeout=timeout)
+            response.raise_for_status()
+        return response.content
+
+
+class TwilioRecordings:
+    """Twilio recording status callback; the audio stays with Twilio behind /recording/twilio/<sid>."""
+
+    provider = PROVIDER_TWILIO
+    stores_audio = False
+
+    def __init__(self, public_base_url: str):
+        self._base_url = public_base_url.rstrip("/")
+
+    def ingest(self, payload: TwilioRecordingStatus, call_id: str | None = None) -> CompletedRecording | None:
+        if not call_id:
+            return None
+        recording_url = payload.recording_url
+        recording_sid = payload.recording_sid
+        if not recording_sid and recording_url and "Recordings/" in recording_url:
+            recording_sid = recording_url.split("Recordings/")[-1].split(".")[0]
+
+        playback_url = f"{self._base_url}/recording/twilio/{recording_sid}" if recording_sid else recording_url
+        # Whisper downloads straight from the Twilio API when we have credentials.
+        source_url = playback_url
+        if payload.recording_sid and TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN:
+            source_url = (
+                f"{TWILIO_API_BASE}/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}"
+                f"/Recordings/{recording_sid}.mp3"
+            )
+
+        return CompletedRecording(
+            call_id=call_id,
+            recording_id=recording_sid,
+            playback_url=playback_url,
+            source_url=source_url,
+            duration_seconds=payload.recording_duration or None,
+        )
+
+    @staticmethod
+    def fetch_audio(url: str, timeout: float = DOWNLOAD_TIMEOUT_SECONDS) -> bytes:
+        auth = None
+        if url.startswith(TWILIO_API_BASE + "/") and TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN:
+            auth = HTTPBasicAuth(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        with observe_dependency("twilio"):
+            response = requests.get(url, auth=auth, timeout=timeout)
+            response.raise_for_status()
+        return response.content
+
+
+ADAPTERS = {
+    PROVIDER_TELNYX: TelnyxRecordings,
+    PROVIDER_TWILIO: TwilioRecordings,
+}
+
+
+def _duration_between(started_at: str | None, ended_at: str | None) -> int | None:
+    if not (started_at and ended_at):
+        return None
+    try:
+        start = datetime.fromisoformat(started_at.replace("Z", "+00:00"))
+        end = datetime.fromisoformat(ended_at.replace("Z", "+00:00"))
+        return int((end - start).total_seconds())
+    except Exception as exc:
+        logger.warning("Could not calculate duration: %s", exc)
+        return None
+
+
+# ── recording completion (webhook side) ───────────────────────────────────────
+
+def enqueue_transcription(call_id: str, source_url: str | None, provider: str) -> CallTranscript:
+    """
+    Mark the call's transcript as pending in the current session without committing.
+
+    The caller's commit publishes the job; workers pick it up on their next
+    poll, or immediately if the caller wakes a local worker.
+    """
+    transcript = db.session.query(CallTranscript).filter_by(call_id=call_id).first()
+    if not transcript:
+        transcript = CallTranscript(call_id=call_id, status='pending')
+        db.session.add(transcript)
+    transcript.status = 'pending'
+    transcript.source_url = source_url
+    transcript.source_provider = provider
+    transcript.updated_at = datetime.utcnow()
+    return transcript
+
+
+def complete_recording(adapter, payload, call_id: str | None = None) -> str:
+    """
+    Run a provider's recording-complete webhook (its decoded schema, see
+    schemas/webhooks.py) through the pipeline. Returns one of the RESULT_*
+    constants.
+
+    Must be called inside a Flask application context.
+    """
+    timings = StageTimings("recording", adapter.provider, call_id)
+    try:
+        with timings.stage("ingest") as stage:
+            recording = adapter.ingest(payload, call_id)
+            call = None
+            if recording is None:
+                result = RESULT_INVALID
+            else:
+                timings.call_id = recording.call_id
+                call = db.session.query(Call).filter_by(id=recording.call_id).first()
+                if call is None:
+                    result = RESULT_CALL_NOT_FOUND
+                elif call.recording_status == 'completed' and call.recording_url:
+                    result = RESULT_DUPLICATE
+                else:
+                    result = RESULT_COMPLETED
+            if result != RESULT_COMPLETED:
+                stage.outcome = OUTCOME_SKIPPED
+                logger.info("Ignoring %s recording callback for %s: %s", adapter.provider, timings.call_id, result)
+        if result != RESULT_COMPLETED:
+            return result
+
+        with timings.stage("store") as stage:
+            _store(adapter, recording, stage)
+
+        with timings.stage("persist"):
+            call.recording_url = recording.playback_url
+            call.recording_duration = recording.duration_seconds
+            call.recording_status = 'completed'
+            user_id = call.user_id or user_id_for_phone(call.from_phone)
+            if user_id and not call.user_id:
+                call.user_id = user_id
+            enqueue_transcription(call.id, recording.source_url or call.recording_url, adapter.provider)
+            bump_calls_version(call.from_phone)
+            record_call_event(EVENT_RECORDING_COMPLETED, call.from_phone, call.id, 'completed')
+            record_call_event(EVENT_TRANSCRIPT_STATUS, call.from_phone, call.id, 'pending')
+            if user_id:
+                enqueue_notification(KIND_RECORDING_COMPLETE, user_id, call.id)
+            db.session.commit()
+            count_transcript('pending')
+
+        with timings.stage("notify") as stage:
+            if user_id:
+                wake_dispatchers()
+            else:
+                stage.outcome = OUTCOME_SKIPPED
+
+        with timings.stage("transcribe"):
+            for wake in _transcription_wakers:
+                wake()
+
+        return result
+    finally:
+        timings.log()
+
+
+def _store(adapter, recording: CompletedRecording, stage: StageResult):
+    if not (adapter.stores_audio and is_storage_configured() and recording.recording_id and recording.source_url):
+        stage.outcome = OUTCOME_SKIPPED
+        return
+    try:
+        audio = adapter.fetch_audio(recording.source_url)
+    except Exception as exc:
+        logger.error("Failed to download recording %s: %s", recording.recording_id, exc)
+        stage.outcome = OUTCOME_FAILED
+        return
+    stage.bytes = len(audio)
+    if store_recording(recording.recording_id, audio) is None:
+        stage.outcome = OUTCOME_FAILED
+        return
+    # Transcribe from our copy: one provider download per recording, and no
+    # pre-signed URL to expire before a reclaimed job runs.
+    recording.source_url = recording_object_url(recording.recording_id)
+
+
+# ── transcription (worker side) ───────────────────────────────────────────────
+
+def transcribe_call(call_id: str):
+    """
+    Transcribe the call's recording with Whisper and store the result.
+
+    Must be called inside a Flask application context.
+    """
+    transcript = db.session.query(CallTranscript).filter_by(call_id=call_id).first()
+    timings = StageTimings("transcription", (transcript and transcript.source_provider) or "unknown", call_id)
+    try:
+        logger.info("Starting Whisper transcription for call %s", call_id)
+        call = db.session.query(Call).filter_by(id=call_id).first()
+        if not call or not transcript:
+            logger.warning("Call or transcript not found for %s", call_id)
+            return
+
+        source_url = transcript.source_url or call.recording_url
+        if not source_url:
+            logger.warning("No recording URL for call %s", call_id)
+            transcript.status = 'failed'
+            mark_call_changed(call_id)
+            record_call_event(EVENT_TRANSCRIPT_STATUS, call.from_phone, call_id, 'failed')
+            db.session.commit()
+            count_transcript('failed')
+            return
+
+        adapter = ADAPTERS.get(transcript.source_provider, TelnyxRecordings)
+        with timings.stage("fetch") as stage:
+            if source_url.startswith(S3_URL_SCHEME):
+                audio = fetch_recording_object(source_url)
+            else:
+                audio = adapter.fetch_audio(source_url, timeout=TRANSCRIPTION_DOWNLOAD_TIMEOUT_SECONDS)
+            stage.bytes = len(audio)
+
+        with timings.stage("transcribe"):
+            result = get_transcript_service().get_transcript_from_bytes(audio, filename="recording.mp3")
+
+        with timings.stage("persist"):
+            transcript.text = result.get("text") or ""
+            transcript.segments = result.get("segments") or None
+            transcript.status = "completed"
+            transcript.language = result.get("language")
+            transcript.duration_seconds = result.get("duration")
+            transcript.updated_at = datetime.utcnow()
+            if call.user_id:
+                enqueue_notification(KIND_TRANSCRIPT_READY, call.user_id, call_id)
+            mark_call_changed(call_id)
+            record_call_event(EVENT_TRANSCRIPT_STATUS, call.from_phone, call_id, 'completed')
+            db.session.commit()
+            count_transcript('completed')
+
+        with timings.stage("notify") as stage:
+            if call.user_id:
+                wake_dispatchers()
+            else:
+                stage.outcome = OUTCOME_SKIPPED
+        logger.info("Whisper transcription completed for call %s", call_id)
+    except Exception as e:
+        logger.error("Error transcribing call %s: %s", call_id, e)
+        db.session.rollback()
+        try:
+            transcript = db.session.query(CallTranscript).filter_by(call_id=call_id).first()
+            if transcript:
+                transcript.status = "failed"
+                transcript.updated_at = datetime.utcnow()
+                mark_call_changed(call_id)
+                record_call_event_for_call(EVENT_TRANSCRIPT_STATUS, call_id, 'failed')
+            db.session.commit()
+            count_transcript('failed')
+        except Exception as inner_e:
+            logger.error("Failed to mark transcript %s as failed: %s", call_id, inner_e)
+    finally:
+        if timings.stages:
+            timings.log()
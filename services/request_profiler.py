@@ -0,0 +1,224 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when it carries the PROFILE_HEADER set to PROFILE_TOKEN
+(`X-Profile: <token>`) or is picked by PROFILE_SAMPLE_RATE. Without a
+PROFILE_TOKEN the header is ignored: profiling makes a request slower and its
+Server-Timing header describes our queries and dependencies, so clients must
+not be able to switch it on. A profiled request collects
+
+    SQL statements and their cumulative time    SQLAlchemy cursor events
+    outbound calls per dependency and their time services.metrics.observe_dependency
+    serialization time                           JSON encoding plus `serialization()` blocks
+
+and returns them as a `Server-Timing` header, e.g.
+
+    Server-Timing: db;dur=4.1;desc="6 queries", ext-s3;dur=18.0;desc="1 call",
+                   serialize;dur=0.9, app;dur=2.3, total;dur=25.3
+
+A profiled streamed response (e.g. get_calls_for_user) is buffered before
+the header is written, so the profile includes the queries and encoding that
+produce its body; unprofiled requests still stream.
+
+Profiles slower than PROFILE_SLOW_MS are logged. When one statement runs
+PROFILE_N_PLUS_ONE_THRESHOLD or more times in a request — a relationship
+lazy-loaded per row, a query issued in a loop — the profile is logged as a
+likely N+1 with the statement and its count, whatever the request took.
+
+Unprofiled requests pay only for a contextvar lookup around each SQL statement.
+"""
+
+import hmac
+import logging
+import os
+import random
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from flask import g, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services.metrics import add_dependency_observer
+
+logger = logging.getLogger(__name__)
+
+
+# ── configuration ────────────────────────────────────────────────────────────
+
+PROFILE_HEADER = os.environ.get("PROFILE_HEADER", "X-Profile")
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", "1000"))
+PROFILE_N_PLUS_ONE_THRESHOLD = int(os.environ.get("PROFILE_N_PLUS_ONE_THRESHOLD", "5"))
+
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+# ── profile ───────────────────────────────────────────────────────────────────
+
+@dataclass
+class RequestProfile:
+    started: float = field(default_factory=time.perf_counter)
+    sql_count: int = 0
+    sql_seconds: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    dependency_calls: Counter = field(default_factory=Counter)
+    dependency_seconds: Counter = field(default_factory=Counter)
+    serialize_seconds: float = 0.0
+
+    def record_sql(self, statement: str, seconds: float):
+        self.sql_count += 1
+        self.sql_seconds += seconds
+        self.statements[_fingerprint(statement)] += 1
+
+    def record_dependency(self, name: str, seconds: float):
+        self.dependency_calls[name] += 1
+        self.dependency_seconds[name] += seconds
+
+    def n_plus_one(self, threshold: int = PROFILE_N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+    def server_timing(self, total_seconds: float) -> str:
+        entries = [
+            f'db;dur={self.sql_seconds * 1000:.1f};'
+            f'desc="{self.sql_count} quer{"ies" if self.sql_count != 1 else "y"}"'
+        ]
+        for name in sorted(self.dependency_calls):
+            calls = self.dependency_calls[name]
+            entries.append(
+                f'ext-{name};dur={self.dependency_seconds[name] * 1000:.1f};'
+                f'desc="{calls} call{"s" if calls != 1 else ""}"'
+            )
+        entries.append(f"serialize;dur={self.serialize_seconds * 1000:.1f}")
+        accounted = self.sql_seconds + sum(self.dependency_seconds.values()) + self.serialize_seconds
+        entries.append(f"app;dur={max(total_seconds - accounted, 0) * 1000:.1f}")
+        entries.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(entries)
+
+    def summary(self, total_seconds: float) -> dict:
+        return {
+            "total_ms": round(total_seconds * 1000, 1),
+            "sql_count": self.sql_count,
+            "sql_ms": round(self.sql_seconds * 1000, 1),
+            "io": {
+                name: {"calls": calls, "ms": round(self.dependency_seconds[name] * 1000, 1)}
+                for name, calls in self.dependency_calls.items()
+            },
+            "serialize_ms": round(self.serialize_seconds * 1000, 1),
+        }
+
+
+_current: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+
+
+def current_profile() -> RequestProfile | None:
+    return _current.get()
+
+
+def _fingerprint(statement: str) -> str:
+    """Collapse whitespace and expanded IN (...) lists so repeats of one query compare equal."""
+    return _PLACEHOLDER_LIST.sub("(...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+@contextmanager
+def serialization():
+    """Count the enclosed block (building response dicts) as serialization time."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.serialize_seconds += time.perf_counter() - started
+
+
+# ── hooks ─────────────────────────────────────────────────────────────────────
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    if profile is None:
+        return
+    started = conn.info.get("profile_started")
+    if started:
+        profile.record_sql(statement, time.perf_counter() - started.pop())
+
+
+def _observe_dependency(name: str, seconds: float, outcome: str):
+    profile = _current.get()
+    if profile is not None:
+        profile.record_dependency(name, seconds)
+
+
+class ProfilingJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, with `jsonify` encoding counted as serialization time."""
+
+    def dumps(self, obj, **kwargs):
+        with serialization():
+            return super().dumps(obj, **kwargs)
+
+
+def _requested() -> bool:
+    value = request.headers.get(PROFILE_HEADER)
+    if not (value and PROFILE_TOKEN):
+        return False
+    return hmac.compare_digest(value, PROFILE_TOKEN)
+
+
+_hooks_installed = False
+
+
+def init_app(app):
+    global _hooks_installed
+    if not _hooks_installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        add_dependency_observer(_observe_dependency)
+        _hooks_installed = True
+    app.json = ProfilingJSONProvider(app)
+
+    @app.before_request
+    def _start_profile():
+        if _requested() or (PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE):
+            g.profile_token = _current.set(RequestProfile())
+
+    @app.after_request
+    def _finish_profile(response):
+        profile = _current.get()
+        if profile is None:
+            return response
+        if response.is_streamed:
+            # Run the body's queries and encoding now, inside the profile.
+            response.make_sequence()
+        total = time.perf_counter() - profile.started
+        response.headers["Server-Timing"] = profile.server_timing(total)
+
+        repeated = profile.n_plus_one()
+        if repeated or total * 1000 >= PROFILE_SLOW_MS:
+            fields = {"method": request.method, "path": request.path, "status": response.status_code}
+            fields.update(profile.summary(total))
+            if repeated:
+                fields["n_plus_one"] = [{"statement": s[:300], "count": n} for s, n in repeated]
+                logger.warning("Possible N+1 queries", extra=fields)
+            else:
+                logger.warning("Slow request", extra=fields)
+        return response
+
+    @app.teardown_request
+    def _clear_profile(exc):
+        token = g.pop("profile_token", None)
+        if token is not None:
+            _current.reset(token)
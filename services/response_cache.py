@@ -0,0 +1,134 @@
+"""
+Cache of serialized call-list responses.
+
+Entries are keyed by the list's ETag (main.get_calls_for_user), which is
+derived from the user's `calls_version` and the request's options. Every
+write to a user's calls or transcripts (webhooks, transcription workers,
+delete endpoints) bumps that version in its own transaction (see
+database/call_versions.py). A committed write therefore makes the user's
+old entries unreachable at once, in every process, without tracking which
+entries exist. Unreachable entries age out through LRU eviction and the TTL.
+
+Two tiers:
+
+  * in-process: a TTLCache of RESPONSE_CACHE_MAXSIZE entries, always on
+  * shared: Redis at RESPONSE_CACHE_REDIS_URL (optional, `pip install redis`),
+    so gunicorn workers and replicas reuse each other's responses
+
+Bodies larger than RESPONSE_CACHE_MAX_ENTRY_BYTES are not cached. Redis
+errors are logged and treated as misses; the shared tier is then skipped
+for RESPONSE_CACHE_REDIS_RETRY_SECONDS.
+"""
+
+import logging
+import os
+import time
+from functools import lru_cache
+
+from services import metrics
+from services.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+# ── configuration ────────────────────────────────────────────────────────────
+
+RESPONSE_CACHE_TTL_SECONDS = float(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", "300"))
+RESPONSE_CACHE_MAXSIZE = int(os.environ.get("RESPONSE_CACHE_MAXSIZE", "512"))
+RESPONSE_CACHE_MAX_ENTRY_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRY_BYTES", str(128 * 1024)))
+RESPONSE_CACHE_REDIS_URL = os.environ.get("RESPONSE_CACHE_REDIS_URL")
+RESPONSE_CACHE_REDIS_TIMEOUT_SECONDS = float(os.environ.get("RESPONSE_CACHE_REDIS_TIMEOUT_SECONDS", "0.1"))
+RESPONSE_CACHE_REDIS_RETRY_SECONDS = float(os.environ.get("RESPONSE_CACHE_REDIS_RETRY_SECONDS", "30"))
+
+KEY_PREFIX = "call-list:"
+
+RESULT_HIT_LOCAL = "hit_local"
+RESULT_HIT_SHARED = "hit_shared"
+RESULT_MISS = "miss"
+
+_local = TTLCache(RESPONSE_CACHE_MAXSIZE, RESPONSE_CACHE_TTL_SECONDS)
+_shared_down_until = 0.0
+
+
+def is_enabled() -> bool:
+    return RESPONSE_CACHE_TTL_SECONDS > 0 and RESPONSE_CACHE_MAXSIZE > 0
+
+
+# ── shared tier ───────────────────────────────────────────────────────────────
+
+@lru_cache(maxsize=1)
+def _redis():
+    """Redis client, built on first use so the package is only needed when configured."""
+    import redis
+
+    return redis.Redis.from_url(
+        RESPONSE_CACHE_REDIS_URL,
+        socket_timeout=RESPONSE_CACHE_REDIS_TIMEOUT_SECONDS,
+        socket_connect_timeout=RESPONSE_CACHE_REDIS_TIMEOUT_SECONDS,
+    )
+
+
+def _shared(operation: str, *args):
+    """Run one Redis command, or return None when the shared tier is off or failing."""
+    global _shared_down_until
+    if not RESPONSE_CACHE_REDIS_URL or time.monotonic() < _shared_down_until:
+        return None
+    try:
+        with metrics.observe_dependency("redis"):
+            return getattr(_redis(), operation)(*args)
+    except Exception as exc:
+        _shared_down_until = time.monotonic() + RESPONSE_CACHE_REDIS_RETRY_SECONDS
+        logger.warning("Response cache: Redis %s failed, bypassing it for %ss: %s",
+                       operation, RESPONSE_CACHE_REDIS_RETRY_SECONDS, exc)
+        return None
+
+
+# ── public API ────────────────────────────────────────────────────────────────
+
+def lookup(key: str) -> bytes | None:
+    if not is_enabled():
+        return None
+    body = _local.get(key)
+    if body is not None:
+        metrics.count_cache_lookup("call_list", RESULT_HIT_LOCAL)
+        return body
+    body = _shared("get", KEY_PREFIX + key)
+    if body is not None:
+        _local.set(key, body)
+        metrics.count_cache_lookup("call_list", RESULT_HIT_SHARED)
+        return body
+    metrics.count_cache_lookup("call_list", RESULT_MISS)
+    return None
+
+
+def store(key: str, body: bytes):
+    if not is_enabled() or len(body) > RESPONSE_CACHE_MAX_ENTRY_BYTES:
+        return
+    _local.set(key, body)
+    _shared("set", KEY_PREFIX + key, body, max(1, int(RESPONSE_CACHE_TTL_SECONDS)))
+
+
+def storing(key: str):
+    """
+    Wrapper for a response's chunk iterator (see schemas.responses.stream_json_array)
+    that caches the body under `key` once the last chunk has been sent.
+    A response that fails midway, or outgrows the entry limit, is not cached.
+    """
+    def tee(chunks):
+        parts, size = [], 0
+        for chunk in chunks:
+            yield chunk
+            if parts is not None:
+                size += len(chunk)
+                if size <= RESPONSE_CACHE_MAX_ENTRY_BYTES:
+                    parts.append(chunk)
+                else:
+                    parts = None
+        if parts is not None:
+            store(key, b"".join(parts))
+
+    return tee
+
+
+def clear():
+    _local.clear()
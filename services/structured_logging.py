@@ -0,0 +1,235 @@
+"""
+Structured logging for the web and worker processes.
+
+`configure_logging()` routes every stdlib logger through a `QueueHandler`: the
+request thread only formats the message and puts the record on an in-memory
+queue; a `QueueListener` thread does the JSON encoding and the stdout write.
+
+    LOG_LEVEL              root level (default INFO)
+    LOG_LEVELS             per-logger overrides, e.g. "main=DEBUG,services.call_control=WARNING"
+    LOG_FORMAT             "json" (default) or "text" for local development
+    LOG_DEBUG_SAMPLE_RATE  fraction of DEBUG records kept (default 0.01); pass
+                           extra={"sample_rate": 1.0} to keep a specific line
+    LOG_REDACT             redact PII fields (default on)
+
+Context goes in `extra=` rather than the message, so it stays machine-readable
+and can be redacted by field name:
+
+    logger.info("Call created", extra={"call_id": call_id, "phone": user_phone})
+
+    {"ts": "2026-10-19T12:00:00.123Z", "level": "INFO", "logger": "main",
+     "msg": "Call created", "call_id": "v3:...", "phone": "+*******4567"}
+
+Phone fields keep their last four digits, token fields are replaced entirely
+and URL fields lose their query string (pre-signed credentials). Phone numbers
+and URLs that end up inside a message are redacted the same way.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from urllib.parse import urlsplit, urlunsplit
+
+
+# ── configuration ────────────────────────────────────────────────────────────
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.environ.get("LOG_LEVELS", "")
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json").lower()
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+LOG_REDACT = os.environ.get("LOG_REDACT", "1").lower() not in ("0", "false", "no")
+
+# Telnyx (`from`, `to`), Twilio (`From`, `To`, `Caller`, `Called`) and our own field names.
+PHONE_FIELDS = frozenset({
+    "phone", "phone_number", "from_phone", "user_phone",
+    "from", "to", "From", "To", "Caller", "Called", "ForwardedFrom",
+})
+SECRET_FIELDS = frozenset({"fcm_token", "token", "tokens", "AccountSid", "auth_token"})
+URL_FIELDS = frozenset({"mp3", "wav", "RecordingUrl", "recording_url", "url"})
+DROPPED_FIELDS = frozenset({"CallerName", "FromCity", "FromZip", "ToCity", "ToZip"})
+
+_PHONE_PATTERN = re.compile(r"\+\d{7,15}")
+_URL_QUERY_PATTERN = re.compile(r"(https?://[^\s?\"']+)\?[^\s\"']*")
+
+# Attributes every LogRecord has; anything else on a record came from `extra=`.
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+_INTERNAL_EXTRAS = frozenset({"sample_rate"})
+
+
+# ── redaction ─────────────────────────────────────────────────────────────────
+
+def _mask_phone(value: str) -> str:
+    digits = value[-4:]
+    return ("+" if value.startswith("+") else "") + "*" * max(len(value) - 5, 3) + digits
+
+
+def _strip_query(value: str) -> str:
+    parts = urlsplit(value)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+
+def redact_message(message: str) -> str:
+    message = _URL_QUERY_PATTERN.sub(r"\1", message)
+    return _PHONE_PATTERN.sub(lambda m: _mask_phone(m.group()), message)
+
+
+def redact_field(key, value):
+    """Return `value` with PII removed according to its field name (recursing into containers)."""
+    if isinstance(value, dict):
+        return {k: redact_field(k, v) for k, v in value.items() if k not in DROPPED_FIELDS}
+    if isinstance(value, (list, tuple)):
+        return [redact_field(key, v) for v in value]
+    if value is None or value == "":
+        return value
+    if key in SECRET_FIELDS:
+        return "[redacted]"
+    if isinstance(value, str):
+        if key in PHONE_FIELDS:
+            return _mask_phone(value)
+        if key in URL_FIELDS:
+            return _strip_query(value)
+        return redact_message(value)
+    return value
+
+
+# ── formatting and filtering ──────────────────────────────────────────────────
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per record (or `text` key=value lines), with `extra=` fields redacted."""
+
+    def __init__(self, fmt: str = "json", redact: bool = True):
+        super().__init__()
+        self._json = fmt != "text"
+        self._redact = redact
+
+    def _fields(self, record: logging.LogRecord) -> dict:
+        fields = {}
+        for key, value in vars(record).items():
+            if key in _RECORD_ATTRS or key in _INTERNAL_EXTRAS or key.startswith("_"):
+                continue
+            fields[key] = redact_field(key, value) if self._redact else value
+        return fields
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        if self._redact:
+            message = redact_message(message)
+        fields = self._fields(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+
+        if not self._json:
+            line = f"{self.formatTime(record)} {record.levelname} {record.name}: {message}"
+            if fields:
+                line += " " + " ".join(f"{k}={v!r}" for k, v in fields.items())
+            if record.exc_text:
+                line += "\n" + record.exc_text
+            return line
+
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds")
+                  .replace("+00:00", "Z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": message,
+            "thread": record.threadName,
+        }
+        entry.update(fields)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DebugSampler(logging.Filter):
+    """Keep a random `sample_rate` fraction of DEBUG records; other levels always pass."""
+
+    def __init__(self, sample_rate: float = LOG_DEBUG_SAMPLE_RATE):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = getattr(record, "sample_rate", self.sample_rate)
+        return rate >= 1 or random.random() < rate
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that only merges the message arguments on the calling thread;
+    encoding happens on the listener thread. The traceback is rendered here
+    because exc_info cannot outlive the caller's frame safely.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# ── setup ─────────────────────────────────────────────────────────────────────
+
+_configured = False
+_configure_lock = threading.Lock()
+_listener: QueueListener | None = None
+
+
+def parse_levels(spec: str) -> dict[str, str]:
+    """"main=DEBUG, services.call_control=warning" -> {"main": "DEBUG", "services.call_control": "WARNING"}"""
+    levels = {}
+    for item in spec.split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _start_listener(log_queue, handler):
+    global _listener
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def configure_logging(stream=None):
+    """Install the queue handler on the root logger. Safe to call more than once."""
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(StructuredFormatter(LOG_FORMAT, redact=LOG_REDACT))
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = _NonBlockingQueueHandler(log_queue)
+        queue_handler.addFilter(DebugSampler())
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(queue_handler)
+        root.setLevel(LOG_LEVEL)
+        for name, level in parse_levels(LOG_LEVELS).items():
+            logging.getLogger(name).setLevel(level)
+
+        _start_listener(log_queue, output)
+        # A forked child (gunicorn --preload) inherits the queue but not the listener thread.
+        os.register_at_fork(after_in_child=lambda: _start_listener(log_queue, output))
+        atexit.register(_stop_listener)
+        _configured = True
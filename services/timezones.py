@@ -0,0 +1,99 @@
+"""
+Timezone data for scheduled notifications.
+
+An explicit IANA name stored on the user wins. Otherwise the timezone is
+derived from the user's country code (ISO 3166 alpha-2 such as "KR", or a
+dialling code such as "+82"). Countries spanning several zones map to their
+most populous one; users there can send an explicit timezone on register.
+
+The scheduler resolves users in SQL from these tables (see
+`_bucket_user_filter` in services/notification_scheduler.py).
+"""
+
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+
+DEFAULT_TIMEZONE = "Asia/Seoul"
+
+COUNTRY_TIMEZONES: dict[str, str] = {
+    "KR": "Asia/Seoul",
+    "JP": "Asia/Tokyo",
+    "CN": "Asia/Shanghai",
+    "TW": "Asia/Taipei",
+    "HK": "Asia/Hong_Kong",
+    "SG": "Asia/Singapore",
+    "IN": "Asia/Kolkata",
+    "AU": "Australia/Sydney",
+    "US": "America/New_York",
+    "CA": "America/Toronto",
+    "MX": "America/Mexico_City",
+    "BR": "America/Sao_Paulo",
+    "GB": "Europe/London",
+    "IE": "Europe/Dublin",
+    "FR": "Europe/Paris",
+    "DE": "Europe/Berlin",
+    "ES": "Europe/Madrid",
+    "IT": "Europe/Rome",
+    "NL": "Europe/Amsterdam",
+    "PL": "Europe/Warsaw",
+    "HU": "Europe/Budapest",
+    "RO": "Europe/Bucharest",
+    "MD": "Europe/Chisinau",
+    "UA": "Europe/Kyiv",
+    "TR": "Europe/Istanbul",
+    "RU": "Europe/Moscow",
+}
+
+DIAL_CODE_COUNTRIES: dict[str, str] = {
+    "82": "KR",
+    "81": "JP",
+    "86": "CN",
+    "886": "TW",
+    "852": "HK",
+    "65": "SG",
+    "91": "IN",
+    "61": "AU",
+    "1": "US",
+    "52": "MX",
+    "55": "BR",
+    "44": "GB",
+    "353": "IE",
+    "33": "FR",
+    "49": "DE",
+    "34": "ES",
+    "39": "IT",
+    "31": "NL",
+    "48": "PL",
+    "36": "HU",
+    "40": "RO",
+    "373": "MD",
+    "380": "UA",
+    "90": "TR",
+    "7": "RU",
+}
+
+
+def is_valid_timezone(name: str | None) -> bool:
+    if not name:
+        return False
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+def country_codes_for(timezone_name: str) -> list[str]:
+    """All stored country_code spellings that resolve to `timezone_name`."""
+    codes = [code for code, tz in COUNTRY_TIMEZONES.items() if tz == timezone_name]
+    for dial, country in DIAL_CODE_COUNTRIES.items():
+        if country in codes:
+            codes.extend((dial, f"+{dial}"))
+    return codes
+
+
+def known_country_codes() -> list[str]:
+    codes = list(COUNTRY_TIMEZONES)
+    for dial in DIAL_CODE_COUNTRIES:
+        codes.extend((dial, f"+{dial}"))
+    return codes
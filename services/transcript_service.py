@@ -1,17 +1,41 @@
 """
 Transcript service using OpenAI Whisper API.
 Accepts a recording URL, downloads the audio, and returns transcription as phrases (segments).
+
+The openai SDK is imported when the first service is constructed, not when this
+module is imported, so it does not add to web worker cold start.
 """
 import io
 import logging
+import os
+import threading
 import requests
-from openai import OpenAI
+
+from services.metrics import observe_dependency
 
 logger = logging.getLogger(__name__)
 
+_shared_service = None
+_shared_service_lock = threading.Lock()
+
+
+def get_transcript_service() -> "TranscriptService":
+    """Return a process-wide TranscriptService for OPENAI_API_KEY, created on first use.
+
+    Reusing one OpenAI client keeps its HTTP connection pool warm between transcriptions.
+    """
+    global _shared_service
+    if _shared_service is None:
+        with _shared_service_lock:
+            if _shared_service is None:
+                _shared_service = TranscriptService(api_key=os.environ.get("OPENAI_API_KEY"))
+    return _shared_service
+
 
 class TranscriptService:
     def __init__(self, api_key: str | None = None):
+        from openai import OpenAI
+
         self.client = OpenAI(api_key=api_key)
         self.logger = logger
 
@@ -53,12 +77,13 @@ class TranscriptService:
             audio_file.name = "recording.mp3"
 
             # Request phrase-level (segment) timestamps, not word-level
-            transcription = self.client.audio.transcriptions.create(
-                file=audio_file,
-                model="whisper-1",
-                response_format="verbose_json",
-                timestamp_granularities=["segment"],
-            )
+            with observe_dependency("openai"):
+                transcription = self.client.audio.transcriptions.create(
+                    file=audio_file,
+                    model="whisper-1",
+                    response_format="verbose_json",
+                    timestamp_granularities=["segment"],
+                )
 
             # Build segments as list of { start, end, text }
             segments = []
@@ -105,12 +130,13 @@ class TranscriptService:
             audio_file = io.BytesIO(audio_bytes)
             audio_file.name = filename
 
-            transcription = self.client.audio.transcriptions.create(
-                file=audio_file,
-                model="whisper-1",
-                response_format="verbose_json",
-                timestamp_granularities=["segment"],
-            )
+            with observe_dependency("openai"):
+                transcription = self.client.audio.transcriptions.create(
+                    file=audio_file,
+                    model="whisper-1",
+                    response_format="verbose_json",
+                    timestamp_granularities=["segment"],
+                )
 
             segments = []
             raw_segments = getattr(transcription, "segments", None) or []
@@ -0,0 +1,182 @@
+"""
+Whisper transcription jobs, consumed from the call_transcripts table.
+
+The recording pipeline only marks a CallTranscript row as 'pending' and stores
+where the audio can be downloaded from (`source_url`, `source_provider`). A
+`TranscriptionWorker` — in the web process or in the dedicated worker started
+with `python -m services.worker` — claims pending rows with
+SELECT ... FOR UPDATE SKIP LOCKED and runs the pipeline's `transcribe_call`.
+
+A row stuck in 'processing' longer than PROCESSING_TIMEOUT_SECONDS (its worker
+died mid-transcription) becomes claimable again. A worker that shuts down
+with jobs still running puts them back to 'pending' (`release_in_flight()`).
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, update
+
+from database.call_events import EVENT_TRANSCRIPT_STATUS, record_call_event_for_call
+from database.call_versions import mark_call_changed
+from database.database import db
+from models.call_transcript import CallTranscript
+from services.metrics import track_job
+from services.recording_pipeline import add_transcription_waker, transcribe_call
+
+logger = logging.getLogger(__name__)
+
+
+# ── configuration ────────────────────────────────────────────────────────────
+
+TRANSCRIPTION_CONCURRENCY = int(os.environ.get("TRANSCRIPTION_CONCURRENCY", "4"))
+POLL_INTERVAL_SECONDS = 2
+PROCESSING_TIMEOUT_SECONDS = 15 * 60
+
+
+# ── consumer ──────────────────────────────────────────────────────────────────
+
+def claim_next_transcription() -> str | None:
+    """
+    Claim one pending (or abandoned) transcription job. Returns its call id,
+    or None when the queue is empty.
+
+    The claim is a compare-and-set on (status, updated_at), so two workers
+    can never both take a row even where SKIP LOCKED is unavailable (SQLite).
+
+    Must be called inside a Flask application context.
+    """
+    while True:
+        stale_before = datetime.utcnow() - timedelta(seconds=PROCESSING_TIMEOUT_SECONDS)
+        candidate = (
+            db.session.query(CallTranscript.id, CallTranscript.call_id,
+                             CallTranscript.status, CallTranscript.updated_at)
+            .filter(
+                CallTranscript.source_url.isnot(None),
+                or_(
+                    CallTranscript.status == 'pending',
+                    and_(CallTranscript.status == 'processing', CallTranscript.updated_at < stale_before),
+                ),
+            )
+            .order_by(CallTranscript.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if candidate is None:
+            db.session.commit()
+            return None
+
+        claimed = db.session.execute(
+            update(CallTranscript)
+            .where(
+                CallTranscript.id == candidate.id,
+                CallTranscript.status == candidate.status,
+                CallTranscript.updated_at == candidate.updated_at,
+            )
+            .values(status='processing', updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed:
+            mark_call_changed(candidate.call_id)
+            record_call_event_for_call(EVENT_TRANSCRIPT_STATUS, candidate.call_id, 'processing')
+        db.session.commit()
+        if claimed:
+            return candidate.call_id
+
+
+def release_transcriptions(call_ids: list[str]) -> int:
+    """
+    Put this process's unfinished 'processing' jobs back to 'pending' so
+    another worker takes them without waiting for PROCESSING_TIMEOUT_SECONDS.
+
+    Must be called inside a Flask application context.
+    """
+    released = 0
+    for call_id in call_ids:
+        if db.session.execute(
+            update(CallTranscript)
+            .where(CallTranscript.call_id == call_id, CallTranscript.status == 'processing')
+            .values(status='pending', updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount:
+            mark_call_changed(call_id)
+            record_call_event_for_call(EVENT_TRANSCRIPT_STATUS, call_id, 'pending')
+            released += 1
+    db.session.commit()
+    return released
+
+
+# ── worker ────────────────────────────────────────────────────────────────────
+
+class TranscriptionWorker:
+    """
+    Pool of background threads that drain pending transcription jobs.
+    Producers call `wake()` after committing to skip the poll delay.
+    """
+
+    def __init__(self, flask_app, concurrency: int = TRANSCRIPTION_CONCURRENCY, autostart: bool = True):
+        self._app = flask_app
+        self._concurrency = max(1, concurrency)
+        self._threads: list[threading.Thread] = []
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._in_flight: set[str] = set()
+        add_transcription_waker(self.wake)
+        if autostart:
+            self.start()
+
+    def start(self):
+        if any(t.is_alive() for t in self._threads):
+            return
+        self._stop_event.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"transcription-worker-{i}", daemon=True)
+            for i in range(self._concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("TranscriptionWorker started with %d threads", self._concurrency)
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def join(self, timeout: float | None = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def release_in_flight(self) -> int:
+        """After stop() and join(): release jobs whose threads are still transcribing."""
+        call_ids = list(self._in_flight)
+        if not call_ids:
+            return 0
+        with self._app.app_context():
+            return release_transcriptions(call_ids)
+
+    def wake(self):
+        self._wake_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                with self._app.app_context():
+                    while not self._stop_event.is_set():
+                        call_id = claim_next_transcription()
+                        if call_id is None:
+                            break
+                        self._in_flight.add(call_id)
+                        try:
+                            with track_job("transcription"):
+                                transcribe_call(call_id)
+                        finally:
+                            self._in_flight.discard(call_id)
+            except Exception as exc:
+                logger.error("TranscriptionWorker iteration failed: %s", exc)
+
+            self._wake_event.wait(POLL_INTERVAL_SECONDS)
+            self._wake_event.clear()
@@ -0,0 +1,115 @@
+"""
+Per-process caches for the user lookups made on every call webhook.
+
+  * phone number -> user id, used to attach inbound calls to their owner
+  * user id -> PushProfile (fcm_token, push flag, language), used when
+    delivering push notifications
+
+Only hits are cached, so a number that registers later is picked up on its
+next call. The call webhooks resolve a missing owner inside their INSERT and
+hand it back with `remember_user_id_for_phone()`. Endpoints that change these fields call `invalidate_user()` after
+committing. Invalidation is local to the process; other gunicorn workers and
+the background worker see the change once their entry expires, so
+USER_CACHE_TTL_SECONDS bounds how stale a lookup can be.
+
+Must be used inside a Flask application context.
+"""
+
+import os
+import uuid
+from typing import NamedTuple
+
+from database.database import db
+from models.user import User
+from services import metrics
+from services.ttl_cache import TTLCache
+
+
+# ── configuration ────────────────────────────────────────────────────────────
+
+USER_CACHE_TTL_SECONDS = float(os.environ.get("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAXSIZE = int(os.environ.get("USER_CACHE_MAXSIZE", "10000"))
+
+RESULT_HIT = "hit"
+RESULT_MISS = "miss"
+
+
+class PushProfile(NamedTuple):
+    fcm_token: str | None
+    push_notifications_enabled: bool
+    language: str | None
+
+
+_user_ids_by_phone = TTLCache(USER_CACHE_MAXSIZE, USER_CACHE_TTL_SECONDS)
+_push_profiles = TTLCache(USER_CACHE_MAXSIZE, USER_CACHE_TTL_SECONDS)
+
+
+# ── lookups ───────────────────────────────────────────────────────────────────
+
+def cached_user_id_for_phone(phone_number: str | None) -> uuid.UUID | None:
+    """Return the cached owner of `phone_number` without touching the database."""
+    if not phone_number:
+        return None
+    user_id = _user_ids_by_phone.get(phone_number)
+    metrics.count_user_cache_lookup("phone", RESULT_HIT if user_id is not None else RESULT_MISS)
+    return user_id
+
+
+def remember_user_id_for_phone(phone_number: str | None, user_id):
+    """Cache an owner the caller resolved itself (e.g. inside the call INSERT)."""
+    if phone_number and user_id is not None:
+        _user_ids_by_phone.set(phone_number, user_id)
+
+
+def user_id_for_phone(phone_number: str | None) -> uuid.UUID | None:
+    """Resolve the oldest user registered with `phone_number`."""
+    if not phone_number:
+        return None
+    user_id = cached_user_id_for_phone(phone_number)
+    if user_id is None:
+        user_id = (
+            db.session.query(User.id)
+            .filter_by(phone_number=phone_number)
+            .order_by(User.created_at.asc())
+            .limit(1)
+            .scalar()
+        )
+        if user_id is not None:
+            _user_ids_by_phone.set(phone_number, user_id)
+    return user_id
+
+
+def push_profile(user_id) -> PushProfile | None:
+    """Return the push settings of `user_id`, or None if the user does not exist."""
+    if not user_id:
+        return None
+    key = str(user_id)
+    profile = _push_profiles.get(key)
+    metrics.count_user_cache_lookup("push_profile", RESULT_HIT if profile is not None else RESULT_MISS)
+    if profile is None:
+        row = (
+            db.session.query(User.fcm_token, User.push_notifications_enabled, User.language)
+            .filter_by(id=user_id)
+            .first()
+        )
+        if row is None:
+            return None
+        profile = PushProfile(row.fcm_token, bool(row.push_notifications_enabled), row.language)
+        _push_profiles.set(key, profile)
+    return profile
+
+
+# ── invalidation ──────────────────────────────────────────────────────────────
+
+def invalidate_user(user_id=None, *phone_numbers: str | None):
+    """Forget the cached profile of `user_id` and the owners of `phone_numbers`."""
+    if user_id:
+        _push_profiles.pop(str(user_id))
+    for phone_number in phone_numbers:
+        if phone_number:
+            _user_ids_by_phone.pop(phone_number)
+
+
+def clear():
+    _user_ids_by_phone.clear()
+    _push_profiles.clear()
@@ -0,0 +1,168 @@
+"""
+Append-only journal of incoming carrier webhooks, for reproducing production load.
+
+When WEBHOOK_JOURNAL_PATH is set, every sampled request to a journaled path
+(`/answer`, `/answer/twilio`, `/record-complete` by default) is written as one
+JSON line:
+
+    {"received_at": 1760870000.123, "method": "POST", "path": "/answer",
+     "query": {...}, "content_type": "application/json", "body": {...},
+     "status": 200, "duration_ms": 4.2, "response_bytes": 2}
+
+Each line is written with a single O_APPEND write, so several gunicorn workers
+can share one file. `benchmarks/replay_webhooks.py` replays a journal.
+
+With redaction on (the default) phone numbers are replaced by stable fake
+E.164 numbers derived from a salted hash — the same caller always maps to the
+same fake number, so replays keep per-user behaviour — and query strings
+(pre-signed tokens) are stripped from URLs.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+
+# ── configuration ────────────────────────────────────────────────────────────
+
+WEBHOOK_JOURNAL_PATH = os.environ.get("WEBHOOK_JOURNAL_PATH")
+WEBHOOK_JOURNAL_SAMPLE_RATE = float(os.environ.get("WEBHOOK_JOURNAL_SAMPLE_RATE", "1.0"))
+WEBHOOK_JOURNAL_REDACT = os.environ.get("WEBHOOK_JOURNAL_REDACT", "1").lower() not in ("0", "false", "no")
+WEBHOOK_JOURNAL_REDACT_SALT = os.environ.get("WEBHOOK_JOURNAL_REDACT_SALT", "")
+
+JOURNALED_PATHS = ("/answer", "/answer/twilio", "/record-complete")
+
+# Telnyx (`from`, `to`) and Twilio (`From`, `To`, `Caller`, `Called`) fields holding phone numbers.
+PHONE_KEYS = frozenset({"from", "to", "From", "To", "Caller", "Called", "ForwardedFrom"})
+# Fields holding URLs whose query string may carry credentials.
+URL_KEYS = frozenset({"mp3", "wav", "RecordingUrl"})
+# Fields that are dropped entirely.
+DROP_KEYS = frozenset({"CallerName", "FromCity", "FromZip", "ToCity", "ToZip"})
+
+
+# ── redaction ─────────────────────────────────────────────────────────────────
+
+def _fake_phone(value: str, salt: str) -> str:
+    digest = hashlib.sha256((salt + value).encode()).hexdigest()
+    return "+999" + str(int(digest[:15], 16))[:10].zfill(10)
+
+
+def _strip_query(url: str) -> str:
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+
+def redact(value, salt: str = WEBHOOK_JOURNAL_REDACT_SALT, key: str | None = None):
+    """Return a copy of a decoded webhook body with phone numbers and signed URLs redacted."""
+    if isinstance(value, dict):
+        return {k: redact(v, salt, k) for k, v in value.items() if k not in DROP_KEYS}
+    if isinstance(value, list):
+        return [redact(v, salt, key) for v in value]
+    if isinstance(value, str) and value:
+        if key in PHONE_KEYS:
+            return _fake_phone(value, salt)
+        if key in URL_KEYS:
+            return _strip_query(value)
+    return value
+
+
+# ── journal ───────────────────────────────────────────────────────────────────
+
+class WebhookJournal:
+    """
+    Flask extension that records journaled requests. `init_app()` is a no-op
+    unless a journal path is configured.
+    """
+
+    def __init__(self, path: str | None = WEBHOOK_JOURNAL_PATH,
+                 sample_rate: float = WEBHOOK_JOURNAL_SAMPLE_RATE,
+                 redact_pii: bool = WEBHOOK_JOURNAL_REDACT,
+                 paths: tuple[str, ...] = JOURNALED_PATHS):
+        self._path = path
+        self._sample_rate = sample_rate
+        self._redact = redact_pii
+        self._paths = frozenset(paths)
+        self._fd: int | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._path) and self._sample_rate > 0
+
+    def init_app(self, app):
+        if not self.enabled:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        logger.info("Webhook journal enabled: %s (sample rate %.2f)", self._path, self._sample_rate)
+
+    def _before_request(self):
+        if request.path not in self._paths or random.random() >= self._sample_rate:
+            return
+        # Cache the raw body so it is still available after the view parses it.
+        request.get_data(cache=True)
+        g.webhook_journal_started = time.perf_counter()
+        g.webhook_journal_received_at = time.time()
+
+    def _after_request(self, response):
+        if getattr(g, "webhook_journal_started", None) is not None:
+            response_bytes = None if response.is_streamed else response.calculate_content_length()
+            self._record(response.status_code, response_bytes)
+        return response
+
+    def _teardown_request(self, exc):
+        # after_request is skipped when the view raised; still journal the request.
+        if exc is not None and getattr(g, "webhook_journal_started", None) is not None:
+            self._record(500, None)
+
+    def _record(self, status: int, response_bytes: int | None):
+        started = g.pop("webhook_journal_started")
+        try:
+            entry = {
+                "received_at": round(g.webhook_journal_received_at, 6),
+                "method": request.method,
+                "path": request.path,
+                "query": self._redacted(request.args.to_dict()),
+                "content_type": request.mimetype,
+                "body": self._body(),
+                "status": status,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "response_bytes": response_bytes,
+            }
+            self._append(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+        except Exception as exc:
+            logger.warning("Failed to journal webhook %s: %s", request.path, exc)
+
+    def _body(self):
+        if request.is_json:
+            body = request.get_json(silent=True)
+        elif request.mimetype in ("application/x-www-form-urlencoded", "multipart/form-data"):
+            body = request.form.to_dict()
+        else:
+            # Like schemas.parse_body(), treat an untyped body as url-encoded.
+            raw = request.get_data(as_text=True)
+            pairs = parse_qsl(raw, keep_blank_values=True) if raw else []
+            body = dict(pairs) if pairs else (raw or None)
+        body = self._redacted(body)
+        if self._redact and isinstance(body, str):
+            body = "<redacted>"
+        return body
+
+    def _redacted(self, value):
+        return redact(value) if self._redact else value
+
+    def _append(self, line: str):
+        with self._lock:
+            if self._fd is None:
+                self._fd = os.open(self._path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+            os.write(self._fd, line.encode())
@@ -0,0 +1,84 @@
+"""
+Background worker entry point.
+
+    python -m services.worker
+
+Runs the notification scheduler, the notification outbox dispatcher, the
+Whisper transcription workers and the call event pruner without serving HTTP. Set WORKER_METRICS_PORT
+to expose their Prometheus metrics. Start the web process with
+RUN_BACKGROUND_JOBS=0 so these jobs run only here; web and worker capacity can
+then be scaled independently.
+
+All jobs coordinate through the database (run records, SKIP LOCKED claims), so
+running several worker replicas — or leaving background jobs on in the web
+process as well — is safe.
+
+On SIGTERM the jobs stop claiming work and are given
+WORKER_SHUTDOWN_TIMEOUT_SECONDS to finish what they hold. Transcriptions
+still running after that are put back to 'pending' for another worker. The
+outbox's send leases and the scheduler's run heartbeats cover the rest.
+Keep the timeout below the orchestrator's grace period (docker-compose
+`stop_grace_period`).
+"""
+
+import importlib
+import logging
+import os
+import signal
+import threading
+import time
+
+from services.structured_logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+WORKER_SHUTDOWN_TIMEOUT_SECONDS = float(os.environ.get("WORKER_SHUTDOWN_TIMEOUT_SECONDS", "25"))
+
+
+def run():
+    # main starts background jobs on import unless told otherwise; the worker
+    # starts them explicitly below.
+    os.environ["RUN_BACKGROUND_JOBS"] = "0"
+    # A single process: keep metrics in memory rather than in gunicorn's
+    # multiprocess directory.
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    configure_logging()
+    web = importlib.import_module("main")
+
+    metrics_port = os.environ.get("WORKER_METRICS_PORT")
+    if metrics_port:
+        from prometheus_client import start_http_server
+        from services.metrics import registry
+
+        start_http_server(int(metrics_port), registry=registry())
+        logger.info("Worker metrics on :%s/metrics", metrics_port)
+
+    stop_event = threading.Event()
+
+    def _handle_signal(signum, frame):
+        logger.info("Worker received signal %s, shutting down", signum)
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, _handle_signal)
+    signal.signal(signal.SIGINT, _handle_signal)
+
+    jobs = (web.notification_scheduler, web.outbox_dispatcher, web.transcription_worker, web.call_event_pruner)
+    for job in jobs:
+        job.start()
+    logger.info("Worker started")
+
+    stop_event.wait()
+    for job in jobs:
+        job.stop()
+    deadline = time.monotonic() + WORKER_SHUTDOWN_TIMEOUT_SECONDS
+    for job in jobs:
+        job.join(max(0.0, deadline - time.monotonic()))
+
+    released = web.transcription_worker.release_in_flight()
+    if released:
+        logger.warning("Worker released %s unfinished transcriptions back to the queue", released)
+    logger.info("Worker stopped")
+
+
+if __name__ == "__main__":
+    run()